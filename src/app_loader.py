@@ -55,7 +55,7 @@ class AppLoader(QObject):
             
             # 2. 初始化FunASR引擎（最耗时）
             current_step += 1
-            self.progress_updated.emit(int(current_step/total_steps*100), "加载语音识别模型...")
+            self.progress_updated.emit(int(current_step/total_steps*100), "加载并预热语音识别模型...")
             self._load_funasr_engine()
             
             # 3. 初始化热键管理器
@@ -97,8 +97,9 @@ class AppLoader(QObject):
     def _load_funasr_engine(self):
         """加载FunASR引擎"""
         try:
-            from src.funasr_engine import FunASREngine
-            engine = FunASREngine(self.settings_manager)
+            # 优先连接独立的识别守护进程，不可用时在当前进程加载模型
+            from src.asr_daemon import create_funasr_engine
+            engine = create_funasr_engine(self.settings_manager)
             self.components['funasr_engine'] = engine
             # 确保信号在主线程中发射
             QMetaObject.invokeMethod(
@@ -177,7 +178,8 @@ class AppLoader(QObject):
             from src.clipboard_manager import ClipboardManager
             # 启用调试模式以获取详细日志
             debug_mode = self.settings_manager.get_setting('clipboard_debug', True)  # 默认启用调试
-            manager = ClipboardManager(debug_mode=debug_mode)
+            verify_copy = self.settings_manager.get_setting('paste.verify_copy', False)
+            manager = ClipboardManager(debug_mode=debug_mode, verify_copy=verify_copy)
             self.components['clipboard_manager'] = manager
             # 确保信号在主线程中发射
             QMetaObject.invokeMethod(
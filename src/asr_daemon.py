@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地语音识别守护进程
+
+把 FunASREngine 放到独立进程中运行：
+- 音频（float32）通过共享内存传递，控制消息通过 Unix socket 以 JSON 行传递；
+  长录音已溢出到磁盘时只传文件路径，由守护进程直接映射读取
+- 守护进程独立于界面进程存活，重启应用时无需重新加载模型
+- 客户端 RemoteFunASREngine 提供与 FunASREngine 相同的接口，
+  定期做健康检查，守护进程退出时自动重启，无法启动时退回进程内模式
+
+单独运行:
+    python src/asr_daemon.py --socket /tmp/wispr-flow-cn-asr.sock
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from utils.tracing import tracer
+except ImportError:
+    from src.utils.tracing import tracer
+
+SOCKET_NAME = 'wispr-flow-cn-asr'
+
+
+def default_socket_path():
+    """默认的 socket 路径，按用户区分"""
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f"{SOCKET_NAME}-{uid}.sock")
+
+
+def _send_message(stream, message):
+    stream.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def _recv_message(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("守护进程连接已关闭")
+    return json.loads(line.decode('utf-8'))
+
+
+def _read_shared_audio(name, samples):
+    """从共享内存读取 float32 音频（复制一份，随后立即释放映射）"""
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13 之前没有 track 参数，需要手动取消资源跟踪，
+        # 否则守护进程退出时会把客户端创建的共享内存删除
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    try:
+        return np.ndarray((samples,), dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+def _spill_file_path(audio):
+    """完整映射一个 float32 溢出文件的 memmap 返回文件路径，否则返回 None"""
+    if not isinstance(audio, np.memmap) or audio.dtype != np.float32 or not audio.filename:
+        return None
+    try:
+        if audio.flags['C_CONTIGUOUS'] and os.path.getsize(audio.filename) == audio.nbytes:
+            return audio.filename
+    except OSError:
+        pass
+    return None
+
+
+class SharedAudioBuffer:
+    """客户端复用的共享内存缓冲区，容量不足时按两倍扩容"""
+
+    def __init__(self, initial_samples=16000 * 30):
+        self._shm = None
+        self._capacity = 0
+        self._initial_samples = initial_samples
+
+    def write(self, audio):
+        """写入音频，返回 (共享内存名称, 采样点数)"""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if audio.size > self._capacity:
+            self.close()
+            capacity = max(self._initial_samples, self._capacity * 2, audio.size)
+            self._shm = shared_memory.SharedMemory(create=True, size=capacity * 4)
+            self._capacity = capacity
+        np.ndarray((audio.size,), dtype=np.float32, buffer=self._shm.buf)[:] = audio
+        return self._shm.name, int(audio.size)
+
+    def close(self):
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except Exception:
+                pass
+            self._shm = None
+            self._capacity = 0
+
+
+class _StreamSession:
+    """守护进程中的一次流式转写，在独立线程里驱动 transcribe_stream"""
+
+    def __init__(self, engine, engine_lock):
+        self._chunks = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(engine, engine_lock), daemon=True)
+        self._thread.start()
+
+    def _iter_chunks(self):
+        while True:
+            data = self._chunks.get()
+            if data is None:
+                return
+            yield data
+
+    def _run(self, engine, engine_lock):
+        try:
+            with engine_lock:
+                for result in engine.transcribe_stream(self._iter_chunks()):
+                    self._results.put(result)
+        except Exception as e:
+            logging.error(f"流式转写失败: {e}")
+            self._results.put({'text': '', 'is_final': True, 'error': str(e)})
+
+    def feed(self, audio):
+        """投递音频块，返回目前为止最新的中间结果（没有则为 None）"""
+        self._chunks.put(audio)
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def finish(self, timeout=None):
+        """结束输入并等待最终结果"""
+        self._chunks.put(None)
+        while True:
+            result = self._results.get(timeout=timeout)
+            if result.get('is_final'):
+                return result
+
+    def cancel(self):
+        self._chunks.put(None)
+
+
+class ASRDaemonServer:
+    """语音识别守护进程，独占一个 FunASREngine"""
+
+    def __init__(self, socket_path=None, settings_manager=None, idle_timeout=0):
+        self.socket_path = socket_path or default_socket_path()
+        self.settings_manager = settings_manager
+        self.idle_timeout = idle_timeout  # 秒，0 表示永不退出
+        self.engine = None
+        self._engine_lock = threading.Lock()
+        self._last_activity = time.time()
+        self._server = None
+        self.started_at = time.time()
+        self.requests_served = 0
+
+    def _socket_in_use(self):
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1.0)
+                sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+
+    def serve_forever(self):
+        if self._socket_in_use():
+            logging.info(f"守护进程已在运行: {self.socket_path}")
+            return False
+
+        from src.funasr_engine import FunASREngine
+        self.engine = FunASREngine(self.settings_manager)
+        if not self.engine.is_ready:
+            raise RuntimeError("FunASR引擎初始化失败")
+
+        # 模型加载完成后才监听 socket，客户端能连上即表示已就绪
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon._handle_connection(self.rfile, self.wfile)
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        logging.info(f"语音识别守护进程已启动: pid={os.getpid()} socket={self.socket_path}")
+
+        if self.idle_timeout > 0:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            logging.info("语音识别守护进程已退出")
+        return True
+
+    def shutdown(self):
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def _watch_idle(self):
+        while True:
+            time.sleep(min(30, self.idle_timeout))
+            if time.time() - self._last_activity > self.idle_timeout:
+                logging.info("守护进程空闲超时，自动退出")
+                self.shutdown()
+                return
+
+    def _handle_connection(self, rfile, wfile):
+        stream = None
+        try:
+            while True:
+                try:
+                    message = _recv_message(rfile)
+                except (ConnectionError, ValueError):
+                    return
+                self._last_activity = time.time()
+                try:
+                    response, stream = self._dispatch(message, stream)
+                except Exception as e:
+                    logging.error(f"处理守护进程请求失败: {e}")
+                    response = {'ok': False, 'error': str(e)}
+                _send_message(wfile, response)
+                if message.get('cmd') == 'shutdown':
+                    self.shutdown()
+                    return
+        finally:
+            if stream is not None:
+                stream.cancel()
+
+    def _dispatch(self, message, stream):
+        cmd = message.get('cmd')
+        if cmd == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'ready': bool(self.engine and self.engine.is_ready),
+                    'streaming': bool(self.engine and self.engine.supports_streaming()),
+                    'uptime': round(time.time() - self.started_at, 1),
+                    'requests_served': self.requests_served}, stream
+        if cmd == 'status':
+            return {'ok': True, 'status': self.engine.get_status(),
+                    'model_paths': self.engine.get_model_paths()}, stream
+        if cmd == 'transcribe':
+            if 'path' in message:
+                audio = np.memmap(message['path'], dtype=np.float32, mode='r', shape=(message['samples'],))
+            else:
+                audio = _read_shared_audio(message['shm'], message['samples'])
+            with self._engine_lock:
+                result = self.engine.transcribe(audio)
+            self.requests_served += 1
+            return {'ok': True, 'result': result}, stream
+        if cmd == 'stream_open':
+            if stream is not None:
+                stream.cancel()
+            return {'ok': True}, _StreamSession(self.engine, self._engine_lock)
+        if cmd == 'stream_feed':
+            if stream is None:
+                return {'ok': False, 'error': '流式转写未开始'}, stream
+            audio = _read_shared_audio(message['shm'], message['samples'])
+            return {'ok': True, 'partial': stream.feed(audio)}, stream
+        if cmd == 'stream_finish':
+            if stream is None:
+                return {'ok': False, 'error': '流式转写未开始'}, stream
+            result = stream.finish()
+            self.requests_served += 1
+            return {'ok': 'error' not in result, 'result': result, 'error': result.get('error')}, None
+        if cmd == 'reload':
+            # 界面进程保存设置或热词后通知守护进程重新读取
+            if self.settings_manager is not None:
+                self.settings_manager.load_settings()
+            self.engine.reload_hotwords()
+            return {'ok': True}, stream
+        if cmd == 'shutdown':
+            return {'ok': True}, stream
+        return {'ok': False, 'error': f"未知命令: {cmd}"}, stream
+
+
+class DaemonUnavailable(Exception):
+    """守护进程无法连接或启动"""
+
+
+class RemoteFunASREngine:
+    """守护进程客户端，接口与 FunASREngine 一致
+
+    连接失败时会尝试重启守护进程，仍然失败则退回进程内的 FunASREngine。
+    """
+
+    def __init__(self, settings_manager=None):
+        self.settings_manager = settings_manager
+        self.socket_path = self._get_setting('asr.daemon.socket_path', '') or default_socket_path()
+        self.startup_timeout = self._get_setting('asr.daemon.startup_timeout', 120)
+        self.health_check_interval = self._get_setting('asr.daemon.health_check_interval', 10)
+        self.idle_timeout_minutes = self._get_setting('asr.daemon.idle_timeout_minutes', 0)
+        self.is_ready = False
+        self.restart_count = 0
+        self.last_health_check = None
+        self.daemon_pid = None
+        self._daemon_streaming = False
+        self._local_engine = None
+        self._sock = None
+        self._stream = None
+        self._buffer = SharedAudioBuffer()
+        self._request_lock = threading.RLock()
+        self._restart_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self._ensure_daemon()
+        self.is_ready = True
+        self._health_thread = threading.Thread(target=self._health_check_loop, daemon=True)
+        self._health_thread.start()
+
+    def _get_setting(self, key, default):
+        if self.settings_manager:
+            return self.settings_manager.get_setting(key, default)
+        return default
+
+    # ---- 守护进程生命周期 ----
+
+    def _ping(self, timeout=2.0):
+        """用独立连接做健康检查，返回守护进程的 ping 响应"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            stream = sock.makefile('rwb')
+            _send_message(stream, {'cmd': 'ping'})
+            return _recv_message(stream)
+
+    def _connect_existing(self):
+        """ping 已运行的守护进程并记录其状态，连接失败时抛出 OSError"""
+        response = self._ping()
+        self.daemon_pid = response.get('pid')
+        self._daemon_streaming = bool(response.get('streaming'))
+        return response
+
+    def _spawn_daemon(self):
+        if getattr(sys, 'frozen', False):
+            raise DaemonUnavailable("打包环境下不支持启动守护进程")
+        os.makedirs('logs', exist_ok=True)
+        command = [sys.executable, os.path.abspath(__file__), '--socket', self.socket_path,
+                   '--idle-timeout', str(int(self.idle_timeout_minutes * 60))]
+        with open(os.path.join('logs', 'asr_daemon.log'), 'ab') as log_file:
+            # 新建会话，界面进程退出后守护进程继续运行
+            return subprocess.Popen(command, cwd=os.getcwd(), stdin=subprocess.DEVNULL,
+                                    stdout=log_file, stderr=log_file, start_new_session=True)
+
+    def _ensure_daemon(self):
+        """确保守护进程可用，必要时启动并等待模型加载完成"""
+        with self._restart_lock:
+            try:
+                self._connect_existing()
+                return
+            except OSError:
+                pass
+
+            logging.info("启动语音识别守护进程...")
+            process = self._spawn_daemon()
+            deadline = time.time() + self.startup_timeout
+            while time.time() < deadline:
+                if process.poll() is not None:
+                    # 可能是另一个进程抢先启动了守护进程，再确认一次
+                    try:
+                        self._connect_existing()
+                        return
+                    except OSError:
+                        raise DaemonUnavailable(f"守护进程启动失败，退出码 {process.returncode}")
+                try:
+                    self._connect_existing()
+                    logging.info(f"语音识别守护进程已就绪: pid={self.daemon_pid}")
+                    return
+                except OSError:
+                    time.sleep(0.2)
+            process.kill()
+            raise DaemonUnavailable("等待守护进程启动超时")
+
+    def _restart(self):
+        with self._request_lock:
+            self._close_connection()
+        self.restart_count += 1
+        logging.warning(f"语音识别守护进程不可用，尝试重启（第{self.restart_count}次）")
+        self._ensure_daemon()
+
+    def _health_check_loop(self):
+        while not self._stop_event.wait(self.health_check_interval):
+            if self._local_engine is not None:
+                return
+            try:
+                self._ping()
+                self.last_health_check = time.time()
+            except OSError:
+                try:
+                    self._restart()
+                except Exception as e:
+                    logging.error(f"守护进程重启失败，切换到进程内模式: {e}")
+                    self._fallback_to_local()
+                    return
+
+    def _fallback_to_local(self):
+        """退回进程内模式（首次调用时在当前进程加载模型）"""
+        with self._request_lock:
+            if self._local_engine is None:
+                from src.funasr_engine import FunASREngine
+                self._local_engine = FunASREngine(self.settings_manager)
+                self._close_connection()
+                self._buffer.close()
+            return self._local_engine
+
+    # ---- 请求 ----
+
+    def _connection(self):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(self.socket_path)
+            self._stream = self._sock.makefile('rwb')
+        return self._stream
+
+    def _close_connection(self):
+        if self._sock is not None:
+            try:
+                self._stream.close()
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+            self._stream = None
+
+    def _request(self, message, audio=None):
+        with self._request_lock:
+            if audio is not None:
+                message['shm'], message['samples'] = self._buffer.write(audio)
+            stream = self._connection()
+            _send_message(stream, message)
+            response = _recv_message(stream)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error') or "守护进程请求失败")
+        return response
+
+    def _request_with_restart(self, message, audio=None):
+        """请求失败时重启守护进程重试一次，再失败则返回 None 由调用方退回进程内模式"""
+        for attempt in range(2):
+            try:
+                return self._request(dict(message), audio)
+            except (OSError, ConnectionError):
+                if attempt == 0:
+                    try:
+                        self._restart()
+                    except Exception as e:
+                        logging.error(f"守护进程重启失败: {e}")
+                        break
+        return None
+
+    def _as_float32(self, audio_data):
+        if isinstance(audio_data, bytes):
+            audio_data = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        return np.asarray(audio_data, dtype=np.float32)
+
+    def transcribe(self, audio_data):
+        if self._local_engine is not None:
+            return self._local_engine.transcribe(audio_data)
+        path = _spill_file_path(audio_data)
+        with tracer.span('asr.remote_transcribe', {'spilled': path is not None}):
+            if path is not None:
+                # 长录音已在磁盘上，不再复制到共享内存
+                response = self._request_with_restart({'cmd': 'transcribe', 'path': path, 'samples': len(audio_data)})
+            else:
+                response = self._request_with_restart({'cmd': 'transcribe'}, self._as_float32(audio_data))
+        if response is None:
+            return self._fallback_to_local().transcribe(audio_data)
+        return response['result']
+
+    def supports_streaming(self):
+        if self._local_engine is not None:
+            return self._local_engine.supports_streaming()
+        return self._daemon_streaming
+
+    def transcribe_stream(self, chunks):
+        """流式转写，与 FunASREngine.transcribe_stream 的输出格式一致"""
+        if self._local_engine is not None:
+            yield from self._local_engine.transcribe_stream(chunks)
+            return
+
+        received = []
+        try:
+            self._request({'cmd': 'stream_open'})
+            last_text = None
+            for chunk in chunks:
+                chunk = np.asarray(chunk, dtype=np.float32)
+                received.append(chunk)
+                partial = self._request({'cmd': 'stream_feed'}, chunk).get('partial')
+                if partial and partial.get('text') != last_text:
+                    last_text = partial.get('text')
+                    yield {'text': last_text, 'is_final': False}
+            yield self._request({'cmd': 'stream_finish'})['result']
+        except (OSError, ConnectionError) as e:
+            # 守护进程中途退出，收完剩余音频后整段转写
+            logging.warning(f"流式转写连接中断，改为整段转写: {e}")
+            received.extend(np.asarray(chunk, dtype=np.float32) for chunk in chunks)
+            audio = np.concatenate(received) if received else np.zeros(0, dtype=np.float32)
+            result = self.transcribe(audio)
+            text = result[0].get('text', '') if isinstance(result, list) and result else ''
+            yield {'text': text, 'is_final': True}
+
+    def reload_hotwords(self):
+        if self._local_engine is not None:
+            return self._local_engine.reload_hotwords()
+        try:
+            self._request({'cmd': 'reload'})
+        except Exception as e:
+            logging.error(f"通知守护进程重新加载失败: {e}")
+
+    def get_model_paths(self):
+        if self._local_engine is not None:
+            return self._local_engine.get_model_paths()
+        response = self._request_with_restart({'cmd': 'status'})
+        if response is None:
+            return self._fallback_to_local().get_model_paths()
+        return response['model_paths']
+
+    def get_status(self):
+        if self._local_engine is not None:
+            status = self._local_engine.get_status()
+            status['mode'] = 'in_process'
+            return status
+        response = self._request_with_restart({'cmd': 'status'}) or {}
+        status = dict(response.get('status', {}))
+        status.update({
+            'mode': 'daemon',
+            'daemon_pid': self.daemon_pid,
+            'restart_count': self.restart_count,
+            'last_health_check': self.last_health_check
+        })
+        return status
+
+    def shutdown_daemon(self):
+        """主动关闭守护进程（正常退出应用时不调用，以便下次启动复用模型）"""
+        try:
+            self._request({'cmd': 'shutdown'})
+        except Exception:
+            pass
+        self._close_connection()
+
+    def cleanup(self):
+        """断开连接并释放共享内存，守护进程保持运行"""
+        self._stop_event.set()
+        self.is_ready = False
+        self._close_connection()
+        self._buffer.close()
+        if self._local_engine is not None:
+            self._local_engine.cleanup()
+
+
+def create_funasr_engine(settings_manager=None):
+    """按设置创建语音识别引擎：优先使用守护进程，不可用时退回进程内模式"""
+    use_daemon = settings_manager.get_setting('asr.daemon.enabled', True) if settings_manager else False
+    if use_daemon and not getattr(sys, 'frozen', False):
+        try:
+            return RemoteFunASREngine(settings_manager)
+        except Exception as e:
+            logging.warning(f"语音识别守护进程不可用，使用进程内模式: {e}")
+    from src.funasr_engine import FunASREngine
+    return FunASREngine(settings_manager)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音识别守护进程")
+    parser.add_argument('--socket', default=default_socket_path(), help="Unix socket 路径")
+    parser.add_argument('--idle-timeout', type=int, default=0, help="空闲多少秒后退出，0 表示不退出")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from settings_manager import SettingsManager
+    server = ASRDaemonServer(args.socket, SettingsManager(), args.idle_timeout)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (project_root, os.path.join(project_root, 'src')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    main()
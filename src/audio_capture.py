@@ -1,8 +1,134 @@
-import pyaudio
 import numpy as np
+import os
 import time
+import tempfile
 import collections
+import threading
+import weakref
 from utils.cleanup_mixin import CleanupMixin
+from utils.lazy_import import lazy_import
+from utils.tracing import tracer
+from vad import StreamingVAD
+
+pyaudio = lazy_import('pyaudio')
+
+
+class AudioRingBuffer:
+    """预分配的 float32 环形缓冲区（镜像写入）
+
+    每个采样同时写到 i 和 i + capacity 两个位置，任意不超过 capacity 的窗口
+    都是底层数组上的连续切片，读取方可以直接拿到零拷贝视图。
+    写满后覆盖最早的数据，与原先 deque(maxlen=...) 的行为一致。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity * 2, dtype=np.float32)
+        self.written = 0          # 累计写入的采样数
+        self._exported = False    # 是否有视图被交给了外部（重置时需要换新缓冲区）
+
+    def reset(self):
+        """开始新的录音；上一段录音的视图仍被引用时改用新缓冲区，避免被覆盖"""
+        if self._exported:
+            self._buffer = np.zeros(self.capacity * 2, dtype=np.float32)
+            self._exported = False
+        self.written = 0
+
+    def write(self, samples):
+        """写入一块采样（在 PyAudio 回调线程中调用）"""
+        count = len(samples)
+        if count >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += count - self.capacity
+            count = self.capacity
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+        # 镜像写入：低半区和高半区各写一份
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[start + self.capacity:start + self.capacity + first] = samples[:first]
+        if first < count:
+            rest = count - first
+            self._buffer[:rest] = samples[first:]
+            self._buffer[self.capacity:self.capacity + rest] = samples[first:]
+        self.written += count
+
+    def view(self, start=None, end=None):
+        """返回录音位置 [start, end) 的零拷贝视图（默认为缓冲区中保留的全部数据）"""
+        end = self.written if end is None else min(end, self.written)
+        oldest = max(0, self.written - self.capacity)
+        start = oldest if start is None else max(start, oldest)
+        if start >= end:
+            return self._buffer[:0]
+        self._exported = True
+        offset = start % self.capacity
+        return self._buffer[offset:offset + (end - start)]
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+
+class AudioSpillFile:
+    """长录音的磁盘溢出文件
+
+    录音超过阈值后，采集线程把 float32 采样顺序追加到临时文件，内存中只保留
+    固定大小的环形缓冲区。录音结束后以只读 np.memmap 交给转写，由系统按需分页读取。
+    文件在返回的 memmap（及其所有切片）被回收后自动删除。
+    """
+
+    PREFIX = 'dictation_'
+
+    def __init__(self, directory=''):
+        self.directory = directory or tempfile.gettempdir()
+        os.makedirs(self.directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix=self.PREFIX, suffix='.f32', dir=self.directory)
+        self._file = os.fdopen(fd, 'wb')
+        self.samples = 0
+        self._array = None
+
+    def write(self, samples):
+        """追加一块采样（bytes 或 float32 数组）"""
+        if self._file is None:
+            return
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype=np.float32)
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self._file.write(memoryview(samples).cast('B'))
+        self.samples += len(samples)
+
+    def finish(self):
+        """结束写入，返回整段录音的只读 memmap（重复调用返回同一个对象）"""
+        if self._array is not None:
+            return self._array
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.samples == 0:
+            self.discard()
+            self._array = np.array([], dtype=np.float32)
+            return self._array
+        self._array = np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.samples,))
+        weakref.finalize(self._array, _remove_file, self.path)
+        return self._array
+
+    def discard(self):
+        """放弃还没有交给转写的溢出文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._array is None:
+            _remove_file(self.path)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# 静音和有效音频阈值的一帧采样数（阈值按原先每次阻塞读取 1024 个采样整定）
+FRAME_SAMPLES = 1024
+
 
 class AudioCapture(CleanupMixin):
     def __init__(self):
@@ -14,11 +140,37 @@ class AudioCapture(CleanupMixin):
         self.read_count = 0
         # 音量相关参数
         self.volume_threshold = 0.001  # 降低默认阈值提高敏感度
+        # 阈值以 FRAME_SAMPLES 个采样为一帧，计数按采样累计，与每次读取的数据量无关
         self.min_valid_frames = 2      # 降低最少有效帧数要求（约0.13秒）
-        self.valid_frame_count = 0     # 有效音频帧计数
-        self.max_silence_frames = 50   # 增加最大静音帧数到约2秒
-        self.silence_frame_count = 0   # 连续静音帧计数
+        self.valid_sample_count = 0    # 有效音频采样数
+        self.max_silence_frames = 50   # 增加最大静音帧数到约3.2秒
+        self.silence_sample_count = 0  # 连续静音采样数
         self.debug_frame_count = 0     # 调试帧计数
+
+        # 采集方式：callback 使用 PyAudio 回调直接写入环形缓冲区；blocking 为原先的阻塞读取
+        self.capture_mode = 'callback'
+        self.ring = AudioRingBuffer(1000 * 1024)  # 与 frames 的上限一致，约64秒
+        self._read_pos = 0                         # 采集线程已读取到的录音位置
+        self._data_ready = threading.Condition()
+
+        # 流式VAD：在采集线程中标记语音段，转写前裁掉静音
+        self.vad_enabled = True
+        self.vad = StreamingVAD(min_rms=self.volume_threshold)
+        self.last_vad_stats = {}
+
+        # 长录音模式：超过 spill_after_samples 后把录音溢出到磁盘，内存占用不随时长增长
+        self.long_dictation = False
+        self.spill_after_samples = 30 * 16000
+        self.spill_dir = ''
+        self.spill = None
+
+        # 常开输入流：空闲时保持输入流打开，回调只写入很小的预录缓冲区；
+        # 按下热键时不用再打开设备，并把预录的音频放在录音开头，避免丢掉第一个音节
+        self.warm_stream = False
+        self.preroll_samples = int(0.3 * 16000)
+        self.preroll = AudioRingBuffer(self.preroll_samples)
+        self._recording = False       # 回调写入录音缓冲区（True）还是预录缓冲区（False）
+        self.last_start_stats = {}
         
         # 初始化音频系统
         self._initialize_audio()
@@ -48,13 +200,24 @@ class AudioCapture(CleanupMixin):
 
     def start_recording(self):
         """开始录音"""
+        with tracer.span('capture.open_stream', {'mode': self.capture_mode}) as span:
+            started = time.perf_counter()
+            self._start_recording(span)
+            self.last_start_stats['start_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _start_recording(self, span):
+        if self.warm_stream and self._start_from_warm_stream(span):
+            return
+
         retry_count = 0
         max_retries = 3
         
         while retry_count < max_retries:
+            span.set(attempts=retry_count + 1)
             try:
                 # 确保之前的录音已经停止
                 self.stop_recording()
+                self._close_stream()
                 
                 # 重新初始化音频系统
                 if self.audio is None:
@@ -63,24 +226,15 @@ class AudioCapture(CleanupMixin):
                 if self.audio is None or self.device_index is None:
                     raise Exception("音频系统未正确初始化")
                 
-                self.frames.clear()
-                self.read_count = 0
-                self.valid_frame_count = 0
-                self.silence_frame_count = 0
-                self.debug_frame_count = 0
-                
-                self.stream = self.audio.open(
-                    format=pyaudio.paFloat32,
-                    channels=1,
-                    rate=16000,
-                    input=True,
-                    input_device_index=self.device_index,
-                    frames_per_buffer=512,  # 减小缓冲区大小以降低延迟
-                    stream_callback=None
-                )
+                self._reset_recording_state()
+                # 打开流之前设置，回调一开始就写入录音缓冲区
+                self._set_recording(True)
+                self.stream = self._open_stream()
+                self.last_start_stats = {'warm': False, 'preroll_ms': 0}
                 return
             except Exception as e:
                 retry_count += 1
+                self._set_recording(False)
                 import logging
                 logging.error(f"尝试 {retry_count}/{max_retries} 启动录音失败: {e}")
                 self._cleanup()
@@ -88,51 +242,199 @@ class AudioCapture(CleanupMixin):
         
         raise Exception(f"在 {max_retries} 次尝试后仍无法启动录音")
 
+    def _open_stream(self):
+        return self.audio.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=16000,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=512,  # 减小缓冲区大小以降低延迟
+            stream_callback=self._stream_callback if self.capture_mode == 'callback' else None
+        )
+
+    def _set_recording(self, recording):
+        """切换回调写入的缓冲区（与回调互斥）"""
+        with self._data_ready:
+            self._recording = recording
+
+    def _reset_ring(self):
+        """清空录音缓冲区（与回调互斥，回调写入时不会被重置）"""
+        with self._data_ready:
+            self.ring.reset()
+            self._read_pos = 0
+
+    def _reset_recording_state(self):
+        self.frames.clear()
+        self.read_count = 0
+        self.valid_sample_count = 0
+        self.silence_sample_count = 0
+        self.debug_frame_count = 0
+        self.vad.reset()
+        self._reset_ring()
+        self._discard_spill()
+
+    def _start_from_warm_stream(self, span):
+        """常开输入流仍在运行时，直接把回调切换到录音缓冲区（先写入预录音频）"""
+        stream = self.stream
+        if stream is None or self._recording:
+            return False
+        try:
+            active = stream.is_active()
+        except Exception:
+            active = False
+        if not active:
+            # 设备断开等原因导致常开流已停止，按普通方式重新打开
+            self._close_stream()
+            return False
+
+        self._reset_recording_state()
+        with self._data_ready:
+            preroll = self.preroll.view()
+            if self.preroll_samples:
+                preroll = preroll[-self.preroll_samples:]
+                self.ring.write(preroll)
+            else:
+                preroll = preroll[:0]
+            self.preroll.reset()
+            self._recording = True
+        preroll_ms = round(len(preroll) / 16)
+        span.set(warm=True, preroll_ms=preroll_ms)
+        self.last_start_stats = {'warm': True, 'preroll_ms': preroll_ms}
+        return True
+
+    def _stream_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio 回调：只把数据写入环形缓冲区并唤醒采集线程，其余处理都在采集线程中进行"""
+        samples = np.frombuffer(in_data, dtype=np.float32)
+        # 判断写入哪个缓冲区和写入本身都在锁内，与开始/停止录音的切换和缓冲区重置互斥：
+        # 停止录音后回调不会再写入已经交出视图的录音缓冲区（每次只复制几百个采样，持锁时间很短）
+        with self._data_ready:
+            if self._recording:
+                self.ring.write(samples)
+                self._data_ready.notify()
+            else:
+                # 常开输入流空闲时只保留最近的预录音频
+                self.preroll.write(samples)
+        return (None, pyaudio.paContinue)
+
+    def configure_warm_stream(self, enabled=False, preroll_ms=300):
+        """设置常开输入流模式（只支持 callback 采集方式），开启时立即打开输入流"""
+        preroll_samples = max(0, int(preroll_ms * 16))
+        if preroll_samples and preroll_samples != self.preroll.capacity:
+            with self._data_ready:
+                self.preroll = AudioRingBuffer(preroll_samples)
+        self.preroll_samples = preroll_samples
+        self.warm_stream = bool(enabled) and self.capture_mode == 'callback'
+        if self._recording:
+            return  # 录音结束时按新设置处理
+        if self.warm_stream:
+            self.warm_up()
+        else:
+            self._close_stream()
+
+    def warm_up(self):
+        """打开常开输入流（空闲时只写入预录缓冲区），返回是否成功"""
+        if not self.warm_stream or self._recording:
+            return False
+        if self.stream is not None:
+            try:
+                if self.stream.is_active():
+                    return True
+            except Exception:
+                pass
+            self._close_stream()
+        try:
+            if self.audio is None or self.device_index is None:
+                self._initialize_audio()
+            if self.audio is None or self.device_index is None:
+                raise Exception("音频系统未正确初始化")
+            self.preroll.reset()
+            self.stream = self._open_stream()
+            return True
+        except Exception as e:
+            import logging
+            logging.error(f"打开常开输入流失败: {e}")
+            self.stream = None
+            return False
+
+    def _close_stream(self):
+        """关闭输入流（不处理录音数据）"""
+        stream = self.stream
+        self.stream = None
+        self._set_recording(False)
+        if stream is None:
+            return
+        try:
+            if stream.is_active():
+                stream.stop_stream()
+            stream.close()
+        except Exception as e:
+            import logging
+            logging.error(f"关闭音频流失败: {e}")
+
+    def _recorded_samples(self):
+        """本次录音的全部采样（callback 模式为环形缓冲区的零拷贝视图，溢出到磁盘时为 memmap）"""
+        if self.spill is not None:
+            if self.capture_mode == 'callback' and self.ring.written > self._read_pos:
+                # 停止录音时采集线程还没读走的尾部
+                self.spill.write(self.ring.view(self._read_pos))
+                self._read_pos = self.ring.written
+            elif self.frames:
+                self.spill.write(b"".join(self.frames))
+                self.frames.clear()
+            return self.spill.finish()
+        if self.capture_mode == 'callback':
+            return self.ring.view()
+        audio_data = b"".join(self.frames)
+        return np.frombuffer(audio_data, dtype=np.float32)
+
     def stop_recording(self):
-        """停止录音"""
-        if not self.stream:
+        """停止录音（常开输入流模式下保持输入流打开，回调改为写入预录缓冲区）"""
+        if not self.stream or not self._recording:
             return np.array([], dtype=np.float32)
 
         try:
-            if self.stream and self.stream.is_active():
-                self.stream.stop_stream()
-            if self.stream:
-                self.stream.close()
+            if self.warm_stream and self.stream.is_active():
+                self._set_recording(False)
+            else:
+                self._set_recording(False)
+                if self.stream and self.stream.is_active():
+                    self.stream.stop_stream()
+                if self.stream:
+                    self.stream.close()
+                self.stream = None
         except Exception as e:
             import logging
             logging.error(f"停止录音失败: {e}")
             # 强制重新初始化音频系统
             self._cleanup()
             self._initialize_audio()
-        finally:
             self.stream = None
             
         try:
-            audio_data = b"".join(self.frames)
+            data = self._recorded_samples()
             
             # 确保音频数据不为空
-            if len(audio_data) == 0:
+            if len(data) == 0:
                 return np.array([], dtype=np.float32)
-                
-            data = np.frombuffer(audio_data, dtype=np.float32)
             
             # 检查是否有足够的有效音频
             # 确保使用标量值进行比较，避免NumPy数组比较错误
             try:
                 # 强制转换为Python标量类型，避免NumPy数组比较
-                if hasattr(self.valid_frame_count, 'item'):
-                    valid_count = int(self.valid_frame_count.item())
-                elif hasattr(self.valid_frame_count, '__len__'):
-                    valid_count = int(self.valid_frame_count)
+                if hasattr(self.valid_sample_count, 'item'):
+                    valid_count = int(self.valid_sample_count.item())
+                elif hasattr(self.valid_sample_count, '__len__'):
+                    valid_count = int(self.valid_sample_count)
                 else:
-                    valid_count = int(self.valid_frame_count)
+                    valid_count = int(self.valid_sample_count)
                     
                 if hasattr(self.min_valid_frames, 'item'):
-                    min_valid = int(self.min_valid_frames.item())
+                    min_valid = int(self.min_valid_frames.item()) * FRAME_SAMPLES
                 elif hasattr(self.min_valid_frames, '__len__'):
-                    min_valid = int(self.min_valid_frames)
+                    min_valid = int(self.min_valid_frames) * FRAME_SAMPLES
                 else:
-                    min_valid = int(self.min_valid_frames)
+                    min_valid = int(self.min_valid_frames) * FRAME_SAMPLES
                     
                 # 使用Python标量进行比较
                 if valid_count < min_valid:
@@ -162,6 +464,7 @@ class AudioCapture(CleanupMixin):
                 logging.error(f"清理音频流失败: {e}")
             finally:
                 self.stream = None
+                self._set_recording(False)
             
         # 清理PyAudio实例
         if self.audio:
@@ -185,9 +488,11 @@ class AudioCapture(CleanupMixin):
         
         # 清理数据，确保计数器为标量值
         self.frames.clear()  # 使用deque的clear方法
+        self._reset_ring()
+        self._discard_spill()
         self.read_count = 0
-        self.valid_frame_count = 0
-        self.silence_frame_count = 0
+        self.valid_sample_count = 0
+        self.silence_sample_count = 0
         self.debug_frame_count = 0
         
         # 强制垃圾回收
@@ -212,9 +517,16 @@ class AudioCapture(CleanupMixin):
 
     def set_device(self, device_name=None):
         """设置音频输入设备"""
+        found = self._set_device(device_name)
+        if self.warm_stream:
+            self.warm_up()
+        return found
+
+    def _set_device(self, device_name=None):
         try:
             # 停止当前录音
             self.stop_recording()
+            self._close_stream()
             
             # 重新初始化音频系统
             self._initialize_audio()
@@ -240,7 +552,7 @@ class AudioCapture(CleanupMixin):
 
     def _is_valid_audio(self, data):
         """检查音频数据是否有效（音量是否足够）"""
-        audio_data = np.frombuffer(data, dtype=np.float32)
+        audio_data = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.float32)
         # 直接使用RMS值判断，不使用移动平均
         volume = float(np.sqrt(np.mean(np.square(audio_data))))
         # 使用Python标量进行比较，避免NumPy数组比较错误
@@ -249,42 +561,102 @@ class AudioCapture(CleanupMixin):
         # 更新调试计数器
         self.debug_frame_count += 1
         
-        # 更新计数，确保计数器始终为标量值
+        # 按采样数计数：callback 模式每次读到的数据量不固定
         if is_valid:
-            self.silence_frame_count = 0
-            self.valid_frame_count = int(self.valid_frame_count) + 1
+            self.silence_sample_count = 0
+            self.valid_sample_count = int(self.valid_sample_count) + len(audio_data)
         else:
-            self.silence_frame_count = int(self.silence_frame_count) + 1
+            self.silence_sample_count = int(self.silence_sample_count) + len(audio_data)
             
         return is_valid
 
+    def _read_callback_samples(self, timeout=0.1):
+        """callback 模式：等待回调写入新数据，返回新采样的零拷贝视图"""
+        with self._data_ready:
+            if self.ring.written <= self._read_pos:
+                self._data_ready.wait(timeout)
+        end = self.ring.written
+        data = self.ring.view(self._read_pos, end)
+        self._read_pos = end
+        return data
+
+    def _spill_samples(self, data):
+        """长录音模式：录音达到阈值后开始溢出到磁盘，此后每次读取的数据直接追加到文件"""
+        if self.spill is None:
+            if self.capture_mode == 'callback':
+                if self._read_pos < self.spill_after_samples:
+                    return
+                self.spill = AudioSpillFile(self.spill_dir)
+                self.spill.write(self.ring.view(0, self._read_pos))
+            else:
+                if len(self.frames) * 1024 < self.spill_after_samples:
+                    return
+                self.spill = AudioSpillFile(self.spill_dir)
+                self.spill.write(b"".join(self.frames))
+                self.frames.clear()
+            import logging
+            logging.info(f"录音超过 {self.spill_after_samples / 16000:.0f}s，开始写入磁盘: {self.spill.path}")
+            return
+
+        self.spill.write(data)
+        if self.capture_mode != 'callback':
+            # 已经写入文件，不再在内存中保留
+            self.frames.clear()
+
+    def _discard_spill(self):
+        if self.spill is not None:
+            self.spill.discard()
+            self.spill = None
+
+    def configure_long_dictation(self, enabled=False, spill_after_seconds=30, spill_dir=''):
+        """设置长录音模式，录音开始前调用
+
+        spill_after_seconds 不能超过环形缓冲区的容量，否则开头会在溢出前被覆盖。
+        """
+        self.long_dictation = enabled
+        max_samples = self.ring.capacity // 2
+        self.spill_after_samples = int(min(max(1.0, float(spill_after_seconds)) * 16000, max_samples))
+        self.spill_dir = spill_dir
+
     def read_audio(self):
-        """读取音频数据"""
-        if self.stream and self.stream.is_active():
+        """读取音频数据
+
+        blocking 模式返回 bytes；callback 模式返回环形缓冲区上的 float32 视图。
+        """
+        if self.stream and self._recording and self.stream.is_active():
             try:
-                data = self.stream.read(1024, exception_on_overflow=False)
+                if self.capture_mode == 'callback':
+                    data = self._read_callback_samples()
+                    if len(data) == 0:
+                        return b""
+                else:
+                    data = self.stream.read(1024, exception_on_overflow=False)
+                    self.frames.append(data)
+                if self.long_dictation:
+                    self._spill_samples(data)
                 # 检查音量并更新状态
                 is_valid = self._is_valid_audio(data)
-                self.frames.append(data)
+                if self.vad_enabled:
+                    self.vad.process(data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.float32))
                 self.read_count += 1
                 
                 # 如果静音时间太长，自动停止录音
                 # 确保使用标量值进行比较，避免NumPy数组比较错误
                 try:
                     # 强制转换为Python标量类型，避免NumPy数组比较
-                    if hasattr(self.silence_frame_count, 'item'):
-                        silence_count = self.silence_frame_count.item()
-                    elif hasattr(self.silence_frame_count, '__len__'):
-                        silence_count = int(self.silence_frame_count)
+                    if hasattr(self.silence_sample_count, 'item'):
+                        silence_count = self.silence_sample_count.item()
+                    elif hasattr(self.silence_sample_count, '__len__'):
+                        silence_count = int(self.silence_sample_count)
                     else:
-                        silence_count = int(self.silence_frame_count)
+                        silence_count = int(self.silence_sample_count)
                         
                     if hasattr(self.max_silence_frames, 'item'):
-                        max_silence = self.max_silence_frames.item()
+                        max_silence = int(self.max_silence_frames.item()) * FRAME_SAMPLES
                     elif hasattr(self.max_silence_frames, '__len__'):
-                        max_silence = int(self.max_silence_frames)
+                        max_silence = int(self.max_silence_frames) * FRAME_SAMPLES
                     else:
-                        max_silence = int(self.max_silence_frames)
+                        max_silence = int(self.max_silence_frames) * FRAME_SAMPLES
                         
                     # 使用Python标量进行比较
                     if silence_count >= max_silence:
@@ -304,29 +676,27 @@ class AudioCapture(CleanupMixin):
 
     def get_audio_data(self):
         """获取录音数据"""
-        if not self.frames:
+        data = self._recorded_samples()
+        if len(data) == 0:
             return np.array([], dtype=np.float32)
-            
-        audio_data = b"".join(self.frames)
-        data = np.frombuffer(audio_data, dtype=np.float32)
         
         # 检查是否有足够的有效音频
         # 确保使用标量值进行比较，避免NumPy数组比较错误
         try:
             # 强制转换为Python标量类型，避免NumPy数组比较
-            if hasattr(self.valid_frame_count, 'item'):
-                valid_count = self.valid_frame_count.item()
-            elif hasattr(self.valid_frame_count, '__len__'):
-                valid_count = int(self.valid_frame_count)
+            if hasattr(self.valid_sample_count, 'item'):
+                valid_count = self.valid_sample_count.item()
+            elif hasattr(self.valid_sample_count, '__len__'):
+                valid_count = int(self.valid_sample_count)
             else:
-                valid_count = int(self.valid_frame_count)
+                valid_count = int(self.valid_sample_count)
                 
             if hasattr(self.min_valid_frames, 'item'):
-                min_valid = self.min_valid_frames.item()
+                min_valid = int(self.min_valid_frames.item()) * FRAME_SAMPLES
             elif hasattr(self.min_valid_frames, '__len__'):
-                min_valid = int(self.min_valid_frames)
+                min_valid = int(self.min_valid_frames) * FRAME_SAMPLES
             else:
-                min_valid = int(self.min_valid_frames)
+                min_valid = int(self.min_valid_frames) * FRAME_SAMPLES
                 
             # 使用Python标量进行比较
             if valid_count < min_valid:
@@ -339,18 +709,59 @@ class AudioCapture(CleanupMixin):
             
         return data
 
+    def get_speech_audio(self):
+        """获取录音数据，并用VAD裁掉首尾和较长的中间静音
+
+        统计信息保存在 last_vad_stats 中（compute_saved 为少解码的比例）。
+        """
+        data = self.get_audio_data()
+        if not self.vad_enabled or len(data) == 0:
+            return data
+        if isinstance(data, np.memmap):
+            # 溢出到磁盘的长录音不做裁剪，避免把整段录音读回内存；由引擎分段解码
+            self.vad.finish()
+            self.last_vad_stats = self.vad.get_stats()
+            return data
+
+        try:
+            # 缓冲区有长度上限，录音过长时开头会被丢弃，需要对齐VAD的采样位置
+            offset = max(0, self.vad.total_samples - len(data))
+            speech = self.vad.extract_speech(data, offset)
+            self.last_vad_stats = self.vad.get_stats(kept_samples=len(speech))
+            import logging
+            stats = self.last_vad_stats
+            logging.info(f"VAD: {stats['segments']} 个语音段，录音 {stats['total_seconds']}s -> "
+                         f"解码 {stats['decoded_seconds']}s，节省 {stats['compute_saved']:.0%} 解码计算"
+                         f"（VAD 耗时 {stats['vad_ms']}ms）")
+            return speech
+        except Exception as e:
+            import logging
+            logging.error(f"VAD裁剪静音失败，使用完整录音: {e}")
+            return data
+
+    def configure_vad(self, enabled=True, **options):
+        """设置VAD参数（参数同 StreamingVAD），录音开始前调用"""
+        self.vad_enabled = enabled
+        options.setdefault('min_rms', self.volume_threshold)
+        self.vad = StreamingVAD(**options)
+
     def clear_recording_data(self):
         """清理录音数据"""
         self.frames.clear()
+        self._reset_ring()
+        self._discard_spill()
         self.read_count = 0
-        self.valid_frame_count = 0
-        self.silence_frame_count = 0
+        self.valid_sample_count = 0
+        self.silence_sample_count = 0
         self.debug_frame_count = 0
         
     def clear_buffer(self):
         """手动清理缓冲区"""
         self.frames.clear()
+        self._reset_ring()
+        self._discard_spill()
 
     def set_volume_threshold(self, threshold):
         """设置音量阈值（0-1000的值会被转换为0-0.02的浮点数）"""
-        self.volume_threshold = (threshold / 1000.0) * 0.02
\ No newline at end of file
+        self.volume_threshold = (threshold / 1000.0) * 0.02
+        self.vad.min_energy = self.volume_threshold ** 2
\ No newline at end of file
@@ -1,10 +1,14 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import time
+import queue
 import threading
+import numpy as np
+from utils.tracing import tracer
 
 class AudioCaptureThread(QThread):
     """音频捕获线程 - 优化信号发射策略"""
     audio_captured = pyqtSignal(object)
+    chunk_captured = pyqtSignal(object)  # 每批新采集的音频（不含整段回放），供流式转写使用
     recording_stopped = pyqtSignal()  # 新增信号用于通知录音停止
 
     def __init__(self, audio_capture):
@@ -35,8 +39,9 @@ class AudioCaptureThread(QThread):
                     current_time = time.time()
                     if current_time - last_emit_time > 0.1:  # 100ms间隔
                         if audio_buffer:
-                            combined_data = b''.join(audio_buffer)
+                            combined_data = self._combine(audio_buffer)
                             self.audio_captured.emit(combined_data)
+                            self.chunk_captured.emit(combined_data)
                             audio_buffer.clear()
                             last_emit_time = current_time
                 
@@ -52,12 +57,15 @@ class AudioCaptureThread(QThread):
         
         # 最终清理和发送剩余数据
         try:
+            if audio_buffer:
+                self.chunk_captured.emit(self._combine(audio_buffer))
+
             final_data = self.audio_capture.stop_recording()
             
             if final_data is not None and len(final_data) > 0:
                 self.audio_captured.emit(final_data)
             elif audio_buffer:  # 发送缓冲区中的剩余数据
-                combined_data = b''.join(audio_buffer)
+                combined_data = self._combine(audio_buffer)
                 self.audio_captured.emit(combined_data)
                 
             if not self.is_recording:  # 如果是自动停止，发送信号
@@ -72,46 +80,252 @@ class AudioCaptureThread(QThread):
             except:
                 pass
 
+    @staticmethod
+    def _combine(chunks):
+        """合并一批采集数据：阻塞模式为 bytes，回调模式为 float32 视图（只有一块时不复制）"""
+        if len(chunks) == 1:
+            return chunks[0]
+        if isinstance(chunks[0], np.ndarray):
+            return np.concatenate(chunks)
+        return b''.join(chunks)
+
     def stop(self):
         """改进的停止方法，避免死锁"""
         self.is_recording = False
         self._stop_event.set()
         # 不要在这里调用wait()，避免死锁
 
-class TranscriptionThread(QThread):
-    """转写线程"""
-    transcription_done = pyqtSignal(str)
+class TranscriptionJob:
+    """转写任务 - 一次录音对应一个任务"""
 
-    def __init__(self, audio_data, funasr_engine):
-        super().__init__()
+    def __init__(self, job_id, audio_data=None):
+        self.job_id = job_id
         self.audio_data = audio_data
+        self.submitted_at = time.perf_counter()
+        self.cancelled = False
+        # 提交时所属的语音输入，转写线程处理时把耗时记到这次输入上
+        self.trace = tracer.current_trace
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class StreamingJob(TranscriptionJob):
+    """流式转写任务 - 录音期间不断投递音频块显示中间结果，松开热键后只需解码最后一段"""
+
+    def __init__(self, job_id):
+        super().__init__(job_id)
+        self._chunks = queue.Queue()
+
+    def feed(self, data):
+        """投递一块采集到的音频（线程安全，可在采集线程中直接调用）"""
+        if isinstance(data, bytes):
+            # 采集线程输出的是 paFloat32 原始字节
+            data = np.frombuffer(data, dtype=np.float32)
+        self._chunks.put(data)
+
+    def finish(self):
+        """录音结束，不再投递音频块"""
+        self._chunks.put(None)
+
+    def cancel(self):
+        """放弃本次转写（例如未检测到有效声音）"""
+        super().cancel()
+        self._chunks.put(None)
+
+    def iter_chunks(self):
+        while not self.cancelled:
+            data = self._chunks.get()
+            if data is None:
+                return
+            yield data
+
+
+class TranscriptionWorker(QThread):
+    """常驻转写线程 - 独占 FunASREngine，按提交顺序逐个处理转写任务
+
+    FunASREngine 的模型不是线程安全的，所有转写都通过这一个线程串行执行。
+    队列有上限，队满时拒绝新任务；结果按提交顺序发出。
+    """
+    partial_result = pyqtSignal(int, str)       # job_id, 当前累计文本
+    transcription_done = pyqtSignal(int, str)   # job_id, 最终文本
+    transcription_failed = pyqtSignal(int, str) # job_id, 错误信息
+
+    def __init__(self, funasr_engine, max_queue_size=4):
+        super().__init__()
         self.funasr_engine = funasr_engine
+        self.max_queue_size = max_queue_size
+        self._jobs = queue.Queue(maxsize=max_queue_size)
+        self._pending = {}
+        self._next_job_id = 0
+        self._current_job = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        # 统计信息
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._last_wait_ms = 0.0
+        self._total_process_ms = 0.0
 
-    def run(self):
+    def submit(self, audio_data):
+        """提交整段音频，返回 job_id；队列已满时返回 None"""
+        return self._enqueue(lambda job_id: TranscriptionJob(job_id, audio_data))
+
+    def submit_stream(self):
+        """提交流式任务，返回 StreamingJob；队列已满时返回 None"""
+        job_id = self._enqueue(StreamingJob)
+        if job_id is None:
+            return None
+        with self._lock:
+            return self._pending.get(job_id)
+
+    def _enqueue(self, job_factory):
+        with self._lock:
+            if self._stopping:
+                return None
+            self._next_job_id += 1
+            job = job_factory(self._next_job_id)
+            try:
+                self._jobs.put_nowait(job)
+            except queue.Full:
+                self._rejected += 1
+                import logging
+                logging.warning(f"转写队列已满（{self.max_queue_size}），丢弃新任务")
+                return None
+            self._pending[job.job_id] = job
+            return job.job_id
+
+    def cancel(self, job_id):
+        """取消任务；正在执行的任务会在完成后丢弃结果"""
+        with self._lock:
+            job = self._pending.get(job_id)
+            if job is None and self._current_job is not None and self._current_job.job_id == job_id:
+                job = self._current_job
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def get_metrics(self):
+        """获取队列深度和等待时间等统计"""
+        with self._lock:
+            started = self._completed + self._failed + self._cancelled
+            return {
+                'queue_depth': self._jobs.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'busy': self._current_job is not None,
+                'completed': self._completed,
+                'failed': self._failed,
+                'cancelled': self._cancelled,
+                'rejected': self._rejected,
+                'last_wait_ms': round(self._last_wait_ms, 1),
+                'avg_wait_ms': round(self._total_wait_ms / started, 1) if started else 0.0,
+                'max_wait_ms': round(self._max_wait_ms, 1),
+                'avg_process_ms': round(self._total_process_ms / self._completed, 1) if self._completed else 0.0
+            }
+
+    def stop(self):
+        """停止线程，丢弃尚未开始的任务"""
+        with self._lock:
+            self._stopping = True
+            pending = list(self._pending.values())
+            current = self._current_job
+        for job in pending:
+            job.cancel()
+        if current is not None:
+            current.cancel()
+        self.requestInterruption()
         try:
-            # 检查是否被中断
-            if self.isInterruptionRequested():
-                return
-                
-            result = self.funasr_engine.transcribe(self.audio_data)
-            
-            # 再次检查是否被中断
-            if self.isInterruptionRequested():
-                return
-                
-            # 处理 FunASR 返回的结果
-            if isinstance(result, list) and len(result) > 0:
-                text = result[0].get('text', '')
-            elif isinstance(result, dict):
-                text = result.get('text', '')
+            self._jobs.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def quit(self):
+        """兼容通用的线程清理流程（quit + wait）"""
+        self.stop()
+        super().quit()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                job = self._jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if job is None:
+                break
+
+            with self._lock:
+                self._pending.pop(job.job_id, None)
+                wait_ms = (time.perf_counter() - job.submitted_at) * 1000
+                self._last_wait_ms = wait_ms
+                self._total_wait_ms += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+                if job.cancelled:
+                    self._cancelled += 1
+                    continue
+                self._current_job = job
+
+            start_time = time.perf_counter()
+            tracer.add_span('worker.queue_wait', int(job.submitted_at * 1e9), time.perf_counter_ns(),
+                            trace=job.trace)
+            try:
+                with tracer.activate(job.trace), tracer.span('worker.job', {'job_id': job.job_id}):
+                    if isinstance(job, StreamingJob):
+                        text = self._run_stream(job)
+                    else:
+                        text = self._extract_text(self.funasr_engine.transcribe(job.audio_data))
+
+                with self._lock:
+                    self._current_job = None
+                    if job.cancelled:
+                        self._cancelled += 1
+                        continue
+                    self._completed += 1
+                    self._total_process_ms += (time.perf_counter() - start_time) * 1000
+                self.transcription_done.emit(job.job_id, text)
+            except Exception as e:
+                import logging
+                logging.error(f"转写失败: {e}")
+                with self._lock:
+                    self._current_job = None
+                    self._failed += 1
+                if not job.cancelled:
+                    self.transcription_failed.emit(job.job_id, str(e))
+
+    def _run_stream(self, job):
+        """录音期间输出中间结果，录音结束后由同一个流式会话解码最后一段得到最终结果"""
+        final_text = ""
+        for result in self.funasr_engine.transcribe_stream(job.iter_chunks()):
+            if job.cancelled:
+                return ""
+            if result.get('is_final'):
+                final_text = result.get('text', '')
             else:
-                text = str(result)
-                
-            # 最后检查是否被中断
-            if not self.isInterruptionRequested():
-                self.transcription_done.emit(text)
-        except Exception as e:
-            import logging
-            logging.error(f"转写失败: {e}")
-            if not self.isInterruptionRequested():
-                self.transcription_done.emit("转写失败，请重试")
\ No newline at end of file
+                self.partial_result.emit(job.job_id, result.get('text', ''))
+        return final_text
+
+    @staticmethod
+    def _extract_text(result):
+        """处理 FunASR 返回的结果"""
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get('text', '')
+        elif isinstance(result, dict):
+            return result.get('text', '')
+        return str(result)
+
+
+def get_transcription_worker(funasr_engine, max_queue_size=4):
+    """获取引擎对应的常驻转写线程，首次调用时创建并启动
+
+    同一个引擎只会有一个转写线程，不同入口（主程序、各个管理器）共用它。
+    """
+    worker = getattr(funasr_engine, '_transcription_worker', None)
+    if worker is None or worker.isFinished():
+        worker = TranscriptionWorker(funasr_engine, max_queue_size)
+        funasr_engine._transcription_worker = worker
+        worker.start()
+    return worker
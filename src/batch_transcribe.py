@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量转写音频文件
+
+用与应用相同的 FunASREngine（同样的热词、标点和发音纠错）离线转写会议录音等大批量文件：
+- 输入可以是 WAV / PCM 文件或目录（递归查找），大文件通过内存映射按段读取，不整段载入内存
+- 多进程并行，每个工作进程只加载一次模型
+- 结果逐行写入 JSONL，包含每个文件的实时率（RTF = 解码耗时 / 音频时长）
+- 每完成一个文件记录到检查点文件，中断后用相同命令重新运行即可从断点继续
+- 转写失败的文件只记录日志，不写入结果，下次运行时重试
+- 每个文件在结果中只有一条记录；文件在两次运行之间被修改过时会重新转写并追加一条，
+  以同一 path 的最后一条为准
+
+用法:
+    python src/batch_transcribe.py meetings/ -o results.jsonl --workers 4
+    python src/batch_transcribe.py a.wav b.pcm --pcm-rate 16000 -o results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = ('.wav', '.pcm')
+
+
+class MappedAudio:
+    """内存映射的音频文件，按切片读取并转换为 16kHz 单声道 float32
+
+    只实现 len() 和切片读取，可以直接传给 FunASREngine.transcribe()，长文件分段解码时按需读取片段。
+    采样率不是 16kHz 时用线性插值重采样。
+    """
+
+    def __init__(self, path, pcm_rate=SAMPLE_RATE):
+        self.path = path
+        if path.lower().endswith('.wav'):
+            offset, size, dtype, channels, rate = self._parse_wav(path)
+        else:
+            # 裸 PCM：16 位小端单声道
+            offset, size, dtype, channels, rate = 0, os.path.getsize(path), np.dtype('<i2'), 1, pcm_rate
+        frames = size // (dtype.itemsize * channels)
+        self.source_rate = rate
+        self.channels = channels
+        if frames == 0:
+            self._data = np.zeros((0, channels), dtype=dtype)
+        else:
+            self._data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+        self._scale = 1.0 / 32768.0 if dtype.kind == 'i' else 1.0
+        self._length = int(frames * SAMPLE_RATE // rate)
+
+    @staticmethod
+    def _parse_wav(path):
+        """解析 RIFF 头，返回 (数据偏移, 数据字节数, 采样类型, 声道数, 采样率)"""
+        with open(path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError("不是有效的 WAV 文件")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError("WAV 文件缺少 data 块")
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'fmt ':
+                    fmt = struct.unpack('<HHIIHH', f.read(16))
+                    f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise ValueError("WAV 文件缺少 fmt 块")
+                    data_offset = f.tell()
+                    data_size = min(chunk_size, os.path.getsize(path) - data_offset)
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+        format_tag, channels, rate, _, _, bits = fmt
+        if format_tag == 0xFFFE:  # WAVE_FORMAT_EXTENSIBLE，按位深推断
+            format_tag = 3 if bits == 32 else 1
+        if format_tag == 1 and bits == 16:
+            dtype = np.dtype('<i2')
+        elif format_tag == 3 and bits == 32:
+            dtype = np.dtype('<f4')
+        else:
+            raise ValueError(f"只支持 16 位 PCM 或 32 位浮点 WAV（格式 {format_tag}，{bits} 位）")
+        return data_offset, data_size, dtype, channels, rate
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def duration(self):
+        return self._length / SAMPLE_RATE
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("MappedAudio 只支持连续切片")
+        start, stop, _ = key.indices(self._length)
+        if start >= stop:
+            return np.zeros(0, dtype=np.float32)
+
+        if self.source_rate == SAMPLE_RATE:
+            block = self._data[start:stop]
+            positions = None
+        else:
+            # 输出采样对应的源位置，只读取覆盖这些位置的源采样
+            positions = np.arange(start, stop) * (self.source_rate / SAMPLE_RATE)
+            first = int(positions[0])
+            last = min(int(positions[-1]) + 2, len(self._data))
+            block = self._data[first:last]
+            positions -= first
+
+        mono = block.mean(axis=1, dtype=np.float32) if self.channels > 1 else block[:, 0].astype(np.float32)
+        if positions is not None:
+            mono = np.interp(positions, np.arange(len(mono)), mono).astype(np.float32)
+        if self._scale != 1.0:
+            mono *= self._scale
+        return mono
+
+
+def collect_files(inputs):
+    """展开输入的文件和目录，返回排好序的音频文件绝对路径"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        elif os.path.isfile(item):
+            files.append(item)
+        else:
+            logging.warning(f"输入不存在，已跳过: {item}")
+    return sorted({os.path.abspath(path) for path in files})
+
+
+def _file_key(path):
+    """检查点中的文件标识，文件被修改后会重新转写"""
+    stat = os.stat(path)
+    return f"{path}\t{stat.st_size}\t{int(stat.st_mtime)}"
+
+
+def _output_paths(output_path):
+    """结果文件中已有记录的文件路径（忽略中断时写了一半的行）"""
+    paths = set()
+    if not os.path.exists(output_path):
+        return paths
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                paths.add(json.loads(line)['path'])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return paths
+
+
+class Checkpoint:
+    """已完成文件的检查点（每行一个文件标识，只追加）
+
+    先记检查点再写结果：两步之间中断时，检查点中有记录、结果中没有的文件不算完成，
+    下次运行重新转写，结果中不会出现同一文件的重复记录。
+    """
+
+    def __init__(self, path, output_path=None):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+        if output_path is not None and self.done:
+            written = _output_paths(output_path)
+            self.done = {key for key in self.done if key.split('\t', 1)[0] in written}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, path):
+        try:
+            return _file_key(path) in self.done
+        except OSError:
+            return False
+
+    def mark_done(self, path):
+        key = _file_key(path)
+        self._file.write(key + '\n')
+        self._file.flush()
+        self.done.add(key)
+
+    def close(self):
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+        self._file.close()
+
+
+# ---- 工作进程 ----
+
+_engine = None
+_pcm_rate = SAMPLE_RATE
+
+
+def _init_worker(threads_per_worker, pcm_rate):
+    """工作进程初始化：加载一次模型，之后处理的所有文件共用"""
+    global _engine, _pcm_rate
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    from settings_manager import SettingsManager
+    from src.funasr_engine import FunASREngine
+
+    settings_manager = SettingsManager()
+    # 多个进程并行时各自只用分到的核
+    settings_manager.set_setting('asr.threads.num_threads', threads_per_worker, auto_save=False)
+    settings_manager.set_setting('asr.real_time_display', False, auto_save=False)
+    _engine = FunASREngine(settings_manager)
+    _pcm_rate = pcm_rate
+
+
+def _transcribe_file(path):
+    """在工作进程中转写一个文件，返回一条 JSONL 记录"""
+    record = {'path': path, 'worker': os.getpid()}
+    try:
+        audio = MappedAudio(path, _pcm_rate)
+        record['duration_s'] = round(audio.duration, 3)
+        start = time.perf_counter()
+        # 长文件由引擎按段切片读取，不整段载入内存
+        result = _engine.transcribe(audio) if len(audio) > 0 else [{'text': ''}]
+        decode_s = time.perf_counter() - start
+        record['text'] = result[0].get('text', '') if result else ''
+        record['decode_s'] = round(decode_s, 3)
+        record['rtf'] = round(decode_s / audio.duration, 4) if audio.duration else 0.0
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+    return record
+
+
+def run(files, output_path, checkpoint_path, workers, threads_per_worker, pcm_rate):
+    """转写文件列表，返回 (本次完成数, 失败数)"""
+    checkpoint = Checkpoint(checkpoint_path, output_path)
+    pending = [path for path in files if not checkpoint.is_done(path)]
+    skipped = len(files) - len(pending)
+    if skipped:
+        print(f"检查点中已完成 {skipped} 个文件，剩余 {len(pending)} 个")
+    if not pending:
+        checkpoint.close()
+        return 0, 0
+
+    completed = failed = 0
+    audio_seconds = decode_seconds = 0.0
+    started = time.perf_counter()
+    # spawn：工作进程不继承父进程中的 torch 线程池等状态
+    context = multiprocessing.get_context('spawn')
+    pool = context.Pool(workers, initializer=_init_worker, initargs=(threads_per_worker, pcm_rate))
+    try:
+        with open(output_path, 'a+b') as output:
+            if output.tell() > 0:
+                # 上次中断时最后一行可能没有写完，新记录从新的一行开始
+                output.seek(-1, os.SEEK_END)
+                if output.read(1) != b'\n':
+                    output.write(b'\n')
+            for record in pool.imap_unordered(_transcribe_file, pending):
+                if 'error' in record:
+                    # 失败的文件不写入结果、不记入检查点，下次运行时重试
+                    failed += 1
+                    logging.error(f"转写失败 {record['path']}: {record['error']}")
+                    continue
+                checkpoint.mark_done(record['path'])
+                output.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+                output.flush()
+                completed += 1
+                audio_seconds += record['duration_s']
+                decode_seconds += record['decode_s']
+                done = completed + failed
+                if done % 10 == 0 or done == len(pending):
+                    elapsed = time.perf_counter() - started
+                    print(f"[{done}/{len(pending)}] 音频 {audio_seconds / 60:.1f} 分钟，"
+                          f"墙钟 {elapsed:.0f}s，整体加速 {audio_seconds / elapsed:.1f}x")
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print(f"\n已中断：本次完成 {completed} 个文件，重新运行相同命令即可继续")
+        raise
+    finally:
+        pool.join()
+        checkpoint.close()
+
+    if audio_seconds:
+        print(f"完成 {completed} 个文件（失败 {failed} 个），平均 RTF {decode_seconds / audio_seconds:.3f}")
+    return completed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量转写 WAV / PCM 音频文件")
+    parser.add_argument('inputs', nargs='+', help="音频文件或目录（递归查找 .wav / .pcm）")
+    parser.add_argument('-o', '--output', default='transcripts.jsonl', help="结果 JSONL 文件（追加写入）")
+    parser.add_argument('--checkpoint', help="检查点文件，默认为输出文件名加 .checkpoint")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 4),
+                        help="工作进程数，每个进程加载一份模型")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="每个进程的 torch 线程数，0 表示按 CPU 核数平均分配")
+    parser.add_argument('--pcm-rate', type=int, default=SAMPLE_RATE, help="裸 PCM 文件的采样率")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("没有找到音频文件")
+        sys.exit(1)
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+    print(f"共 {len(files)} 个文件，{workers} 个进程 × {threads} 线程")
+    try:
+        _, failed = run(files, args.output, checkpoint_path, workers, threads, args.pcm_rate)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (project_root, os.path.join(project_root, 'src')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    main()
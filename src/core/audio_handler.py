@@ -64,7 +64,7 @@ class AudioHandler:
                             self.app.recording_timer.deleteLater()
                         
                         # 确保定时器在主线程中创建
-                        max_duration = self.app.settings_manager.get_setting('audio.max_recording_duration', 10)
+                        max_duration = self.app.settings_manager.get_max_recording_duration()
 
                         # 检查当前线程，如果不在主线程则使用信号机制
                         if QThread.currentThread() != QApplication.instance().thread():
@@ -80,7 +80,8 @@ class AudioHandler:
                             self.app.recording_timer = QTimer(self.app)
                             self.app.recording_timer.setSingleShot(True)
                             self.app.recording_timer.timeout.connect(self._auto_stop_recording)
-                            self.app.recording_timer.start(max_duration * 1000)  # 转换为毫秒
+                            if max_duration > 0:  # 长录音模式可以不限制时长
+                                self.app.recording_timer.start(max_duration * 1000)  # 转换为毫秒
                         
                     except Exception as e:
                         error_msg = f"开始录音时出错: {str(e)}"
@@ -139,10 +140,10 @@ class AudioHandler:
                         self.app.update_ui_signal.emit("⚠️ 语音识别引擎尚未就绪，无法处理录音", "")
                         return
                         
-                    from audio_threads import TranscriptionThread
-                    self.app.transcription_thread = TranscriptionThread(audio_data, self.app.funasr_engine)
-                    self.app.transcription_thread.transcription_done.connect(self.app.on_transcription_done)
-                    self.app.transcription_thread.start()
+                    # 交给应用的常驻转写线程排队处理
+                    job_id = self.app._get_transcription_worker().submit(audio_data)
+                    if job_id is None:
+                        self.app.update_ui_signal.emit("⚠️ 转写任务过多，请稍后再试", "")
                 else:
                     self.app.update_ui_signal.emit("❌ 未检测到声音", "")
             except Exception as e:
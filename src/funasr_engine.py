@@ -1,4 +1,3 @@
-from funasr import AutoModel
 import numpy as np
 import os
 import sys
@@ -7,9 +6,14 @@ import re
 from contextlib import redirect_stdout, redirect_stderr
 import io
 import time
-from concurrent.futures import ThreadPoolExecutor
+import threading
 import math
 from src.utils.cleanup_mixin import CleanupMixin
+from src.utils.lazy_import import lazy_import
+from src.utils.tracing import tracer
+
+# funasr 会连带导入 torch 和 modelscope，推迟到创建引擎时再加载
+funasr = lazy_import('funasr')
 
 # 设置 modelscope 日志级别为 WARNING，减少不必要的信息
 logging.getLogger('modelscope').setLevel(logging.WARNING)
@@ -64,27 +68,47 @@ class FunASREngine(CleanupMixin):
             if not self.has_punc_model:
                 import logging
                 logging.warning("标点模型不存在，将跳过标点处理")
-            
+
+            # 流式模型是可选的，只在启用实时显示时加载；不存在时使用离线模型分段解码代替
+            streaming_model_dir = os.path.join(cache_dir, 'damo', 'speech_paraformer-large_asr_nat-zh-cn-16k-common-vocab8404-online')
+            real_time_display = self.settings_manager.get_setting('asr.real_time_display', True) if self.settings_manager else False
+            self.has_streaming_model = real_time_display and os.path.exists(streaming_model_dir)
+            self.streaming_model = None
+
+            self._apply_interop_threads()
+
             # 使用 redirect_stdout 来捕获输出
+            self.model_cache_stats = {}
             f = io.StringIO()
             with redirect_stdout(f), redirect_stderr(f):
                 # 初始化语音识别模型
-                self.model = AutoModel(
-                    model=asr_model_dir,
-                    model_revision="v2.0.4",
-                    disable_update=True
-                )
+                self.model = self._load_auto_model('asr', asr_model_dir)
                 
                 # 只在标点模型存在时才加载
                 if self.has_punc_model:
-                    self.punc_model = AutoModel(
-                        model=punc_model_dir,
-                        model_revision="v2.0.4",
-                        disable_update=True
-                    )
+                    self.punc_model = self._load_auto_model('punc', punc_model_dir)
                 else:
                     self.punc_model = None
-                
+
+                if self.has_streaming_model:
+                    self.streaming_model = self._load_auto_model('streaming', streaming_model_dir)
+
+            # 可选：对线性层做 int8 动态量化，降低 CPU 推理延迟和内存占用
+            self.quantization_stats = {}
+            self._quantize_models({
+                'asr': asr_model_dir,
+                'punc': punc_model_dir,
+                'streaming': streaming_model_dir
+            })
+
+            # 预热模型，避免首次转写承担 torch 内核初始化和内存分配的开销
+            self.warmup_stats = {}
+            self._warm_up()
+
+            # 按本机保存的结果设置 torch 线程数，首次启动时自动测试
+            self.thread_stats = {}
+            self._tune_threads()
+
             # 设置引擎就绪状态
             self.is_ready = True
                 
@@ -98,106 +122,408 @@ class FunASREngine(CleanupMixin):
             logging.error(error_msg)
             raise
 
-    def preprocess_audio(self, audio_data):
-        """音频预处理
-        1. 音频归一化
-        2. 预加重（提升高频部分）
-        3. 静音检测和去除
+    def _warm_up(self):
+        """用几段不同长度的合成音频预热ASR和标点模型
+
+        记录首次（冷启动）和预热后同一段音频的解码耗时，总耗时受
+        asr.warmup.budget_ms 限制，超出预算后跳过剩余片段。
         """
+        enabled = True
+        budget_ms = 3000
+        clip_seconds = [1.0, 3.0, 6.0]
+        if self.settings_manager:
+            enabled = self.settings_manager.get_setting('asr.warmup.enabled', enabled)
+            budget_ms = self.settings_manager.get_setting('asr.warmup.budget_ms', budget_ms)
+            clip_seconds = self.settings_manager.get_setting('asr.warmup.clip_seconds', clip_seconds)
+        if not enabled or not clip_seconds:
+            return
+
         try:
-            start_time = time.time()
-            original_length = len(audio_data)
+            start_time = time.perf_counter()
+            rng = np.random.default_rng(0)
+            clips = []
 
-            # 1. 快速检查是否需要预处理
-            if len(audio_data) < 1600:  # 小于100ms的音频直接跳过
-                return audio_data
+            for seconds in clip_seconds:
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                if clips and elapsed_ms >= budget_ms:
+                    logging.info(f"模型预热达到预算 {budget_ms}ms，跳过剩余片段")
+                    break
 
-            # 2. 音频归一化
-            try:
-                audio_max = float(np.max(np.abs(audio_data)))
-                # 使用Python标量进行比较，避免NumPy数组比较错误
-                if float(audio_max) > 0.0:
-                    audio_data = audio_data / audio_max
-            except Exception as e:
-                import logging
-                logging.error(f"音频归一化处理时出错: {e}")
-                # 如果处理失败，跳过归一化步骤
-                pass
+                # 低幅度噪声，避免全零输入被模型提前短路
+                clip = (0.01 * rng.standard_normal(int(float(seconds) * 16000))).astype(np.float32)
+                clip_start = time.perf_counter()
+                self._transcribe_single(clip)
+                asr_ms = (time.perf_counter() - clip_start) * 1000
+
+                punc_ms = 0.0
+                if self.has_punc_model:
+                    punc_start = time.perf_counter()
+                    self._add_punctuation("今天天气很好我们一起去公园散步吧")
+                    punc_ms = (time.perf_counter() - punc_start) * 1000
+
+                clips.append({'seconds': float(seconds), 'asr_ms': round(asr_ms, 1), 'punc_ms': round(punc_ms, 1), 'audio': clip})
+
+            if self.streaming_model is not None:
+                self._decode_stream_segment(np.zeros(self.STREAMING_CHUNK_SIZE[1] * 960, dtype=np.float32), {}, True)
 
-            # 3. 条件性预加重 - 只在高频信号较弱时进行
+            # 同一段音频再解码一次，得到预热后的耗时
+            first = clips[0]
+            warm_start = time.perf_counter()
+            self._transcribe_single(first['audio'])
+            warm_ms = (time.perf_counter() - warm_start) * 1000
+
+            for clip_info in clips:
+                del clip_info['audio']
+
+            self.warmup_stats = {
+                'cold_ms': first['asr_ms'],
+                'warm_ms': round(warm_ms, 1),
+                'clip_seconds': first['seconds'],
+                'clips': clips,
+                'total_ms': round((time.perf_counter() - start_time) * 1000, 1),
+                'budget_ms': budget_ms
+            }
+            logging.info(f"模型预热完成: 冷启动 {first['asr_ms']:.0f}ms -> 预热后 {warm_ms:.0f}ms "
+                         f"（{first['seconds']}s 音频，共耗时 {self.warmup_stats['total_ms']:.0f}ms）")
+        except Exception as e:
+            # 预热失败不影响引擎可用性
+            logging.warning(f"模型预热失败: {e}")
+
+    def _load_auto_model(self, name, model_dir):
+        """加载 FunASR 模型，权重优先从内存映射缓存读取（asr.model_cache.enabled）
+
+        首次加载后把权重另存为可内存映射的 torch 文件，缓存以模型目录的哈希为键。
+        之后启动时只构建模型结构，权重直接映射缓存文件（load_state_dict(assign=True)），
+        不再反序列化和复制完整 checkpoint，多个进程还能共享同一份物理内存页。
+        """
+        model_kwargs = {'model': model_dir, 'model_revision': "v2.0.4", 'disable_update': True}
+        enabled = True
+        cache_root = ''
+        if self.settings_manager:
+            enabled = self.settings_manager.get_setting('asr.model_cache.enabled', enabled)
+            cache_root = self.settings_manager.get_setting('asr.model_cache.cache_dir', cache_root)
+        if not enabled:
+            return funasr.AutoModel(**model_kwargs)
+
+        try:
+            import torch
+            cache_root = cache_root or os.path.join(os.environ['MODELSCOPE_CACHE'], 'mmap_cache')
+            cache_file = os.path.join(cache_root, f"{name}-{self._model_dir_hash(model_dir, torch.__version__)}.pt")
+        except Exception as e:
+            logging.warning(f"{name} 模型缓存不可用: {e}")
+            return funasr.AutoModel(**model_kwargs)
+
+        start_time = time.perf_counter()
+        if os.path.exists(cache_file):
             try:
-                diff_mean = float(np.mean(np.abs(np.diff(audio_data))))
-                # 使用Python标量进行比较，避免NumPy数组比较错误
-                if float(diff_mean) < 0.04:
-                    preemphasis_coef = 0.97
-                    audio_data = np.append(audio_data[0], audio_data[1:] - preemphasis_coef * audio_data[:-1])
+                # init_param 指向不存在的文件时，AutoModel 只构建结构、不加载 checkpoint
+                auto_model = funasr.AutoModel(init_param='', **model_kwargs)
+                state_dict = torch.load(cache_file, map_location='cpu', mmap=True, weights_only=True)
+                auto_model.model.load_state_dict(state_dict, strict=True, assign=True)
+                auto_model.model.eval()
+                self.model_cache_stats[name] = {'source': 'mmap', 'ms': round((time.perf_counter() - start_time) * 1000, 1)}
+                return auto_model
             except Exception as e:
-                import logging
-                logging.error(f"预加重处理时出错: {e}")
-                # 如果处理失败，跳过预加重步骤
-                pass
+                # 缓存损坏或与当前 funasr 版本不兼容，删除后重新生成
+                logging.warning(f"{name} 模型缓存加载失败，重新生成: {e}")
+                try:
+                    os.remove(cache_file)
+                except OSError:
+                    pass
+                start_time = time.perf_counter()
 
-            # 4. 静音检测和去除
-            chunk_size = 3200  # 200ms at 16kHz
-            chunks = np.array_split(audio_data, max(1, len(audio_data) // chunk_size))
-            
-            # 计算能量
-            energies = np.array([np.mean(np.abs(chunk)) for chunk in chunks])
-            
-            # 自适应阈值
-            threshold = float(np.mean(energies)) * 0.1
-            # 确保使用标量值进行比较，避免NumPy数组比较错误
+        auto_model = funasr.AutoModel(**model_kwargs)
+        self.model_cache_stats[name] = {'source': 'checkpoint', 'ms': round((time.perf_counter() - start_time) * 1000, 1)}
+        try:
+            os.makedirs(cache_root, exist_ok=True)
+            temp_file = f"{cache_file}.tmp"
+            torch.save(auto_model.model.state_dict(), temp_file)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            logging.warning(f"{name} 模型缓存写入失败: {e}")
+        return auto_model
+
+    @staticmethod
+    def _model_dir_hash(model_dir, salt=''):
+        """根据模型目录下所有文件的名称、大小和修改时间生成哈希
+
+        权重缓存和量化缓存共用，salt 传入 torch 版本，升级 torch 后缓存自动失效。
+        """
+        import hashlib
+        digest = hashlib.sha1(salt.encode('utf-8'))
+        for root, dirs, files in os.walk(model_dir):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                digest.update(f"{os.path.relpath(path, model_dir)}:{stat.st_size}:{int(stat.st_mtime)}".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _quantize_models(self, model_dirs):
+        """对已加载模型的 Linear 层做 int8 动态量化（asr.quantization.enabled）
+
+        量化后的参数（state_dict）保存在 asr.quantization.cache_dir（默认为模型缓存下的
+        quantized 目录），以模型目录的哈希（含 torch 版本）为键。缓存只包含张量，
+        以 weights_only=True 读取：命中时只把 Linear 层换成空的动态量化层再载入缓存，
+        不再重新量化；未命中或缓存不可用时才调用 quantize_dynamic 并写入缓存。
+        """
+        enabled = False
+        cache_root = ''
+        if self.settings_manager:
+            enabled = self.settings_manager.get_setting('asr.quantization.enabled', enabled)
+            cache_root = self.settings_manager.get_setting('asr.quantization.cache_dir', cache_root)
+        if not enabled:
+            return
+
+        try:
+            import torch
+        except ImportError:
+            logging.warning("未安装 torch，跳过模型量化")
+            return
+
+        cache_root = cache_root or os.path.join(os.environ['MODELSCOPE_CACHE'], 'quantized')
+        os.makedirs(cache_root, exist_ok=True)
+        models = {'asr': self.model, 'punc': self.punc_model, 'streaming': self.streaming_model}
+
+        for name, auto_model in models.items():
+            if auto_model is None or not hasattr(auto_model, 'model'):
+                continue
             try:
-                # 使用np.greater_equal避免直接数组比较
-                non_silent_mask = np.greater_equal(energies, threshold)
-                
-                # 如果静音比例过高才进行去除
-                # 使用.mean()和float()确保标量比较
-                silent_ratio = float(np.mean(non_silent_mask.astype(np.float32)))
-                # 使用Python标量进行比较，避免NumPy数组比较错误
-                if silent_ratio < 0.8:
-                    # 确保布尔数组索引转换为Python布尔值
-                    non_silent_indices = np.where(non_silent_mask)[0]
-                    non_silent_chunks = [chunks[i] for i in non_silent_indices]
-                    if len(non_silent_chunks) > 0:  # 使用len()而不是直接判断列表
-                        audio_data = np.concatenate(non_silent_chunks)
+                start_time = time.perf_counter()
+                cache_file = os.path.join(cache_root, f"{name}-{self._model_dir_hash(model_dirs[name], torch.__version__)}.pt")
+                quantized = None
+                source = 'quantized'
+                if os.path.exists(cache_file):
+                    quantized = self._load_quantized_cache(auto_model.model, cache_file)
+                    if quantized is not None:
+                        source = 'cache'
+                    else:
+                        self._remove_quietly(cache_file)
+                if quantized is None:
+                    quantized = torch.quantization.quantize_dynamic(
+                        auto_model.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                    temp_file = f"{cache_file}.tmp"
+                    torch.save(quantized.state_dict(), temp_file)
+                    os.replace(temp_file, cache_file)
+                quantized.eval()
+                auto_model.model = quantized
+                self.quantization_stats[name] = {
+                    'source': source,
+                    'ms': round((time.perf_counter() - start_time) * 1000, 1),
+                    'cache_file': cache_file
+                }
+                logging.info(f"{name} 模型 int8 量化完成（{source}），耗时 {self.quantization_stats[name]['ms']:.0f}ms")
             except Exception as e:
-                import logging
-                logging.error(f"静音检测处理时出错: {e}")
-                # 如果处理失败，保持原始音频数据
-                pass
+                # 量化失败时继续使用 fp32 模型
+                logging.warning(f"{name} 模型量化失败，使用原始精度: {e}")
 
-            # 记录处理结果
-            process_time = (time.time() - start_time) * 1000
-            compression_ratio = len(audio_data) / original_length * 100
-            
-            return audio_data
-            
+    @staticmethod
+    def _load_quantized_cache(model, cache_file):
+        """把缓存的量化参数载入模型，成功时返回量化后的模型，失败时返回 None
+
+        与 quantize_dynamic 对 {nn.Linear} 的处理一致，只替换类型恰好为 nn.Linear 的层，
+        新层的权重在载入缓存前是空的。载入失败时换回原来的 fp32 层，模型保持不变。
+        """
+        import torch
+        from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+
+        replaced = []
+        try:
+            state_dict = torch.load(cache_file, map_location='cpu', weights_only=True)
+            for parent in list(model.modules()):
+                for child_name, child in list(parent.named_children()):
+                    if type(child) is torch.nn.Linear:
+                        replaced.append((parent, child_name, child))
+                        setattr(parent, child_name, DynamicLinear(
+                            child.in_features, child.out_features,
+                            bias_=child.bias is not None, dtype=torch.qint8))
+            model.load_state_dict(state_dict, strict=True)
+            return model
         except Exception as e:
-            import logging
-            logging.error(f"音频预处理失败: {e}")
-            return audio_data  # 如果处理失败，返回原始音频
+            # 缓存损坏或与当前模型结构不一致
+            logging.warning(f"量化缓存加载失败，重新量化: {e}")
+            for parent, child_name, child in replaced:
+                setattr(parent, child_name, child)
+            return None
+
+    @staticmethod
+    def _remove_quietly(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"删除文件失败: {path}: {e}")
+
+    def _machine_key(self):
+        """本机标识，用于按机器保存线程调优结果"""
+        import platform
+        key = f"{platform.node()}-{platform.machine()}-{os.cpu_count()}"
+        return re.sub(r'[^0-9A-Za-z_-]', '_', key)
+
+    def _thread_tuning_file(self):
+        """线程调优结果文件，放在模型缓存目录下
+
+        只由加载模型的进程（守护进程或进程内引擎）写入，不写 settings.json：
+        守护进程和界面进程各有一个设置写入线程，写同一个设置文件会互相覆盖。
+        """
+        return os.path.join(os.environ['MODELSCOPE_CACHE'], 'thread_tuning.json')
+
+    def _load_thread_tuning(self):
+        import json
+        try:
+            with open(self._thread_tuning_file(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"读取线程调优结果失败: {e}")
+            return {}
+
+    def _save_thread_tuning(self, machine_key, result):
+        import json
+        try:
+            path = self._thread_tuning_file()
+            tuned = self._load_thread_tuning()
+            tuned[machine_key] = result
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_file = f"{path}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(tuned, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, path)
+        except Exception as e:
+            logging.warning(f"保存线程调优结果失败: {e}")
+
+    def _apply_interop_threads(self):
+        """设置 torch inter-op 线程数（asr.threads.interop_threads）
+
+        inter-op 线程池启动后就不能再修改，必须在加载和运行模型之前调用。
+        """
+        interop_threads = 0
+        if self.settings_manager:
+            interop_threads = self.settings_manager.get_setting('asr.threads.interop_threads', 0)
+        if interop_threads <= 0:
+            return
+        try:
+            import torch
+            torch.set_num_interop_threads(interop_threads)
+        except (ImportError, RuntimeError) as e:
+            logging.debug(f"无法设置 inter-op 线程数: {e}")
+
+    def _tune_threads(self):
+        """设置 torch 计算线程数
+
+        优先级：手动设置 asr.threads.num_threads > 本机已保存的调优结果 >
+        启动时用一段合成音频测试几组线程数，选择解码最快的一组并保存到
+        模型缓存目录下的 thread_tuning.json。
+        """
+        try:
+            import torch
+        except ImportError:
+            return
+
+        num_threads = 0
+        auto_tune = True
+        if self.settings_manager:
+            num_threads = self.settings_manager.get_setting('asr.threads.num_threads', 0)
+            auto_tune = self.settings_manager.get_setting('asr.threads.auto_tune', True)
+
+        default_threads = torch.get_num_threads()
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+            self.thread_stats = {'num_threads': num_threads, 'source': 'manual'}
+            logging.info(f"使用手动设置的 torch 线程数: {num_threads}")
+            return
+
+        machine_key = self._machine_key()
+        tuned = self._load_thread_tuning()
+        if machine_key in tuned:
+            result = tuned[machine_key]
+            torch.set_num_threads(result['num_threads'])
+            self.thread_stats = dict(result, source='saved')
+            logging.info(f"使用本机调优的 torch 线程数: {result['num_threads']}"
+                         f"（{result.get('tuned_ms', 0):.0f}ms，默认 {default_threads} 线程 {result.get('default_ms', 0):.0f}ms）")
+            return
+        if not auto_tune:
+            return
+
+        try:
+            clip = (0.01 * np.random.default_rng(1).standard_normal(2 * 16000)).astype(np.float32)
+            cpu_count = os.cpu_count() or default_threads
+            candidates = sorted({n for n in (1, 2, 4, cpu_count // 2, cpu_count, default_threads)
+                                 if 0 < n <= cpu_count})
+            timings = {}
+            for n in candidates:
+                torch.set_num_threads(n)
+                self._transcribe_single(clip)  # 丢弃第一次，避免线程池重建的开销
+                best = float('inf')
+                for _ in range(2):
+                    start = time.perf_counter()
+                    self._transcribe_single(clip)
+                    best = min(best, (time.perf_counter() - start) * 1000)
+                timings[n] = best
+
+            best_threads = min(timings, key=timings.get)
+            torch.set_num_threads(best_threads)
+            result = {
+                'num_threads': best_threads,
+                'tuned_ms': round(timings[best_threads], 1),
+                'default_threads': default_threads,
+                'default_ms': round(timings[default_threads], 1),
+                'timings': {str(n): round(ms, 1) for n, ms in timings.items()}
+            }
+            self.thread_stats = dict(result, source='tuned')
+            self._save_thread_tuning(machine_key, result)
+            logging.info(f"torch 线程调优完成: {best_threads} 线程 {timings[best_threads]:.0f}ms，"
+                         f"默认 {default_threads} 线程 {timings[default_threads]:.0f}ms")
+        except Exception as e:
+            torch.set_num_threads(default_threads)
+            logging.warning(f"torch 线程调优失败，使用默认线程数: {e}")
+
+    def get_status(self):
+        """获取引擎状态，包含预热前后的解码耗时"""
+        return {
+            'is_ready': self.is_ready,
+            'has_punc_model': getattr(self, 'has_punc_model', False),
+            'has_streaming_model': getattr(self, 'streaming_model', None) is not None,
+            'model_cache': dict(getattr(self, 'model_cache_stats', {})),
+            'quantization': dict(getattr(self, 'quantization_stats', {})),
+            'threads': dict(getattr(self, 'thread_stats', {})),
+            'long_audio': dict(getattr(self, 'long_audio_stats', {})),
+            'warmup': dict(getattr(self, 'warmup_stats', {}))
+        }
+
+    def supports_streaming(self):
+        """是否加载了流式（online）模型；没有时界面不做录音期间的实时识别"""
+        return getattr(self, 'streaming_model', None) is not None
+
+    def _generate_single(self, audio_chunk):
+        """对单个音频块调用识别模型，返回模型的原始结果
+
+        不重定向输出：长录音逐段解码时由调用方在外层统一重定向一次。
+        """
+        result = self.model.generate(
+            input=audio_chunk,
+            batch_size_s=200,          # 恢复到原来的值
+            use_itn=True,
+            mode='offline',
+            decode_method='greedy_search',  # 改回greedy_search
+            disable_progress_bar=True,
+            hotwords=[(word, 50.0) for word in self.hotwords] if self.hotwords else None,
+            cache_size=2000,           # 恢复原来的缓存大小
+            beam_size=5                # 恢复原来的beam size
+        )
+
+        # 热词处理
+        if self.hotwords:
+            logging.debug(f"单块处理使用热词: {len(self.hotwords)} 个热词，权重: 50.0")
+        return result
 
     def _transcribe_single(self, audio_chunk):
         """处理单个音频块"""
         try:
             with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
-                result = self.model.generate(
-                    input=audio_chunk,
-                    batch_size_s=200,          # 恢复到原来的值
-                    use_itn=True,
-                    mode='offline',
-                    decode_method='greedy_search',  # 改回greedy_search
-                    disable_progress_bar=True,
-                    hotwords=[(word, 50.0) for word in self.hotwords] if self.hotwords else None,
-                    cache_size=2000,           # 恢复原来的缓存大小
-                    beam_size=5                # 恢复原来的beam size
-                )
-                
-                # 热词处理
-                if self.hotwords:
-                    import logging
-                    logging.debug(f"单块处理使用热词: {len(self.hotwords)} 个热词，权重: 50.0")
+                result = self._generate_single(audio_chunk)
             
             # 添加调试信息（避免输出音频数据）
             import logging
@@ -298,31 +624,84 @@ class FunASREngine(CleanupMixin):
             logging.error(f"❌ 标点处理失败: {e}")
             return text
 
+    def _to_float32(self, audio_data):
+        """将不同类型的音频数据统一转换为float32数组，失败时返回None"""
+        if isinstance(audio_data, bytes):
+            # bytes数据需要先转换为int16，再转换为float32
+            try:
+                # 假设是16位PCM数据
+                audio_data = np.frombuffer(audio_data, dtype=np.int16)
+                # 转换为float32并归一化到[-1, 1]
+                return audio_data.astype(np.float32) / 32768.0
+            except Exception as e:
+                logging.error(f"bytes音频数据转换失败: {e}")
+                return None
+        elif hasattr(audio_data, 'dtype') and audio_data.dtype != np.float32:
+            return audio_data.astype(np.float32)
+        elif not hasattr(audio_data, 'dtype'):
+            # 如果不是NumPy数组，转换为NumPy数组
+            try:
+                return np.array(audio_data, dtype=np.float32)
+            except Exception as e:
+                logging.error(f"音频数据转换失败: {e}")
+                return None
+        return audio_data
+
+    def _finalize_text(self, text):
+        """识别文本的后处理：标点、英文分词、发音纠错"""
+        # 1. 添加标点（如果启用）
+        if self.settings_manager and self.settings_manager.get_setting('asr.auto_punctuation', True):
+            with tracer.span('asr.punctuation'):
+                text = self._add_punctuation(text)
+
+        # 2. 处理英文单词间的空格
+        with tracer.span('asr.text_process'):
+            processed_text = self._process_text(text)
+
+        # 3. 发音相似词纠错
+        with tracer.span('asr.pronunciation'):
+            corrected_text = self._correct_similar_pronunciation(processed_text)
+
+        # 4. 不再在引擎层添加HTML标签，保持纯文本
+        return corrected_text
+
     def transcribe(self, audio_data):
-        """转写音频数据"""
+        """转写音频数据
+
+        audio_data 可以是 float32 数组、16 位 PCM bytes，也可以是只支持 len() 和连续切片读取的
+        音频源（如 np.memmap、batch_transcribe.MappedAudio，切片返回 16kHz float32 数组）。
+        较长的音频源按段读取解码，不会整段载入内存。
+        """
+        with tracer.span('asr.transcribe'):
+            return self._transcribe(audio_data)
+
+    @staticmethod
+    def _is_audio_source(audio_data):
+        """是否为按切片读取的音频源（而不是已经在内存中的数组或 bytes）"""
+        if isinstance(audio_data, (bytes, bytearray, list, tuple)):
+            return False
+        if isinstance(audio_data, np.ndarray):
+            return isinstance(audio_data, np.memmap)
+        return hasattr(audio_data, '__len__') and hasattr(audio_data, '__getitem__')
+
+    def _transcribe(self, audio_data):
         try:
+            if self._is_audio_source(audio_data):
+                if len(audio_data) > self._long_audio_threshold():
+                    return self._transcribe_long(audio_data)
+                # 较短的音频源一次读入内存，按普通录音转写
+                audio_data = np.asarray(audio_data[:])
+
             # 处理不同类型的音频数据
-            if isinstance(audio_data, bytes):
-                # bytes数据需要先转换为int16，再转换为float32
-                try:
-                    # 假设是16位PCM数据
-                    audio_data = np.frombuffer(audio_data, dtype=np.int16)
-                    # 转换为float32并归一化到[-1, 1]
-                    audio_data = audio_data.astype(np.float32) / 32768.0
-                except Exception as e:
-                    logging.error(f"bytes音频数据转换失败: {e}")
-                    return ""
-            elif hasattr(audio_data, 'dtype') and audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            elif not hasattr(audio_data, 'dtype'):
-                # 如果不是NumPy数组，转换为NumPy数组
-                try:
-                    audio_data = np.array(audio_data, dtype=np.float32)
-                except Exception as e:
-                    logging.error(f"音频数据转换失败: {e}")
-                    return ""
+            audio_data = self._to_float32(audio_data)
+            if audio_data is None:
+                return ""
+
+            if len(audio_data) > self._long_audio_threshold():
+                return self._transcribe_long(audio_data)
             
-            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()), \
+                    tracer.span('asr.decode', {'seconds': round(len(audio_data) / 16000, 2)}):
                 # 1. 语音识别
                 result = self.model.generate(
                     input=audio_data,
@@ -350,18 +729,9 @@ class FunASREngine(CleanupMixin):
                     # 如果是其他类型，尝试转换为字符串
                     text = str(first_result)
                 
-            # 2. 添加标点（如果启用）
-            if self.settings_manager and self.settings_manager.get_setting('asr.auto_punctuation', True):
-                text = self._add_punctuation(text)
-            
-            # 3. 处理英文单词间的空格
-            processed_text = self._process_text(text)
-            
-            # 4. 发音相似词纠错
-            corrected_text = self._correct_similar_pronunciation(processed_text)
-            
-            # 5. 不再在引擎层添加HTML标签，保持纯文本
-            final_text = corrected_text
+            # 2. 标点、英文分词与发音纠错
+            with tracer.span('asr.finalize'):
+                final_text = self._finalize_text(text)
             
             return [{"text": final_text}]
             
@@ -374,6 +744,261 @@ class FunASREngine(CleanupMixin):
             logging.error(f"转写失败: {error_msg}")
             raise
 
+    # 长录音分段解码：默认每段时长、在段尾之前寻找静音切点的范围、相邻片段多解码的重叠（秒）
+    LONG_AUDIO_SEGMENT_SECONDS = 30
+    LONG_AUDIO_SEARCH_SECONDS = 2
+    LONG_AUDIO_OVERLAP_SECONDS = 0.5
+
+    def _long_audio_segment_seconds(self):
+        if self.settings_manager:
+            return float(self.settings_manager.get_setting('asr.long_audio.segment_seconds',
+                                                           self.LONG_AUDIO_SEGMENT_SECONDS))
+        return float(self.LONG_AUDIO_SEGMENT_SECONDS)
+
+    def _long_audio_threshold(self):
+        """超过该采样数的录音按段解码"""
+        return int((self._long_audio_segment_seconds() + self.LONG_AUDIO_SEARCH_SECONDS) * 16000)
+
+    def _long_audio_segments(self, audio, segment_seconds=None):
+        """在静音处把长录音切成约 segment_seconds 的片段，返回 [(start, end)]
+
+        切点取每段末尾 LONG_AUDIO_SEARCH_SECONDS 内能量最低的 20ms，避免切断字词。
+        只读取搜索窗口内的采样，memmap 录音不会整段载入内存。
+        """
+        total = len(audio)
+        segment = int((segment_seconds or self._long_audio_segment_seconds()) * 16000)
+        search = min(self.LONG_AUDIO_SEARCH_SECONDS * 16000, segment // 2)
+        frame = 320
+        bounds = []
+        start = 0
+        while total - start > segment + search:
+            end = start + segment
+            window = np.asarray(audio[end - search:end], dtype=np.float32)
+            frames = window[:(len(window) // frame) * frame].reshape(-1, frame)
+            quietest = int(np.argmin(np.mean(frames * frames, axis=1)))
+            cut = end - search + quietest * frame + frame // 2
+            bounds.append((start, cut))
+            start = cut
+        bounds.append((start, total))
+        return bounds
+
+    @staticmethod
+    def _result_text_and_timestamps(result):
+        """从模型结果中取出文本和逐字时间戳（毫秒，相对片段开头），没有时间戳时为 None"""
+        if not isinstance(result, list) or not result:
+            return '', None
+        first_result = result[0]
+        if isinstance(first_result, dict):
+            return first_result.get('text', ''), first_result.get('timestamp')
+        return str(first_result), None
+
+    @staticmethod
+    def _split_tokens(text):
+        """按时间戳的粒度切分文本：中文逐字，英文和数字按词"""
+        return re.findall(r"[A-Za-z0-9']+|\S", text)
+
+    @staticmethod
+    def _join_tokens(tokens):
+        """拼接保留下来的字词，相邻的英文词之间加空格"""
+        parts = []
+        for token in tokens:
+            if parts and token[0].isascii() and token[0].isalnum() and parts[-1][-1].isascii() and parts[-1][-1].isalnum():
+                parts.append(' ')
+            parts.append(token)
+        return ''.join(parts)
+
+    def _merge_timestamped(self, segments, results):
+        """按时间戳合并重叠解码的片段
+
+        每个片段多解码了两侧的重叠部分，只保留时间中点落在本片段 [start, end) 内的字，
+        重叠区的字只会被相邻两段中的一段保留。任一片段没有可用的时间戳时，
+        退回 _merge_results 的文本重叠检测。
+        """
+        texts = []
+        decoded = []
+        for (start, end), (read_start, result) in zip(segments, results):
+            text, timestamps = self._result_text_and_timestamps(result)
+            texts.append(text)
+            tokens = self._split_tokens(text)
+            if decoded is None or not isinstance(timestamps, list) or len(timestamps) != len(tokens):
+                decoded = None
+                continue
+            decoded.append((start, end, read_start, tokens, timestamps))
+        if decoded is None:
+            logging.debug("片段没有可用的时间戳，使用文本重叠检测合并")
+            return self._merge_results(texts), False
+
+        kept = []
+        for start, end, read_start, tokens, timestamps in decoded:
+            for token, (token_start, token_end) in zip(tokens, timestamps):
+                center = read_start + (token_start + token_end) * 8  # 毫秒中点换算为采样点
+                if start <= center < end:
+                    kept.append(token)
+        return self._join_tokens(kept), True
+
+    def _transcribe_long(self, audio, segment_seconds=None):
+        """分段转写长录音
+
+        在静音处切段，每段两侧各多解码 LONG_AUDIO_OVERLAP_SECONDS 作为上下文，
+        在调用线程中逐段解码，再按时间戳去掉重叠区的重复文字。
+        模型实例不能被多个线程同时调用，所以片段不并行解码。
+        每个片段在解码时才从（可能是 memmap 的）录音中读入内存，内存占用与录音总长无关。
+        """
+        segments = self._long_audio_segments(audio, segment_seconds)
+        overlap = int(self.LONG_AUDIO_OVERLAP_SECONDS * 16000)
+        total = len(audio)
+
+        def decode(bounds):
+            read_start = max(0, bounds[0] - overlap)
+            read_end = min(total, bounds[1] + overlap)
+            with tracer.span('asr.segment', {'start_s': round(read_start / 16000, 2)}):
+                chunk = np.array(audio[read_start:read_end], dtype=np.float32)
+                try:
+                    return read_start, self._generate_single(chunk)
+                except Exception as e:
+                    logging.error(f"长录音片段解码失败: {type(e).__name__}: {str(e)[:100]}")
+                    return read_start, None
+
+        start_time = time.perf_counter()
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()), \
+                tracer.span('asr.long_decode', {'segments': len(segments)}):
+            results = [decode(bounds) for bounds in segments]
+        decode_ms = (time.perf_counter() - start_time) * 1000
+
+        merged, used_timestamps = self._merge_timestamped(segments, results)
+        self.long_audio_stats = {
+            'audio_seconds': round(total / 16000, 1),
+            'segments': len(segments),
+            'decode_ms': round(decode_ms, 1),
+            'timestamp_merge': used_timestamps
+        }
+        logging.info(f"长录音 {total / 16000:.1f}s，分 {len(segments)} 段解码，耗时 {decode_ms:.0f}ms")
+        with tracer.span('asr.finalize'):
+            return [{"text": self._finalize_text(merged) if merged else ''}]
+
+    # 流式模型每个解码块的参数：[0, 10, 5] 对应 600ms 块长、300ms 前瞻
+    STREAMING_CHUNK_SIZE = [0, 10, 5]
+    STREAMING_ENCODER_LOOK_BACK = 4
+    STREAMING_DECODER_LOOK_BACK = 1
+
+    def _streaming_stride(self):
+        """每次解码的采样点数"""
+        if self.streaming_model is not None:
+            return self.STREAMING_CHUNK_SIZE[1] * 960  # 600ms at 16kHz
+        # 离线模型分段解码时，片段太短会明显降低准确率
+        window_s = 2.0
+        if self.settings_manager:
+            window_s = self.settings_manager.get_setting('asr.streaming_window_seconds', 2.0)
+        return int(max(0.6, float(window_s)) * 16000)
+
+    def _decode_stream_segment(self, segment, cache, is_final):
+        """解码一个流式片段，返回该片段新增的文本"""
+        if self.streaming_model is None:
+            # 没有流式模型时，使用离线模型逐段解码代替
+            if len(segment) < 1600:  # 小于100ms的尾段不值得单独解码
+                return ''
+            return self._transcribe_single(segment)
+
+        if is_final and len(segment) == 0:
+            # 最后一次调用必须带 is_final 才能冲刷缓存，空尾段用一帧静音代替
+            segment = np.zeros(960, dtype=np.float32)
+
+        try:
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                result = self.streaming_model.generate(
+                    input=segment,
+                    cache=cache,
+                    is_final=is_final,
+                    chunk_size=self.STREAMING_CHUNK_SIZE,
+                    encoder_chunk_look_back=self.STREAMING_ENCODER_LOOK_BACK,
+                    decoder_chunk_look_back=self.STREAMING_DECODER_LOOK_BACK,
+                    disable_progress_bar=True
+                )
+            if isinstance(result, list) and len(result) > 0:
+                first_result = result[0]
+                if isinstance(first_result, dict):
+                    return first_result.get('text', '')
+                return str(first_result)
+            return ''
+        except Exception as e:
+            error_msg = str(e)
+            if len(error_msg) > 200:
+                error_msg = f"{type(e).__name__}: {error_msg[:100]}... (消息过长已截断)"
+            logging.error(f"流式片段解码失败: {error_msg}")
+            return ''
+
+    def transcribe_stream(self, chunks):
+        """流式转写音频块
+
+        chunks 是按时间顺序产出音频块的可迭代对象（float32数组，或与 transcribe
+        相同约定的 int16 PCM bytes）。录音过程中每解码完一个片段产出一次
+        {"text": 当前累计文本, "is_final": False}；chunks 结束（松开热键）后只需
+        解码剩余的最后一段，再经过标点和纠错产出 {"text": 最终文本, "is_final": True}。
+
+        流式模型由缓存衔接片段边界，最后一段带 is_final 冲刷缓存即可。
+        离线模型按固定窗口切分，最后不足一个窗口的尾段单独解码准确率很差，
+        所以把它和上一个窗口合在一起重新解码，替换上一个窗口的文本。
+        """
+        stride = self._streaming_stride()
+        cache = {}
+        pieces = []
+        pending = []
+        pending_size = 0
+        last_window = None       # 离线模型最后解码的窗口
+        last_piece_index = None  # 该窗口的文本在 pieces 中的位置（没有文本时为 None）
+
+        for chunk in chunks:
+            data = self._to_float32(chunk)
+            if data is None or len(data) == 0:
+                continue
+            pending.append(data)
+            pending_size += len(data)
+            if pending_size < stride:
+                continue
+
+            buffer = np.concatenate(pending)
+            usable = (len(buffer) // stride) * stride
+            for start in range(0, usable, stride):
+                window = buffer[start:start + stride]
+                text = self._decode_stream_segment(window, cache, False)
+                last_window = window
+                last_piece_index = None
+                if text:
+                    pieces.append(text)
+                    last_piece_index = len(pieces) - 1
+                    yield {"text": self._join_stream_pieces(pieces), "is_final": False}
+            pending = [buffer[usable:]]
+            pending_size = len(buffer) - usable
+
+        # 松开热键后只剩最后不足一个片段的音频需要解码
+        tail = np.concatenate(pending) if pending else np.zeros(0, dtype=np.float32)
+        with tracer.span('asr.stream_tail', {'tail_ms': round(len(tail) / 16)}):
+            if self.streaming_model is None and last_window is not None and len(tail) > 0:
+                text = self._decode_stream_segment(np.concatenate([last_window, tail]), cache, True)
+                if last_piece_index is not None:
+                    if text:
+                        pieces[last_piece_index] = text
+                    else:
+                        del pieces[last_piece_index]
+                elif text:
+                    pieces.append(text)
+            else:
+                text = self._decode_stream_segment(tail, cache, True)
+                if text:
+                    pieces.append(text)
+
+        merged = self._join_stream_pieces(pieces)
+        with tracer.span('asr.finalize'):
+            final_text = self._finalize_text(merged) if merged else ''
+        yield {"text": final_text, "is_final": True}
+
+    def _join_stream_pieces(self, pieces):
+        """拼接流式片段文本"""
+        if self.streaming_model is not None:
+            # 流式模型每次只输出新增文本，直接拼接
+            return ''.join(pieces)
+        return self._merge_results(pieces)
+
     def _process_text(self, text):
         """处理文本，添加英文单词间的空格"""
         # 1. 使用正则表达式分离英文单词
@@ -1,6 +1,8 @@
 from PyQt6.QtCore import QObject, pyqtSignal
-from pynput import keyboard
 import traceback
+from utils.lazy_import import lazy_import
+
+keyboard = lazy_import('pynput.keyboard')
 
 class GlobalHotkeyManager(QObject):
     """全局热键管理器"""
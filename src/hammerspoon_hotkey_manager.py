@@ -1,6 +1,8 @@
 import os
 import json
 import time
+import socket
+import selectors
 import subprocess
 import threading
 from typing import Dict, Any, Optional
@@ -18,15 +20,28 @@ except ImportError:
         from .hotkey_manager_base import HotkeyManagerBase
 
 class HammerspoonHotkeyManager(HotkeyManagerBase):
-    """基于Hammerspoon的热键管理器"""
+    """基于Hammerspoon的热键管理器
+
+    热键事件和配置命令通过 Unix socket 以 JSON 行双向传递：Python 端监听，
+    Lua 脚本用 hs.socket 连接。监控线程阻塞在 select 上，事件到达即处理，
+    空闲时不会被唤醒。socket 无法创建时退回原来的文件轮询方式。
+    """
     
     def __init__(self, settings_manager=None):
         super().__init__(settings_manager)
         self.communication_file = '/tmp/asr_hotkey_communication.json'
         self.status_file = '/tmp/asr_hotkey_status.json'
+        self.config_file = '/tmp/asr_hotkey_config.json'
+        self.event_socket_path = '/tmp/asr_hotkey_events.sock'
         self.lua_script_path = None
         self.monitoring_thread = None
         self.should_stop_monitoring = False
+        self.channel = 'file'
+        self.last_event_latency_ms = None
+        self._server_socket = None
+        self._connections = {}  # 已连接的 Lua 端 socket -> 未处理完的数据
+        self._connections_lock = threading.Lock()
+        self._wakeup_pipe = None
         self.error_count = 0
         self.last_error = ''
         self.last_status_check = 0
@@ -38,20 +53,27 @@ class HammerspoonHotkeyManager(HotkeyManagerBase):
         self._create_lua_script()
     
     def _create_lua_script(self) -> None:
-        """创建Hammerspoon Lua脚本"""
+        """生成Hammerspoon Lua脚本（脚本只在这里定义，hammerspoon_scripts 下的文件是运行时生成的）"""
         script_dir = os.path.join(os.path.dirname(__file__), 'hammerspoon_scripts')
         os.makedirs(script_dir, exist_ok=True)
         
         self.lua_script_path = os.path.join(script_dir, 'hotkey_listener.lua')
+        # socket 未创建时留空，Lua 端只使用通信文件
+        event_socket_path = self.event_socket_path if self._server_socket is not None else ''
         
         lua_script = f'''
 -- ASR热键监听脚本
 local communication_file = "{self.communication_file}"
 local status_file = "{self.status_file}"
+local config_file = "{self.config_file}"
+local event_socket_path = "{event_socket_path}"
 local hotkey_type = "{self.hotkey_type}"
 local hotkey_obj = nil
 local is_recording = false
 local start_time = 0
+local sequence = 0
+local event_socket = nil
+local handle_command = nil
 
 -- 写入状态文件
 local function write_status(active, error_msg)
@@ -72,17 +94,49 @@ local function write_status(active, error_msg)
     end
 end
 
--- 写入通信文件
+-- 连接ASR的事件socket，同一连接上接收配置命令（每行一个JSON）
+local function connect_event_socket()
+    if event_socket_path == "" then
+        return nil
+    end
+    if event_socket and event_socket:connected() then
+        return event_socket
+    end
+    event_socket = hs.socket.new(function(data, tag)
+        local success, config = pcall(hs.json.decode, data)
+        if success and config and handle_command then
+            handle_command(config)
+        end
+        if event_socket then
+            event_socket:read("\\n")
+        end
+    end)
+    event_socket:connect(event_socket_path, function()
+        event_socket:read("\\n")
+    end)
+    return event_socket
+end
+
+-- 发送热键事件：优先走socket，未连接时写入通信文件
 local function write_communication(action, timestamp)
+    sequence = sequence + 1
     local data = {{
         action = action,
-        timestamp = timestamp or os.time(),
+        seq = sequence,
+        timestamp = timestamp or hs.timer.secondsSinceEpoch(),
         hotkey_type = hotkey_type
     }}
+    local message = hs.json.encode(data)
+    
+    local sock = connect_event_socket()
+    if sock and sock:connected() then
+        sock:write(message .. "\\n")
+        return
+    end
     
     local file = io.open(communication_file, "w")
     if file then
-        file:write(hs.json.encode(data))
+        file:write(message)
         file:close()
     end
 end
@@ -91,7 +145,7 @@ end
 local function on_hotkey_press()
     if not is_recording then
         is_recording = true
-        start_time = os.time()
+        start_time = hs.timer.secondsSinceEpoch()
         write_communication("press", start_time)
         write_status(true)
         print("[ASR] 热键按下，开始录音")
@@ -102,8 +156,7 @@ end
 local function on_hotkey_release()
     if is_recording then
         is_recording = false
-        local end_time = os.time()
-        write_communication("release", end_time)
+        write_communication("release")
         write_status(true)
         print("[ASR] 热键释放，停止录音")
     end
@@ -171,24 +224,29 @@ local function update_hotkey_type(new_type)
     start_hotkey_listening()
 end
 
--- 监听配置文件变化
-local config_watcher = hs.pathwatcher.new("/tmp/asr_hotkey_config.json", function(files)
+-- 处理ASR发来的配置命令
+handle_command = function(config)
+    if config.action == "update_hotkey" and config.hotkey_type then
+        update_hotkey_type(config.hotkey_type)
+    elseif config.action == "stop" then
+        stop_hotkey_listening()
+    elseif config.action == "start" then
+        start_hotkey_listening()
+    end
+end
+
+-- 监听配置文件变化（socket不可用时ASR写入配置文件）
+local config_watcher = hs.pathwatcher.new(config_file, function(files)
     for _, file in pairs(files) do
         if file:match("asr_hotkey_config.json$") then
-            local config_file = io.open("/tmp/asr_hotkey_config.json", "r")
-            if config_file then
-                local content = config_file:read("*all")
-                config_file:close()
+            local f = io.open(config_file, "r")
+            if f then
+                local content = f:read("*all")
+                f:close()
                 
                 local success, config = pcall(hs.json.decode, content)
                 if success and config then
-                    if config.action == "update_hotkey" and config.hotkey_type then
-                        update_hotkey_type(config.hotkey_type)
-                    elseif config.action == "stop" then
-                        stop_hotkey_listening()
-                    elseif config.action == "start" then
-                        start_hotkey_listening()
-                    end
+                    handle_command(config)
                 end
             end
         end
@@ -199,6 +257,7 @@ end)
 config_watcher:start()
 
 -- 初始启动
+connect_event_socket()
 start_hotkey_listening()
 
 -- 定期更新状态
@@ -252,6 +311,10 @@ print("[ASR] Hammerspoon热键脚本已加载")
                 self.logger.error(self.last_error)
                 return False
             
+            # 先监听事件socket，再按实际可用的通道重新生成Lua脚本
+            self._open_event_socket()
+            self._create_lua_script()
+            
             # 加载Lua脚本到Hammerspoon
             cmd = ['hs', '-c', f'dofile("{self.lua_script_path}")']
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
@@ -259,15 +322,13 @@ print("[ASR] Hammerspoon热键脚本已加载")
             if result.returncode != 0:
                 self.last_error = f"加载Lua脚本失败: {result.stderr}"
                 self.logger.error(self.last_error)
+                self._close_event_socket()
                 return False
             
-            # 启动监控线程
-            self.should_stop_monitoring = False
-            self.monitoring_thread = threading.Thread(target=self._monitor_communication, daemon=True)
-            self.monitoring_thread.start()
+            self._start_monitoring()
             
             self.is_active = True
-            self.logger.info("Hammerspoon热键监听已启动")
+            self.logger.info(f"Hammerspoon热键监听已启动（通道: {self.channel}）")
             return True
             
         except Exception as e:
@@ -283,9 +344,7 @@ print("[ASR] Hammerspoon热键脚本已加载")
             self._send_config_command({'action': 'stop'})
             
             # 停止监控线程
-            self.should_stop_monitoring = True
-            if self.monitoring_thread and self.monitoring_thread.is_alive():
-                self.monitoring_thread.join(timeout=2)
+            self._stop_monitoring()
             
             self.is_active = False
             self.logger.info("Hammerspoon热键监听已停止")
@@ -298,7 +357,7 @@ print("[ASR] Hammerspoon热键脚本已加载")
         self.stop_listening()
         
         # 清理临时文件
-        for file_path in [self.communication_file, self.status_file, '/tmp/asr_hotkey_config.json']:
+        for file_path in [self.communication_file, self.status_file, self.config_file]:
             try:
                 if os.path.exists(file_path):
                     os.remove(file_path)
@@ -346,6 +405,8 @@ print("[ASR] Hammerspoon热键脚本已加载")
                 
                 # 添加进程运行状态
                 status_data['hammerspoon_running'] = True
+                status_data['channel'] = self.channel
+                status_data['event_latency_ms'] = self.last_event_latency_ms
                 return status_data
             else:
                 return {
@@ -404,35 +465,183 @@ print("[ASR] Hammerspoon热键脚本已加载")
         self.start_listening()
     
     def _send_config_command(self, config: Dict[str, Any]) -> bool:
-        """发送配置命令到Hammerspoon"""
+        """发送配置命令到Hammerspoon（优先通过已连接的socket，否则写配置文件）"""
+        message = json.dumps(config).encode('utf-8') + b'\n'
+        with self._connections_lock:
+            connections = list(self._connections)
+        sent = False
+        for conn in connections:
+            try:
+                conn.sendall(message)
+                sent = True
+            except OSError as e:
+                self.logger.warning(f"通过socket发送配置命令失败: {e}")
+        if sent:
+            return True
+        
         try:
-            config_file = '/tmp/asr_hotkey_config.json'
-            with open(config_file, 'w') as f:
+            with open(self.config_file, 'w') as f:
                 json.dump(config, f)
             return True
         except Exception as e:
             self.logger.error(f"发送配置命令失败: {e}")
             return False
     
+    def _open_event_socket(self) -> bool:
+        """创建事件socket，失败时使用文件通道"""
+        if self._server_socket is not None:
+            return True
+        server = None
+        try:
+            if os.path.exists(self.event_socket_path):
+                os.remove(self.event_socket_path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(self.event_socket_path)
+            os.chmod(self.event_socket_path, 0o600)
+            server.listen(4)
+            server.setblocking(False)
+        except (OSError, AttributeError) as e:
+            # AttributeError：平台不支持 AF_UNIX
+            self.logger.warning(f"创建热键事件socket失败，使用文件通道: {e}")
+            if server is not None:
+                server.close()
+            return False
+        self._server_socket = server
+        self._wakeup_pipe = os.pipe()
+        return True
+    
+    def _close_event_socket(self) -> None:
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        if self._server_socket is not None:
+            self._server_socket.close()
+            self._server_socket = None
+            try:
+                os.remove(self.event_socket_path)
+            except OSError:
+                pass
+        if self._wakeup_pipe is not None:
+            for fd in self._wakeup_pipe:
+                os.close(fd)
+            self._wakeup_pipe = None
+    
+    def _start_monitoring(self) -> None:
+        """启动监控线程：有socket时阻塞等待socket事件，否则轮询通信文件"""
+        self.should_stop_monitoring = False
+        if self._server_socket is not None:
+            self.channel = 'socket'
+            target = self._monitor_socket
+        else:
+            self.channel = 'file'
+            target = self._monitor_communication
+        self.monitoring_thread = threading.Thread(target=target, name='HammerspoonEvents', daemon=True)
+        self.monitoring_thread.start()
+    
+    def _stop_monitoring(self) -> None:
+        self.should_stop_monitoring = True
+        if self._wakeup_pipe is not None:
+            os.write(self._wakeup_pipe[1], b'x')
+        if self.monitoring_thread and self.monitoring_thread.is_alive():
+            self.monitoring_thread.join(timeout=2)
+        self._close_event_socket()
+    
+    def _handle_event(self, data: Dict[str, Any]) -> None:
+        """处理一条热键事件"""
+        timestamp = data.get('timestamp', 0)
+        # Lua 端发送的是秒级 epoch 时间（带小数），用于统计通道延迟
+        if isinstance(timestamp, float):
+            self.last_event_latency_ms = round((time.time() - timestamp) * 1000, 2)
+        
+        action = data.get('action')
+        if action == 'press' and self.press_callback:
+            self.press_callback()
+        elif action == 'release' and self.release_callback:
+            self.release_callback()
+    
+    def _monitor_socket(self) -> None:
+        """阻塞等待socket上的热键事件（每行一个JSON）"""
+        selector = selectors.DefaultSelector()
+        selector.register(self._server_socket, selectors.EVENT_READ, 'accept')
+        selector.register(self._wakeup_pipe[0], selectors.EVENT_READ, 'wakeup')
+        try:
+            while not self.should_stop_monitoring:
+                for key, _ in selector.select():
+                    if key.data == 'wakeup':
+                        os.read(key.fd, 64)
+                    elif key.data == 'accept':
+                        try:
+                            conn, _ = self._server_socket.accept()
+                        except BlockingIOError:
+                            continue
+                        conn.setblocking(False)
+                        with self._connections_lock:
+                            self._connections[conn] = b''
+                        selector.register(conn, selectors.EVENT_READ, 'event')
+                        self.logger.info("Hammerspoon已连接热键事件socket")
+                    else:
+                        self._read_events(selector, key.fileobj)
+        except Exception as e:
+            self.logger.error(f"监控热键事件socket失败: {e}")
+        finally:
+            selector.close()
+    
+    def _read_events(self, selector, conn) -> None:
+        try:
+            data = conn.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        
+        with self._connections_lock:
+            if not data:
+                selector.unregister(conn)
+                self._connections.pop(conn, None)
+                conn.close()
+                self.logger.info("Hammerspoon断开了热键事件socket")
+                return
+            *lines, rest = (self._connections.get(conn, b'') + data).split(b'\n')
+            self._connections[conn] = rest
+        
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                self._handle_event(json.loads(line))
+            except Exception as e:
+                self.logger.error(f"处理热键事件失败: {e}")
+    
+    @staticmethod
+    def _event_marker(data: Dict[str, Any]):
+        return data.get('seq'), data.get('timestamp', 0)
+    
+    def _read_communication_file(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.communication_file):
+            return None
+        with open(self.communication_file, 'r') as f:
+            return json.load(f)
+    
     def _monitor_communication(self) -> None:
-        """监控通信文件，处理热键事件"""
-        last_timestamp = 0
+        """监控通信文件，处理热键事件（socket不可用时的后备方式）"""
+        # 启动前已存在的文件是上一次运行留下的，不处理
+        try:
+            data = self._read_communication_file()
+            last_marker = self._event_marker(data) if data else None
+        except Exception:
+            last_marker = None
         
         while not self.should_stop_monitoring:
             try:
-                if os.path.exists(self.communication_file):
-                    with open(self.communication_file, 'r') as f:
-                        data = json.load(f)
-                    
-                    timestamp = data.get('timestamp', 0)
-                    if timestamp > last_timestamp:
-                        last_timestamp = timestamp
-                        action = data.get('action')
-                        
-                        if action == 'press' and self.press_callback:
-                            self.press_callback()
-                        elif action == 'release' and self.release_callback:
-                            self.release_callback()
+                data = self._read_communication_file()
+                if data:
+                    # 用序号区分事件，同一秒内的按下和释放也不会漏掉
+                    marker = self._event_marker(data)
+                    if marker != last_marker:
+                        last_marker = marker
+                        self._handle_event(data)
                 
                 time.sleep(0.1)  # 100ms检查间隔
                 
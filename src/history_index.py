@@ -0,0 +1,180 @@
+"""
+历史记录子串搜索的 n-gram 倒排索引
+
+文本先做 NFKC 规范化并转小写，再切分为连续的中日韩字符段和字母数字段：
+- 中日韩字符段取相邻两个字（bigram），中文常用词大多是两个字
+- 字母数字段取相邻三个字符（trigram），英文的 bigram 太常见，区分度低
+
+查询串按同样的方式切分，取所有 n-gram 倒排列表中最短的一个作为候选，
+再用 `in` 在规范化文本上核对，结果与逐条扫描完全一致。
+查询中没有完整 n-gram 时（例如单个汉字、两个字母）退回逐条扫描。
+
+记录 id 递增，倒排列表用 array 按 id 升序追加，新记录的加入是增量的。
+索引可以保存为紧凑的二进制快照，启动时读取快照后只补上快照之后新增的记录。
+"""
+
+import json
+import logging
+import os
+import re
+import struct
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 假名、CJK 统一汉字（含扩展 A）、兼容汉字、韩文音节
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_RUNS = re.compile(f'([{_CJK}]+)|([^\\W_{_CJK}]+)')
+
+SNAPSHOT_MAGIC = b'HSIDX1\n'
+_LENGTH = struct.Struct('<Q')
+
+
+def normalize(text: str) -> str:
+    """搜索用的规范化：NFKC（全角转半角等）+ 小写"""
+    return unicodedata.normalize('NFKC', text or '').lower().replace('\x00', '')
+
+
+def grams(text: str) -> set:
+    """规范化文本的 n-gram 集合"""
+    result = set()
+    for cjk, word in _RUNS.findall(text):
+        if cjk:
+            result.update(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        elif len(word) >= 3:
+            result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+class HistorySearchIndex:
+    """历史记录的 n-gram 倒排索引（非线程安全，在界面线程中使用）"""
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        self._texts: Dict[int, str] = {}
+        self.last_id = 0
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, entry_id: int, text: str) -> None:
+        """加入一条记录（id 需要大于已有记录）"""
+        normalized = normalize(text)
+        self._texts[entry_id] = normalized
+        postings = self._postings
+        for gram in grams(normalized):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('I')
+            posting.append(entry_id)
+        if entry_id > self.last_id:
+            self.last_id = entry_id
+
+    def add_many(self, rows: Iterable[Tuple[int, str]]) -> int:
+        count = 0
+        for entry_id, text in rows:
+            self.add(entry_id, text)
+            count += 1
+        return count
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._texts.clear()
+        self.last_id = 0
+
+    def search(self, query: str, limit: int = 50) -> List[int]:
+        """返回包含 query 的记录 id（新的在前），最多 limit 条"""
+        needle = normalize(query).strip()
+        if not needle:
+            return []
+        texts = self._texts
+        query_grams = grams(needle)
+        if query_grams:
+            postings = []
+            for gram in query_grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    return []  # 有一个 n-gram 从未出现过
+                postings.append(posting)
+            candidates = reversed(min(postings, key=len))
+        else:
+            candidates = reversed(texts)  # 记录按 id 升序加入
+
+        results = []
+        for entry_id in candidates:
+            if needle in texts[entry_id]:
+                results.append(entry_id)
+                if len(results) >= limit:
+                    break
+        return results
+
+    # ---- 快照 ----
+
+    def save(self, path: str) -> None:
+        """保存二进制快照（先写临时文件再替换）"""
+        ids = array('I', self._texts.keys())
+        gram_list = list(self._postings)
+        counts = array('I', (len(self._postings[gram]) for gram in gram_list))
+        flat = array('I')
+        for gram in gram_list:
+            flat.extend(self._postings[gram])
+        header = json.dumps({'last_id': self.last_id, 'count': len(ids),
+                             'grams': len(gram_list), 'itemsize': ids.itemsize}).encode('utf-8')
+        blocks = [
+            header,
+            ids.tobytes(),
+            '\x00'.join(self._texts.values()).encode('utf-8'),
+            '\x00'.join(gram_list).encode('utf-8'),
+            counts.tobytes(),
+            flat.tobytes(),
+        ]
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            for block in blocks:
+                f.write(_LENGTH.pack(len(block)))
+                f.write(block)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['HistorySearchIndex']:
+        """读取快照，文件不存在或格式不对时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if not data.startswith(SNAPSHOT_MAGIC):
+                return None
+            blocks = []
+            offset = len(SNAPSHOT_MAGIC)
+            for _ in range(6):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                offset += _LENGTH.size
+                blocks.append(data[offset:offset + length])
+                offset += length
+            header = json.loads(blocks[0].decode('utf-8'))
+            if header.get('itemsize') != array('I').itemsize:
+                return None
+
+            index = cls()
+            ids = array('I')
+            ids.frombytes(blocks[1])
+            texts = blocks[2].decode('utf-8').split('\x00') if ids else []
+            gram_list = blocks[3].decode('utf-8').split('\x00') if header['grams'] else []
+            counts = array('I')
+            counts.frombytes(blocks[4])
+            flat = array('I')
+            flat.frombytes(blocks[5])
+            if len(texts) != len(ids) or len(gram_list) != len(counts) or sum(counts) != len(flat):
+                return None
+
+            index._texts = dict(zip(ids, texts))
+            position = 0
+            postings = index._postings
+            for gram, count in zip(gram_list, counts):
+                postings[gram] = flat[position:position + count]
+                position += count
+            index.last_id = header['last_id']
+            return index
+        except Exception as e:
+            logging.error(f"读取历史记录索引快照失败: {e}")
+            return None
@@ -0,0 +1,165 @@
+"""
+历史记录存储（SQLite，WAL 模式）
+
+每条识别结果追加一行，不再整体重写文件，也不再限制保存的条数。
+界面启动时只按页读取最近的记录；id 递增即为添加顺序，timestamp 建有索引，可以按时间范围查询。
+
+首次打开时自动把旧的 history.json 导入数据库，导入记录在 meta 表中，之后不再导入；原文件保持不变。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+
+class HistoryStore:
+    """SQLite 历史记录存储
+
+    Args:
+        db_path: 数据库文件路径
+        json_path: 旧的 history.json 路径，存在且尚未导入时导入一次
+    """
+
+    def __init__(self, db_path: str, json_path: Optional[str] = None):
+        self.db_path = db_path
+        self.logger = logging.getLogger('HistoryStore')
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 界面线程和其他线程都可能写入，由 _lock 串行化
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        if json_path:
+            self.migrate_from_json(json_path)
+
+    def append(self, text: str, timestamp: Optional[str] = None) -> int:
+        """追加一条记录，返回记录 id"""
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO history (text, timestamp) VALUES (?, ?)', (text, timestamp))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM history').fetchone()[0]
+
+    def latest(self, limit: int, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """读取一页记录（旧的在前）：最近的 limit 条，或 id 小于 before_id 的 limit 条"""
+        with self._lock:
+            if before_id is None:
+                rows = self._conn.execute(
+                    'SELECT id, text, timestamp FROM history ORDER BY id DESC LIMIT ?',
+                    (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    'SELECT id, text, timestamp FROM history WHERE id < ? ORDER BY id DESC LIMIT ?',
+                    (before_id, limit)).fetchall()
+        return [{'id': row[0], 'text': row[1], 'timestamp': row[2]} for row in reversed(rows)]
+
+    def get_many(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """按 id 读取记录，顺序与 ids 相同（不存在的 id 跳过）"""
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT id, text, timestamp FROM history WHERE id IN ({placeholders})',
+                list(ids)).fetchall()
+        by_id = {row[0]: {'id': row[0], 'text': row[1], 'timestamp': row[2]} for row in rows}
+        return [by_id[entry_id] for entry_id in ids if entry_id in by_id]
+
+    def texts_after(self, after_id: int) -> List[Tuple[int, str]]:
+        """读取 id 大于 after_id 的 (id, text)，按 id 升序，供搜索索引增量更新"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT id, text FROM history WHERE id > ? ORDER BY id', (after_id,)).fetchall()
+
+    def max_id(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM history').fetchone()[0]
+
+    def between(self, start: str, end: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        """按时间范围读取记录（ISO 格式时间戳，包含 start，不包含 end）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, text, timestamp FROM history WHERE timestamp >= ? AND timestamp < ? '
+                'ORDER BY timestamp LIMIT ?', (start, end, limit)).fetchall()
+        return [{'id': row[0], 'text': row[1], 'timestamp': row[2]} for row in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM history')
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception as e:
+                self.logger.error(f"关闭历史记录数据库失败: {e}")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """把旧的 history.json 导入数据库（只执行一次），返回导入的条数"""
+        with self._lock:
+            if self._get_meta('migrated_json') or not os.path.exists(json_path):
+                return 0
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+                history_data = json.loads(content) if content else []
+            except json.JSONDecodeError as e:
+                self.logger.error(f"历史记录文件格式错误，跳过导入: {e}")
+                history_data = []
+            except Exception as e:
+                self.logger.error(f"读取历史记录文件失败: {e}")
+                return 0
+
+            rows = []
+            for entry in history_data:
+                if isinstance(entry, dict) and entry.get('text'):
+                    rows.append((entry['text'], entry.get('timestamp') or ''))
+                elif isinstance(entry, str) and entry:
+                    # 兼容旧格式
+                    rows.append((entry, ''))
+            # 按时间戳排序（最新的在后），没有时间戳的保持原顺序
+            if rows and all(timestamp for _, timestamp in rows):
+                rows.sort(key=lambda row: row[1])
+
+            try:
+                with self._conn:
+                    self._conn.executemany('INSERT INTO history (text, timestamp) VALUES (?, ?)', rows)
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)",
+                                       (datetime.now().isoformat(),))
+            except Exception as e:
+                self.logger.error(f"导入历史记录失败: {e}")
+                return 0
+            self.logger.info(f"已从 {json_path} 导入 {len(rows)} 条历史记录")
+            return len(rows)
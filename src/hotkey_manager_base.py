@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+from functools import wraps
 from typing import Callable, Optional, Dict, Any
 import logging
 
+try:
+    from utils.tracing import tracer
+except ImportError:
+    from src.utils.tracing import tracer
+
 class HotkeyManagerBase(ABC):
     """热键管理器基类，定义统一的接口"""
     
@@ -14,12 +20,27 @@ class HotkeyManagerBase(ABC):
         self.is_active = False
     
     def set_press_callback(self, callback: Callable) -> None:
-        """设置按键按下回调函数"""
-        self.press_callback = callback
+        """设置按键按下回调函数（每次按下开始一次新的延迟追踪）"""
+        self.press_callback = self._traced_callback(callback, 'hotkey.press', begin=True)
     
     def set_release_callback(self, callback: Callable) -> None:
         """设置按键释放回调函数"""
-        self.release_callback = callback
+        self.release_callback = self._traced_callback(callback, 'hotkey.release')
+
+    def _traced_callback(self, callback: Optional[Callable], name: str, begin: bool = False) -> Optional[Callable]:
+        """包装热键回调，记录回调本身的耗时"""
+        if callback is None:
+            return None
+
+        @wraps(callback)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return callback(*args, **kwargs)
+            if begin:
+                tracer.begin_utterance(hotkey=self.hotkey_type, scheme=self.get_scheme_name())
+            with tracer.span(name):
+                return callback(*args, **kwargs)
+        return wrapper
     
     @abstractmethod
     def start_listening(self) -> bool:
@@ -0,0 +1,257 @@
+"""
+事件驱动的热键状态机
+
+与 pynput / Quartz 无关：按键事件源（见 KeyEventSource）把规范化后的按键名
+（'fn'、'ctrl'、'alt'、'cmd'、'shift'、字母等）通过 feed() 送进来，
+状态机在自己的一个线程里按顺序处理事件和定时器，不需要锁保护状态，也没有轮询：
+线程只在有事件到达或定时器到期时被唤醒。
+
+状态：
+    idle       空闲
+    armed      热键已按下，等待启动延迟（期间按下其他键视为组合键，放弃录音）
+    recording  正在录音，松开热键或按下其他键时结束
+
+启动延迟和组合键的宽限期（其他键松开后一小段时间内仍视为按住）都用同一个时间轮实现。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+try:
+    from utils.timer_wheel import TimerWheel
+except ImportError:
+    from src.utils.timer_wheel import TimerWheel
+
+IDLE = 'idle'
+ARMED = 'armed'
+RECORDING = 'recording'
+
+
+class KeyEventSource:
+    """按键事件源接口
+
+    start(sink) 后在任意线程调用 sink(kind, key)，kind 为 'down' 或 'up'。
+    """
+
+    def start(self, sink) -> bool:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def is_running(self) -> bool:
+        return False
+
+
+class HotkeyStateMachine:
+    """热键状态机
+
+    Args:
+        hotkey: 热键名称
+        start_delay: 按下热键到开始录音的延迟（秒），0 表示立即开始
+        combo_grace: 其他键松开后仍视为按住的时间（秒）
+        stale_after: 超过这么久没有按键事件时，清除残留的按住记录（秒）
+    """
+
+    def __init__(self, hotkey='fn', start_delay=0.0, combo_grace=0.05, stale_after=5.0,
+                 clock=time.monotonic):
+        self.hotkey = hotkey
+        self.start_delay = start_delay
+        self.combo_grace = combo_grace
+        self.stale_after = stale_after
+        self.clock = clock
+        self.on_press = None
+        self.on_release = None
+        self.logger = logging.getLogger('HotkeyStateMachine')
+
+        self.state = IDLE
+        self.hotkey_down = False
+        self.held = set()        # 按住的其他键
+        self._releasing = {}     # 宽限期内的其他键 -> 定时器 id
+        self._arm_timer = None
+        self._last_event = 0.0
+        self.wheel = TimerWheel(clock=clock)
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.stats = {'events': 0, 'wakeups': 0, 'timers': 0}
+
+    # ---- 线程 ----
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='HotkeyStateMachine', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def feed(self, kind, key):
+        """事件源调用：送入一个按键事件（线程安全）"""
+        self._post(kind, key)
+
+    def reset(self):
+        """清除全部状态（不触发回调）"""
+        self._post('reset', None)
+
+    def configure(self, hotkey=None, start_delay=None):
+        """修改热键或启动延迟，同时清除当前状态"""
+        self._post('configure', (hotkey, start_delay))
+
+    def _post(self, kind, payload):
+        with self._cond:
+            if not self._running:
+                # 线程未运行时直接处理（测试和停止后的重置）
+                self.process(kind, payload)
+                return
+            self._queue.append((kind, payload))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and not self._queue:
+                    timeout = self.wheel.next_timeout()
+                    if timeout is None or timeout > 0:
+                        self._cond.wait(timeout)
+                        self.stats['wakeups'] += 1
+                if not self._running:
+                    break
+                events = list(self._queue)
+                self._queue.clear()
+            for kind, payload in events:
+                self.process(kind, payload)
+            self.stats['timers'] += self.wheel.advance()
+
+    # ---- 状态转换 ----
+
+    def process(self, kind, payload):
+        """处理一个事件（只在状态机线程中调用，或线程未运行时直接调用）"""
+        try:
+            if kind == 'down':
+                self.stats['events'] += 1
+                self._on_down(payload)
+            elif kind == 'up':
+                self.stats['events'] += 1
+                self._on_up(payload)
+            elif kind == 'reset':
+                self._reset()
+            elif kind == 'configure':
+                hotkey, start_delay = payload
+                self._reset()
+                if hotkey is not None:
+                    self.hotkey = hotkey
+                if start_delay is not None:
+                    self.start_delay = start_delay
+        except Exception as e:
+            self.logger.error(f"处理热键事件失败: {e}")
+
+    def _on_down(self, key):
+        now = self.clock()
+        if self.held and now - self._last_event > self.stale_after:
+            # 长时间没有事件，之前的按住记录可能丢了松开事件
+            self._clear_held()
+        self._last_event = now
+
+        if key == self.hotkey:
+            if self.hotkey_down:
+                return  # 按住时的自动重复
+            self.hotkey_down = True
+            if self.state != IDLE:
+                return
+            if self.start_delay > 0:
+                self.state = ARMED
+                self._arm_timer = self.wheel.schedule(self.start_delay, self._on_arm_timeout)
+            elif not self.held:
+                self._start_recording()
+            return
+
+        # 其他键：组合键
+        timer = self._releasing.pop(key, None)
+        if timer is not None:
+            self.wheel.cancel(timer)
+        if key in self.held:
+            return
+        self.held.add(key)
+        if self.state == ARMED:
+            self._disarm()
+        elif self.state == RECORDING:
+            self._stop_recording()
+
+    def _on_up(self, key):
+        self._last_event = self.clock()
+        if key == self.hotkey:
+            if not self.hotkey_down:
+                return
+            self.hotkey_down = False
+            if self.state == ARMED:
+                self._disarm()
+            elif self.state == RECORDING:
+                self._stop_recording()
+            return
+
+        if key in self.held and key not in self._releasing:
+            self._releasing[key] = self.wheel.schedule(self.combo_grace, self._on_grace_timeout, key)
+
+    def _on_arm_timeout(self):
+        self._arm_timer = None
+        if self.state != ARMED:
+            return
+        self.state = IDLE
+        if self.hotkey_down and not self.held:
+            self._start_recording()
+
+    def _on_grace_timeout(self, key):
+        self._releasing.pop(key, None)
+        self.held.discard(key)
+
+    def _disarm(self):
+        if self._arm_timer is not None:
+            self.wheel.cancel(self._arm_timer)
+            self._arm_timer = None
+        self.state = IDLE
+
+    def _start_recording(self):
+        self.state = RECORDING
+        if self.on_press is None:
+            return
+        try:
+            self.on_press()
+        except Exception as e:
+            self.logger.error(f"按键回调执行失败: {e}")
+            self.state = IDLE
+
+    def _stop_recording(self):
+        self.state = IDLE
+        if self.on_release is None:
+            return
+        try:
+            self.on_release()
+        except Exception as e:
+            self.logger.error(f"释放回调执行失败: {e}")
+
+    def _clear_held(self):
+        for timer in self._releasing.values():
+            self.wheel.cancel(timer)
+        self._releasing.clear()
+        self.held.clear()
+
+    def _reset(self):
+        self._disarm()
+        self._clear_held()
+        self.hotkey_down = False
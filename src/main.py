@@ -7,6 +7,19 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
+
+# 启动分析模式：python src/main.py --startup-profile [--startup-budget-ms=1500]
+# 输出导入耗时树和首次绘制时间，必须在其他导入之前安装
+startup_profiler = None
+if '--startup-profile' in sys.argv:
+    import time as _time
+    _startup_time = _time.perf_counter()
+    from utils.lazy_import import StartupProfiler
+    _budget_ms = next((float(arg.split('=', 1)[1]) for arg in sys.argv
+                       if arg.startswith('--startup-budget-ms=')), 1500)
+    startup_profiler = StartupProfiler(_startup_time, _budget_ms)
+    startup_profiler.import_profiler.install()
+
 from functools import wraps
 from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QMessageBox, QDialog
 from PyQt6.QtCore import QThread, pyqtSignal, QTimer, QMetaObject, Qt, Q_ARG, QObject, pyqtSlot
@@ -16,12 +29,11 @@ from managers.ui_manager_wrapper import UIManagerWrapper
 
 # 第四步模块化替换：使用音频管理器包装器
 from managers.audio_manager_wrapper import AudioManagerWrapper
-from funasr_engine import FunASREngine
 from clipboard_manager import ClipboardManager
 # 第二步模块化替换：使用状态管理器包装器
 from managers.state_manager_wrapper import StateManagerWrapper
 from context_manager import Context
-from audio_threads import AudioCaptureThread, TranscriptionThread
+from audio_threads import AudioCaptureThread, get_transcription_worker
 from global_hotkey import GlobalHotkeyManager
 import time
 import re
@@ -31,6 +43,7 @@ from audio_manager import AudioManager
 from config import APP_VERSION  # 从config导入版本号
 from utils.text_utils import clean_html_tags
 from utils.error_handler import handle_exceptions
+from utils.tracing import tracer
 import atexit
 import multiprocessing
 import logging
@@ -189,6 +202,12 @@ class Application(QObject):
             # 初始化设置管理器（第一步模块化替换 - 真正的减法重构）
             self.settings_manager = SettingsManagerWrapper()
             self.settings_manager.set_apply_settings_callback(self.apply_settings)
+
+            # 延迟追踪：设置中开启，或使用 --trace 启动
+            tracer.configure(
+                self.settings_manager.get_setting('tracing.enabled', False) or '--trace' in sys.argv,
+                self.settings_manager.get_setting('tracing.max_utterances', 20)
+            )
             
             # 设置应用程序属性
             if sys.platform == 'darwin':
@@ -254,6 +273,11 @@ class Application(QObject):
             # 检查权限
             check_permissions_action = tray_menu.addAction("检查权限")
             check_permissions_action.triggered.connect(self.check_permissions)
+
+            # 导出延迟追踪（仅在开启追踪时显示）
+            if tracer.enabled:
+                export_trace_action = tray_menu.addAction("导出延迟追踪")
+                export_trace_action.triggered.connect(self.export_latency_trace)
             
             # 分隔线
             tray_menu.addSeparator()
@@ -300,6 +324,8 @@ class Application(QObject):
             self.context = None  # 延迟初始化
             self.audio_manager = None  # 延迟初始化
             self.audio_capture_thread = None  # 延迟初始化
+            self.transcription_worker = None  # 常驻转写线程，首次转写时创建
+            self.streaming_job = None  # 录音期间的流式转写任务
             
             # 连接信号
             self.show_window_signal.connect(self._show_window_internal)
@@ -310,7 +336,11 @@ class Application(QObject):
             except ImportError:
                 from app_loader import LoadingSplash, AppLoader
             self.splash = LoadingSplash()
+            if startup_profiler:
+                startup_profiler.watch_first_paint(self.splash)
             self.splash.show()
+            if startup_profiler:
+                startup_profiler.mark("启动界面已显示")
 
             # 创建异步加载器
             self.app_loader = AppLoader(self, self.settings_manager)
@@ -377,6 +407,7 @@ class Application(QObject):
 
             elif component_name == 'audio_capture_thread' and component:
                 component.audio_captured.connect(self.on_audio_captured)
+                component.chunk_captured.connect(self._feed_streaming_chunk, Qt.ConnectionType.DirectConnection)
                 component.recording_stopped.connect(self.stop_recording)
 
         except Exception as e:
@@ -403,6 +434,11 @@ class Application(QObject):
             # 标记初始化完成
             self._mark_initialization_complete()
 
+            if startup_profiler:
+                startup_profiler.mark("组件加载完成，主窗口已显示")
+                startup_profiler.import_profiler.uninstall()
+                print(startup_profiler.report())
+
             pass  # 应用程序启动完成
 
         except Exception as e:
@@ -492,10 +528,17 @@ class Application(QObject):
             
 
             
+            # 流式转写任务需要先取消，转写线程才能在等待时退出
+            if getattr(self, 'streaming_job', None):
+                self.streaming_job.cancel()
+                self.streaming_job = None
+            if getattr(self, 'transcription_worker', None):
+                self.transcription_worker.stop()
+
             # 使用统一方法清理所有组件
             components_to_cleanup = [
                 ('audio_capture_thread', 'stop'),
-                ('transcription_thread', 'terminate'),
+                ('transcription_worker', 'stop'),
                 ('audio_capture', 'cleanup'),
                 ('funasr_engine', 'cleanup'),
                 ('hotkey_manager', 'cleanup'),
@@ -550,6 +593,13 @@ class Application(QObject):
             
             # 1. 立即停止录音相关操作
             self.recording = False
+
+            # 写入尚未保存的设置修改（设置是延迟写回的）
+            if hasattr(self, 'settings_manager') and self.settings_manager:
+                try:
+                    self.settings_manager.flush()
+                except Exception as e:
+                    logging.error(f"保存设置失败: {e}")
             
             # 2. 停止定时器
             if hasattr(self, 'recording_timer') and self.recording_timer:
@@ -566,12 +616,12 @@ class Application(QObject):
                 except Exception as e:
                     logging.error(f"终止音频捕获线程失败: {e}")
             
-            if hasattr(self, 'transcription_thread') and self.transcription_thread:
+            if hasattr(self, 'transcription_worker') and self.transcription_worker:
                 try:
-                    if self.transcription_thread.isRunning():
-                        self.transcription_thread.terminate()  # 直接终止，不等待
+                    # 转写线程可能正在 torch 中计算，不能强制终止；只通知它退出，不等待
+                    self.transcription_worker.stop()
                 except Exception as e:
-                    logging.error(f"终止转写线程失败: {e}")
+                    logging.error(f"停止转写线程失败: {e}")
             
             # 4. 快速清理音频资源
             if hasattr(self, 'audio_capture') and self.audio_capture:
@@ -657,6 +707,9 @@ class Application(QObject):
                         # 记住旧的线程引用
                         old_thread = self.audio_capture_thread
 
+                        # 实时显示开启时，录音期间同步进行流式转写
+                        self._start_streaming_transcription()
+
                         # 委托给音频管理器处理录音流程
                         self.previous_volume, self.audio_capture_thread = self.audio_capture.start_recording_process(
                             self.state_manager,
@@ -668,8 +721,13 @@ class Application(QObject):
                         # 只有在线程被重新创建时才重新连接信号
                         if self.audio_capture_thread and self.audio_capture_thread != old_thread:
                             self.audio_capture_thread.audio_captured.connect(self.on_audio_captured)
+                            self.audio_capture_thread.chunk_captured.connect(self._feed_streaming_chunk, Qt.ConnectionType.DirectConnection)
                             self.audio_capture_thread.recording_stopped.connect(self.stop_recording)
 
+                        # 记下按下热键时的前台应用，粘贴时切回该应用
+                        if self.clipboard_manager:
+                            self.clipboard_manager.capture_target_app()
+
                     except Exception as e:
                         error_msg = f"开始录音时出错: {str(e)}"
                         logging.error(error_msg)
@@ -715,28 +773,26 @@ class Application(QObject):
                 # 重置 previous_volume
                 self.previous_volume = None
 
+                streaming_job, self.streaming_job = self.streaming_job, None
                 if len(audio_data) > 0:
+                    if streaming_job is not None:
+                        # 录音期间已经流式解码，松开后只需解码最后一段
+                        streaming_job.finish()
+                        return
+
                     # 使用统一的状态检查方法
                     if not self.is_component_ready('funasr_engine', 'is_ready'):
                         self.update_ui_signal.emit("⚠️ 语音识别引擎尚未就绪，无法处理录音", "")
                         return
 
-                    # 清理旧的转写线程，避免信号重复连接
-                    if hasattr(self, 'transcription_thread') and self.transcription_thread:
-                        try:
-                            # 断开旧的信号连接
-                            self.transcription_thread.transcription_done.disconnect(self.on_transcription_done)
-                            # 如果线程还在运行，请求中断
-                            if self.transcription_thread.isRunning():
-                                self.transcription_thread.requestInterruption()
-                        except (TypeError, RuntimeError):
-                            # 如果没有连接或线程已销毁，忽略错误
-                            pass
-
-                    self.transcription_thread = TranscriptionThread(audio_data, self.funasr_engine)
-                    self.transcription_thread.transcription_done.connect(self.on_transcription_done)
-                    self.transcription_thread.start()
+                    # 交给常驻转写线程排队处理，结果按提交顺序返回
+                    job_id = self._get_transcription_worker().submit(audio_data)
+                    if job_id is None:
+                        self.update_ui_signal.emit("⚠️ 转写任务过多，请稍后再试", "")
                 else:
+                    if streaming_job is not None:
+                        streaming_job.cancel()
+                        self.main_window.clear_partial_result()
                     self.update_ui_signal.emit("❌ 未检测到声音", "")
             except Exception as e:
                 logging.error(f"录音失败: {e}")
@@ -747,6 +803,46 @@ class Application(QObject):
                 self._stopping_recording = False
                 logging.debug("停止录音标志已重置")
     
+    def _get_transcription_worker(self):
+        """获取常驻转写线程，首次使用时创建并连接信号"""
+        if self.transcription_worker is None:
+            max_queued_jobs = self.settings_manager.get_setting('asr.max_queued_jobs', 4)
+            worker = get_transcription_worker(self.funasr_engine, max_queued_jobs)
+            worker.partial_result.connect(self._on_worker_partial_result)
+            worker.transcription_done.connect(self._on_worker_transcription_done)
+            worker.transcription_failed.connect(self._on_worker_transcription_failed)
+            self.transcription_worker = worker
+        return self.transcription_worker
+
+    def _on_worker_partial_result(self, job_id, text):
+        self.on_partial_result(text)
+
+    def _on_worker_transcription_done(self, job_id, text):
+        self.on_transcription_done(text)
+
+    def _on_worker_transcription_failed(self, job_id, error):
+        self.on_transcription_done("转写失败，请重试")
+
+    def _start_streaming_transcription(self):
+        """向常驻转写线程提交本次录音的流式转写任务"""
+        self.streaming_job = None
+        if not self.settings_manager.get_setting('asr.real_time_display', True):
+            return
+        if not self.is_component_ready('funasr_engine', 'is_ready'):
+            return
+        # 没有加载流式模型时不做实时识别，离线模型按固定窗口切分的中间结果质量太差
+        if not hasattr(self.funasr_engine, 'supports_streaming') or not self.funasr_engine.supports_streaming():
+            return
+
+        # 队列已满时返回 None，本次录音退回到松开后整段转写
+        self.streaming_job = self._get_transcription_worker().submit_stream()
+
+    def _feed_streaming_chunk(self, data):
+        """在采集线程中直接把音频块交给流式转写任务"""
+        streaming_job = self.streaming_job
+        if streaming_job is not None:
+            streaming_job.feed(data)
+
     def _auto_stop_recording(self):
         """定时器触发的自动停止录音"""
         try:
@@ -787,9 +883,9 @@ class Application(QObject):
             if hasattr(self, 'audio_capture') and self.audio_capture:
                 self.audio_capture.clear_recording_data()
                 
-            if hasattr(self, 'transcription_thread'):
-                self.transcription_thread.quit()
-                self.transcription_thread.wait()
+            if getattr(self, 'transcription_worker', None):
+                self.transcription_worker.stop()
+                self.transcription_worker.wait()
                 
             if hasattr(self, 'hotkey_manager') and self.hotkey_manager:
                 self.hotkey_manager.stop_listening()
@@ -870,9 +966,17 @@ class Application(QObject):
         """在主线程中延迟执行粘贴操作，避免QTimer线程警告"""
         from PyQt6.QtCore import QTimer
         # 创建一个临时定时器，确保在主线程中执行
+        scheduled_ns = time.perf_counter_ns()
+        trace = tracer.current_trace
+
+        def paste():
+            tracer.add_span('paste.delay', scheduled_ns, time.perf_counter_ns(), {'delay_ms': delay}, trace)
+            with tracer.activate(trace):
+                self._paste_and_reactivate(text)
+
         timer = QTimer(self)
         timer.setSingleShot(True)
-        timer.timeout.connect(lambda: self._paste_and_reactivate(text))
+        timer.timeout.connect(paste)
         timer.start(delay)
 
     @pyqtSlot(int)
@@ -889,7 +993,8 @@ class Application(QObject):
             self.recording_timer = QTimer(self)
             self.recording_timer.setSingleShot(True)
             self.recording_timer.timeout.connect(self._auto_stop_recording)
-            self.recording_timer.start(duration_ms)
+            if duration_ms > 0:  # 长录音模式可以不限制时长
+                self.recording_timer.start(duration_ms)
 
         except Exception as e:
             self.logger.error(f"创建录音定时器失败: {e}")
@@ -918,8 +1023,13 @@ class Application(QObject):
         """执行粘贴操作并返回成功状态 - 委托给转写管理器"""
         return self.transcription_manager.paste_and_reactivate_with_feedback(self, text)
     
+    def on_partial_result(self, text):
+        """流式转写中间结果的回调"""
+        self.main_window.show_partial_result(text)
+
     def on_transcription_done(self, text):
         """转写完成的回调 - 委托给转写管理器"""
+        self.main_window.clear_partial_result()
         self.transcription_manager.on_transcription_done(self, text)
     
     def on_history_item_clicked(self, text):
@@ -994,6 +1104,18 @@ class Application(QObject):
         """检查应用权限状态 - 委托给权限管理器"""
         self.permission_manager.check_permissions(self)
 
+    def export_latency_trace(self):
+        """导出最近几次语音输入的延迟追踪（Chrome trace JSON，可在 ui.perfetto.dev 中打开）"""
+        try:
+            export_dir = self.settings_manager.get_setting('tracing.export_dir', '') or 'traces'
+            path = os.path.abspath(os.path.join(export_dir, f"latency_{datetime.now():%Y%m%d_%H%M%S}.json"))
+            tracer.export_chrome_trace(path)
+            for summary in tracer.get_summary():
+                logging.info(f"语音输入 #{summary['index']}: {summary['total_ms']}ms {summary['spans']}")
+            self.tray_icon.showMessage("延迟追踪已导出", path)
+        except Exception as e:
+            logging.error(f"导出延迟追踪失败: {e}")
+
     # handle_mac_events方法已被eventFilter替代
 
     def show_settings(self):
@@ -1068,8 +1190,17 @@ class Application(QObject):
                 if hasattr(self, 'audio_capture') and self.audio_capture:
                     volume_threshold = self.settings_manager.get_setting('audio.volume_threshold')
                     self.audio_capture.set_volume_threshold(volume_threshold)
+                    self.audio_capture.apply_capture_settings(self.settings_manager)
             except Exception as e:
                 logging.error(f"应用音频设置失败: {e}")
+
+            # 应用粘贴设置
+            try:
+                if self.clipboard_manager:
+                    self.clipboard_manager.configure(
+                        verify_copy=self.settings_manager.get_setting('paste.verify_copy', False))
+            except Exception as e:
+                logging.error(f"应用粘贴设置失败: {e}")
             
             # 应用ASR设置（如果语音识别引擎已初始化）
             try:
@@ -1125,6 +1256,9 @@ if __name__ == "__main__":
     # 设置全局异常处理器
     sys.excepthook = global_exception_handler
     
+    if startup_profiler:
+        startup_profiler.mark("模块导入完成")
+
     try:
         app = Application()
         sys.exit(app.run())
@@ -12,6 +12,11 @@ from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 
 from .component_manager import ComponentManager
 
+try:
+    from utils.side_effects import VolumeController
+except ImportError:
+    from src.utils.side_effects import VolumeController
+
 class AudioManager(QObject):
     """音频管理器 - 专门负责音频相关操作"""
 
@@ -35,11 +40,13 @@ class AudioManager(QObject):
         self.audio_capture = None
         self.funasr_engine = None
         self.audio_capture_thread = None
-        self.transcription_thread = None
+        self.transcription_worker = None  # 与引擎绑定的常驻转写线程
+        self._transcription_jobs = set()  # 本管理器提交、尚未返回的任务
         
         # 状态管理
         self.recording = False
-        self.previous_volume = None
+        self.previous_volume = None  # VolumeToken
+        self.volume_controller = VolumeController()
         self._recording_lock = threading.RLock()
         
         # 定时器
@@ -274,17 +281,6 @@ class AudioManager(QObject):
                     self.recording = True
 
                     try:
-                        # 先播放音效，让用户立即听到反馈（与原始代码一致）
-                        if (self.app_context and
-                            hasattr(self.app_context, 'state_manager') and
-                            self.app_context.state_manager):
-                            self.app_context.state_manager.start_recording()
-
-                        # 然后保存当前音量并静音系统（与原始代码一致）
-                        self.previous_volume = self._get_system_volume()
-                        if self.previous_volume is not None:
-                            self._set_system_volume(None)  # 静音
-
                         # 重新初始化录音线程（如果之前已经使用过）（与原始代码一致）
                         if self.audio_capture_thread and self.audio_capture_thread.isFinished():
                             from audio_threads import AudioCaptureThread
@@ -298,9 +294,18 @@ class AudioManager(QObject):
                             self.audio_capture_thread.audio_captured.connect(self.on_audio_captured)
                             self.audio_capture_thread.recording_stopped.connect(self.stop_recording)
 
-                        # 启动录音线程（与原始代码一致）
+                        # 先启动录音线程，音效和静音都不占用开始录音的时间
                         self.audio_capture_thread.start()
 
+                        # 播放音效（QSoundEffect 需要在主线程中调用，play() 本身不阻塞）
+                        if (self.app_context and
+                            hasattr(self.app_context, 'state_manager') and
+                            self.app_context.state_manager):
+                            self.app_context.state_manager.start_recording()
+
+                        # 保存当前音量并静音系统：在副作用线程中执行，与采集并行
+                        self.previous_volume = self.volume_controller.mute()
+
                         # 从设置中获取录音时长并设置定时器，自动停止录音（与原始代码一致）
                         if hasattr(self, 'recording_timer') and self.recording_timer:
                             self.recording_timer.stop()
@@ -314,13 +319,14 @@ class AudioManager(QObject):
 
                         max_duration = 10  # 默认值
                         if settings_manager:
-                            max_duration = settings_manager.get_setting('audio.max_recording_duration', 10)
+                            max_duration = settings_manager.get_max_recording_duration()
 
                         from PyQt6.QtCore import QTimer
                         self.recording_timer = QTimer(self)  # 指定父对象
                         self.recording_timer.setSingleShot(True)
                         self.recording_timer.timeout.connect(self._auto_stop_recording)
-                        self.recording_timer.start(max_duration * 1000)  # 转换为毫秒
+                        if max_duration > 0:  # 长录音模式可以不限制时长
+                            self.recording_timer.start(max_duration * 1000)  # 转换为毫秒
 
                         self.logger.info("录音已开始")
                         return True
@@ -341,55 +347,13 @@ class AudioManager(QObject):
                 return False
 
     def _get_system_volume(self):
-        """获取当前系统音量（与原始代码一致）"""
-        try:
-            import subprocess
-            # 获取完整的音量设置
-            result = subprocess.run([
-                'osascript',
-                '-e', 'get volume settings'
-            ], capture_output=True, text=True, check=True)
-
-            settings = result.stdout.strip()
-            # 解析输出，格式类似：output volume:50, input volume:75, alert volume:75, output muted:false
-            volume_str = settings.split(',')[0].split(':')[1].strip()
-            muted = "output muted:true" in settings
-
-            if muted:
-                return 0
-
-            volume = int(volume_str)
-            return volume
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"获取系统音量失败: {e}")
-            return None
-        except Exception as e:
-            self.logger.error(f"获取系统音量时发生错误: {e}")
-            return None
+        """获取当前系统音量（同步调用 osascript）"""
+        return self.volume_controller.backend.get_volume()
 
     def _set_system_volume(self, volume):
-        """设置系统音量（与原始代码一致）
+        """设置系统音量并等待完成
         volume: 0-100 的整数，或者 None 表示静音"""
-        try:
-            import subprocess
-            if volume is None:
-                # 直接静音，不检查当前状态以减少延迟
-                subprocess.run([
-                    'osascript',
-                    '-e', 'set volume output muted true'
-                ], check=True)
-            else:
-                # 设置音量并取消静音
-                volume = max(0, min(100, volume))  # 确保音量在 0-100 范围内
-                subprocess.run([
-                    'osascript',
-                    '-e', f'set volume output volume {volume}',
-                    '-e', 'set volume output muted false'
-                ], check=True)
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"设置系统音量失败: {e}")
-        except Exception as e:
-            self.logger.error(f"设置系统音量时发生错误: {e}")
+        self.volume_controller.set_volume(volume, wait=True)
 
     def on_audio_captured(self, data):
         """音频数据捕获回调（与原始代码一致）"""
@@ -491,20 +455,17 @@ class AudioManager(QObject):
             self.logger.error(f"停止音频捕获线程失败: {e}")
     
     def _save_system_volume(self):
-        """保存当前系统音量"""
+        """保存当前系统音量并静音（在副作用线程中执行）"""
         try:
-            # 这里应该实现获取系统音量的逻辑
-            # self.previous_volume = get_system_volume()
-            pass
+            self.previous_volume = self.volume_controller.mute()
         except Exception as e:
             self.logger.error(f"保存系统音量失败: {e}")
     
     def _restore_system_volume(self):
-        """恢复系统音量"""
+        """恢复系统音量（在副作用线程中执行，排在静音之后）"""
         try:
             if self.previous_volume is not None:
-                # 这里应该实现设置系统音量的逻辑
-                # set_system_volume(self.previous_volume)
+                self.volume_controller.restore(self.previous_volume)
                 self.previous_volume = None
         except Exception as e:
             self.logger.error(f"恢复系统音量失败: {e}")
@@ -558,65 +519,38 @@ class AudioManager(QObject):
             self.logger.error(f"处理录音停止信号失败: {e}")
     
     def _start_transcription(self, audio_data):
-        """启动转写"""
+        """启动转写 - 提交到常驻转写线程排队处理"""
         try:
-            from PyQt6.QtCore import QThread
-            
-            class TranscriptionThread(QThread):
-                transcription_completed = pyqtSignal(str, str)
-                transcription_error = pyqtSignal(str)
-                
-                def __init__(self, funasr_engine, audio_data):
-                    super().__init__()
-                    self.funasr_engine = funasr_engine
-                    self.audio_data = audio_data
-                
-                def run(self):
-                    try:
-                        # 检查是否被中断
-                        if self.isInterruptionRequested():
-                            return
-                            
-                        if self.funasr_engine:
-                            result = self.funasr_engine.transcribe(self.audio_data)
-                            
-                            # 再次检查是否被中断
-                            if self.isInterruptionRequested():
-                                return
-                                
-                            if result:
-                                # 处理不同类型的结果
-                                if isinstance(result, list) and len(result) > 0:
-                                    first_result = result[0]
-                                    if isinstance(first_result, dict):
-                                        text = first_result.get('text', '')
-                                        language = first_result.get('language', 'zh')
-                                    else:
-                                        text = str(first_result)
-                                        language = 'zh'
-                                elif isinstance(result, dict):
-                                    text = result.get('text', '')
-                                    language = result.get('language', 'zh')
-                                else:
-                                    text = str(result)
-                                    language = 'zh'
-
-                                # 最后检查是否被中断
-                                if not self.isInterruptionRequested():
-                                    self.transcription_completed.emit(text, language)
-                    except Exception as e:
-                        if not self.isInterruptionRequested():
-                            self.transcription_error.emit(str(e))
-            
-            self.transcription_thread = TranscriptionThread(self.funasr_engine, audio_data)
-            self.transcription_thread.transcription_completed.connect(self._on_transcription_completed)
-            self.transcription_thread.transcription_error.connect(self._on_transcription_error)
-            self.transcription_thread.start()
+            if self.transcription_worker is None:
+                from audio_threads import get_transcription_worker
+                max_queued_jobs = 4
+                if self.app_context and getattr(self.app_context, 'settings_manager', None):
+                    max_queued_jobs = self.app_context.settings_manager.get_setting('asr.max_queued_jobs', 4)
+                self.transcription_worker = get_transcription_worker(self.funasr_engine, max_queued_jobs)
+                self.transcription_worker.transcription_done.connect(self._on_worker_transcription_done)
+                self.transcription_worker.transcription_failed.connect(self._on_worker_transcription_failed)
+
+            job_id = self.transcription_worker.submit(audio_data)
+            if job_id is None:
+                self._handle_audio_error("转写任务过多，请稍后再试")
+                return
+            self._transcription_jobs.add(job_id)
             
         except Exception as e:
             self.logger.error(f"启动转写失败: {e}")
             self._handle_audio_error(f"启动转写失败: {e}")
     
+    def _on_worker_transcription_done(self, job_id: int, text: str):
+        """转写线程完成任务，只处理本管理器提交的任务"""
+        if job_id in self._transcription_jobs:
+            self._transcription_jobs.discard(job_id)
+            self._on_transcription_completed(text, 'zh')
+    
+    def _on_worker_transcription_failed(self, job_id: int, error_message: str):
+        if job_id in self._transcription_jobs:
+            self._transcription_jobs.discard(job_id)
+            self._on_transcription_error(error_message)
+    
     def _on_transcription_completed(self, text: str, language: str):
         """处理转写完成"""
         try:
@@ -682,23 +616,25 @@ class AudioManager(QObject):
                 self.recording_timer.stop()
                 self.recording_timer = None
             
-            # 清理转写线程
-            if self.transcription_thread and self.transcription_thread.isRunning():
-                # 先尝试优雅退出
-                self.transcription_thread.requestInterruption()
-                self.transcription_thread.quit()
-                
-                # 等待线程结束
-                if not self.transcription_thread.wait(3000):  # 等待3秒
-                    self.logger.warning("转写线程未能在3秒内退出，强制终止")
-                    self.transcription_thread.terminate()
-                    self.transcription_thread.wait(1000)  # 再等待1秒
-                
-                self.transcription_thread = None
+            # 转写线程与引擎绑定、由各入口共用，这里只取消本管理器的任务并断开信号，
+            # 线程由持有引擎的主程序停止
+            if self.transcription_worker:
+                for job_id in list(self._transcription_jobs):
+                    self.transcription_worker.cancel(job_id)
+                self._transcription_jobs.clear()
+                try:
+                    self.transcription_worker.transcription_done.disconnect(self._on_worker_transcription_done)
+                    self.transcription_worker.transcription_failed.disconnect(self._on_worker_transcription_failed)
+                except (TypeError, RuntimeError):
+                    pass
+                self.transcription_worker = None
             
             # 清理音频捕获线程
             self._stop_audio_capture_thread()
             self.audio_capture_thread = None
+
+            # 等待恢复音量等副作用执行完
+            self.volume_controller.shutdown()
             
             # 清理音频组件
             if self.audio_capture:
@@ -5,6 +5,8 @@
 
 import logging
 from audio_capture import AudioCapture as OriginalAudioCapture
+from utils.tracing import tracer
+from utils.side_effects import VolumeController, VolumeToken
 
 
 class AudioManagerWrapper:
@@ -14,6 +16,7 @@ class AudioManagerWrapper:
         self.logger = logging.getLogger(self.__class__.__name__)
         self._original_capture = None
         self._initialized = False
+        self.volume_controller = VolumeController()
         self._initialize()
     
     def _initialize(self):
@@ -121,77 +124,49 @@ class AudioManagerWrapper:
         raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
     
     def set_system_volume(self, volume):
-        """设置系统音量 - 从Application类移过来
-        volume: 0-100 的整数，或者 None 表示静音"""
-        import subprocess
+        """设置系统音量并等待完成（退出时恢复音量使用）
+        volume: 0-100 的整数、None 表示静音，或者 start_recording_process 返回的 VolumeToken"""
         import logging
         try:
-            if volume is None:
-                # 直接静音，不检查当前状态以减少延迟
-                subprocess.run([
-                    'osascript',
-                    '-e', 'set volume output muted true'
-                ], check=True)
+            if isinstance(volume, VolumeToken):
+                self.volume_controller.restore(volume).result()
             else:
-                # 设置音量并取消静音
-                volume = max(0, min(100, volume))  # 确保音量在 0-100 范围内
-                subprocess.run([
-                    'osascript',
-                    '-e', f'set volume output volume {volume}',
-                    '-e', 'set volume output muted false'
-                ], check=True)
-        except subprocess.CalledProcessError as e:
-            logging.error(f"设置系统音量失败: {e}")
+                self.volume_controller.set_volume(volume, wait=True)
         except Exception as e:
             logging.error(f"设置系统音量时发生错误: {e}")
 
     def get_system_volume(self):
-        """获取当前系统音量 - 从Application类移过来"""
-        import subprocess
-        import logging
-        try:
-            # 获取完整的音量设置
-            result = subprocess.run([
-                'osascript',
-                '-e', 'get volume settings'
-            ], capture_output=True, text=True, check=True)
-
-            settings = result.stdout.strip()
-            # 解析输出，格式类似：output volume:50, input volume:75, alert volume:75, output muted:false
-            volume_str = settings.split(',')[0].split(':')[1].strip()
-            muted = "output muted:true" in settings
-
-            if muted:
-                return 0
-
-            volume = int(volume_str)
-            return volume
-        except subprocess.CalledProcessError as e:
-            logging.error(f"获取系统音量失败: {e}")
-            return None
-        except Exception as e:
-            logging.error(f"获取系统音量时发生错误: {e}")
-            return None
+        """获取当前系统音量（同步调用 osascript）"""
+        return self.volume_controller.backend.get_volume()
 
     def restore_volume_async(self, volume):
-        """异步恢复音量 - 从Application类移过来"""
+        """在副作用线程中恢复音量，不阻塞主线程"""
         import logging
         try:
-            self.set_system_volume(volume)
+            if isinstance(volume, VolumeToken):
+                self.volume_controller.restore(volume)
+            else:
+                self.volume_controller.set_volume(volume)
         except Exception as e:
             logging.error(f"异步恢复音量失败: {e}")
 
     def start_recording_process(self, state_manager, audio_capture_thread, settings_manager, recording_timer_callback):
-        """开始录音流程 - 从Application类移过来"""
+        """开始录音流程
+
+        先启动录音线程，再播放音效；保存音量并静音交给副作用线程执行，
+        返回的 previous_volume 是一个 VolumeToken，停止录音时原样传回用于恢复音量。
+        """
         import logging
         try:
-            # 先播放音效，让用户立即听到反馈
-            state_manager.start_recording()
-
-            # 然后保存当前音量并静音系统
-            previous_volume = self.get_system_volume()
-            if previous_volume is not None:
-                self.set_system_volume(None)  # 静音
+            # 按设置配置VAD（在采集线程中标记语音段）
+            with tracer.span('capture.configure'):
+                self._ensure_initialized()
+                vad_settings = dict(settings_manager.get_setting('audio.vad', {}) or {})
+                self._original_capture.configure_vad(**vad_settings)
+                self._original_capture.capture_mode = settings_manager.get_setting('audio.capture_mode', 'callback')
+                long_dictation = dict(settings_manager.get_setting('audio.long_dictation', {}) or {})
+                long_dictation.pop('max_duration', None)
+                self._original_capture.configure_long_dictation(**long_dictation)
 
             # 初始化或重新初始化录音线程
             if audio_capture_thread is None or audio_capture_thread.isFinished():
@@ -199,12 +174,20 @@ class AudioManagerWrapper:
                 audio_capture_thread = AudioCaptureThread(self._original_capture)
                 # 返回新线程，让外部重新连接信号
 
-            # 启动录音线程
+            # 启动录音线程（音频流在线程中打开，记为 capture.open_stream）
             audio_capture_thread.start()
 
-            # 设置录音定时器
-            max_duration = settings_manager.get_setting('audio.max_recording_duration', 10)
-            recording_timer_callback(max_duration * 1000)  # 转换为毫秒
+            # 播放音效（QSoundEffect 需要在主线程中调用，play() 本身不阻塞）
+            with tracer.span('audio.start_sound'):
+                state_manager.start_recording()
+
+            # 保存当前音量并静音系统：在副作用线程中执行，与采集并行
+            previous_volume = self.volume_controller.mute()
+
+            # 设置录音定时器（长录音模式可以不限制时长）
+            max_duration = settings_manager.get_max_recording_duration()
+            if max_duration > 0:
+                recording_timer_callback(max_duration * 1000)  # 转换为毫秒
 
             return previous_volume, audio_capture_thread
 
@@ -213,17 +196,28 @@ class AudioManagerWrapper:
             logging.error(error_msg)
             raise Exception(error_msg)
 
+    def apply_capture_settings(self, settings_manager):
+        """应用采集方式和常开输入流设置（启动完成和修改设置后调用）"""
+        warm_stream = dict(settings_manager.get_setting('audio.warm_stream', {}) or {})
+        if not warm_stream.get('enabled') and not self._initialized:
+            return  # 未开启常开输入流时保持延迟初始化
+        self._ensure_initialized()
+        self._original_capture.capture_mode = settings_manager.get_setting('audio.capture_mode', 'callback')
+        self._original_capture.configure_warm_stream(**warm_stream)
+
     def stop_recording_process(self, state_manager, audio_capture_thread, previous_volume, volume_timer_callback):
         """停止录音流程 - 从Application类移过来"""
         import logging
         try:
             # 检查录音线程是否存在
             if audio_capture_thread:
-                audio_capture_thread.stop()
-                audio_capture_thread.wait()
+                with tracer.span('capture.thread_stop'):
+                    audio_capture_thread.stop()
+                    audio_capture_thread.wait()
 
             # 播放停止音效（先播放音效，再恢复音量）
-            state_manager.stop_recording()
+            with tracer.span('audio.stop_sound'):
+                state_manager.stop_recording()
 
             # 异步恢复音量，避免阻塞主线程
             if previous_volume is not None:
@@ -232,7 +226,9 @@ class AudioManagerWrapper:
 
             # 获取录音数据
             self._ensure_initialized()
-            audio_data = self._original_capture.get_audio_data()
+            with tracer.span('capture.speech_audio') as span:
+                audio_data = self._original_capture.get_speech_audio()
+                span.set(seconds=round(len(audio_data) / 16000, 2))
             return audio_data
 
         except Exception as e:
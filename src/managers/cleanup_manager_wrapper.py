@@ -85,7 +85,7 @@ class CleanupManagerWrapper:
             
             # 定义需要清理的组件列表（按优先级排序）
             components_to_cleanup = [
-                ('transcription_thread', 'terminate'),
+                ('transcription_worker', 'stop'),
                 ('audio_capture', 'cleanup'),
                 ('funasr_engine', 'cleanup'),
                 ('hotkey_manager', 'cleanup'),
@@ -94,6 +94,10 @@ class CleanupManagerWrapper:
             
             for component_name, method in components_to_cleanup:
                 self.cleanup_component(app_instance, component_name, method)
+
+            # 写入尚未保存的设置修改并停止写回线程
+            if hasattr(app_instance, 'settings_manager') and app_instance.settings_manager:
+                app_instance.settings_manager.close()
             
             # 清理其他资源
             if hasattr(app_instance, 'tray_icon') and app_instance.tray_icon:
@@ -178,9 +182,9 @@ class CleanupManagerWrapper:
                 logging.error(f"快速停止音频捕获线程失败: {e}")
         
         # 快速停止转写线程
-        if hasattr(app_instance, 'transcription_thread') and app_instance.transcription_thread:
+        if hasattr(app_instance, 'transcription_worker') and app_instance.transcription_worker:
             try:
-                app_instance.transcription_thread.quit()
+                app_instance.transcription_worker.quit()
                 # 不等待线程完全停止，避免阻塞
             except Exception as e:
                 logging.error(f"快速停止转写线程失败: {e}")
@@ -192,9 +196,9 @@ class CleanupManagerWrapper:
                 app_instance.audio_capture_thread.stop()
                 app_instance.audio_capture_thread.wait()
                 
-            if hasattr(app_instance, 'transcription_thread') and app_instance.transcription_thread:
-                app_instance.transcription_thread.quit()
-                app_instance.transcription_thread.wait()
+            if hasattr(app_instance, 'transcription_worker') and app_instance.transcription_worker:
+                app_instance.transcription_worker.quit()
+                app_instance.transcription_worker.wait()
                 
             if hasattr(app_instance, 'hotkey_manager') and app_instance.hotkey_manager:
                 app_instance.hotkey_manager.stop_listening()
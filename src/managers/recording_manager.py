@@ -38,7 +38,8 @@ class RecordingManager(QObject):
         self.audio_capture = None
         self.funasr_engine = None
         self.audio_capture_thread = None
-        self.transcription_thread = None
+        self.transcription_worker = None  # 与引擎绑定的常驻转写线程
+        self._transcription_jobs = set()  # 本管理器提交、尚未返回的任务
         
         # 状态管理
         self.recording = False
@@ -212,7 +213,7 @@ class RecordingManager(QObject):
                 # 4. 设置录音超时（在主线程中创建定时器）
                 max_duration = self._get_max_recording_duration()
                 self._ensure_timer_created()
-                if self.recording_timer:
+                if self.recording_timer and max_duration > 0:
                     self.recording_timer.start(max_duration * 1000)  # 转换为毫秒
                 
                 # 5. 更新状态
@@ -306,12 +307,12 @@ class RecordingManager(QObject):
             self.logger.error(f"播放停止音效失败: {e}")
     
     def _get_max_recording_duration(self) -> int:
-        """获取最大录音时长"""
+        """获取最大录音时长（秒），0 表示不限制"""
         try:
             if (self.app_context and
                 hasattr(self.app_context, 'settings_manager') and
                 self.app_context.settings_manager):
-                return self.app_context.settings_manager.get_setting('audio.max_recording_duration', 10)
+                return self.app_context.settings_manager.get_max_recording_duration()
             return 10  # 默认10秒
         except Exception as e:
             self.logger.error(f"获取录音时长设置失败: {e}")
@@ -463,13 +464,19 @@ class RecordingManager(QObject):
     def _start_transcription(self, audio_data):
         """启动转写"""
         try:
-            from audio_threads import TranscriptionThread
+            if self.transcription_worker is None:
+                from audio_threads import get_transcription_worker
+
+                self.transcription_worker = get_transcription_worker(self.funasr_engine)
+                self.transcription_worker.transcription_done.connect(self._on_worker_transcription_done)
 
-            self.transcription_thread = TranscriptionThread(audio_data, self.funasr_engine)
-            self.transcription_thread.transcription_done.connect(self._on_transcription_done)
-            self.transcription_thread.start()
+            job_id = self.transcription_worker.submit(audio_data)
+            if job_id is None:
+                self._handle_recording_error("转写任务过多，请稍后再试")
+                return
+            self._transcription_jobs.add(job_id)
 
-            self.logger.debug("转写线程启动成功")
+            self.logger.debug(f"转写任务已提交: #{job_id}")
 
         except Exception as e:
             self.logger.error(f"启动转写失败: {e}")
@@ -484,6 +491,12 @@ class RecordingManager(QObject):
         """处理录音停止信号"""
         self.logger.debug("收到录音停止信号")
 
+    def _on_worker_transcription_done(self, job_id, text):
+        """转写线程完成任务，只处理本管理器提交的任务"""
+        if job_id in self._transcription_jobs:
+            self._transcription_jobs.discard(job_id)
+            self._on_transcription_done(text)
+
     def _on_transcription_done(self, text):
         """转写完成的回调"""
         try:
@@ -528,11 +541,17 @@ class RecordingManager(QObject):
                 self.volume_timer.stop()
                 self.volume_timer = None
 
-            # 清理转写线程
-            if self.transcription_thread and self.transcription_thread.isRunning():
-                self.transcription_thread.quit()
-                self.transcription_thread.wait()
-                self.transcription_thread = None
+            # 转写线程与引擎绑定、由各入口共用，这里只取消本管理器的任务并断开信号，
+            # 线程由持有引擎的主程序停止
+            if self.transcription_worker:
+                for job_id in list(self._transcription_jobs):
+                    self.transcription_worker.cancel(job_id)
+                self._transcription_jobs.clear()
+                try:
+                    self.transcription_worker.transcription_done.disconnect(self._on_worker_transcription_done)
+                except (TypeError, RuntimeError):
+                    pass
+                self.transcription_worker = None
 
             # 清理音频捕获线程
             self._stop_audio_capture_thread()
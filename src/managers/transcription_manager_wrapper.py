@@ -5,6 +5,7 @@
 import logging
 import time
 from PyQt6.QtCore import QTimer
+from utils.tracing import tracer
 
 
 class TranscriptionManagerWrapper:
@@ -21,10 +22,19 @@ class TranscriptionManagerWrapper:
             if not app_instance.clipboard_manager:
                 return
 
-            # 使用安全的复制粘贴方法，确保完全替换剪贴板内容
-            success = app_instance.clipboard_manager.safe_copy_and_paste(text)
-            if not success:
-                logging.warning("安全粘贴操作失败")
+            # 在粘贴线程中复制并粘贴，不阻塞界面线程
+            trace = tracer.current_trace
+
+            def on_done(result):
+                # 文字粘贴完成，本次语音输入的追踪到此结束
+                tracer.end_utterance(trace)
+                if not result['success']:
+                    logging.warning("安全粘贴操作失败")
+                else:
+                    logging.debug(f"粘贴各阶段耗时(ms): {result['timings']}")
+
+            if app_instance.clipboard_manager.paste_async(text, on_done) is None:
+                tracer.end_utterance(trace)
 
         except Exception as e:
             logging.error(f"粘贴操作失败: {e}")
@@ -58,7 +68,8 @@ class TranscriptionManagerWrapper:
             # 调试模式：显示转录完成信息
 
             # 1. 更新UI并添加到历史记录（无论窗口是否可见）
-            app_instance.main_window.display_result(text)  # UI显示保留HTML格式
+            with tracer.span('ui.display_result'):
+                app_instance.main_window.display_result(text)  # UI显示保留HTML格式
 
             # 2. 使用可配置的延迟时间，用lambda函数捕获当前文本
             delay = app_instance.settings_manager.get_setting('paste.transcription_delay', 30)
@@ -55,6 +55,16 @@ class UIManagerWrapper:
         self._ensure_initialized()
         return self._original_window.display_result(text, skip_history)
     
+    def show_partial_result(self, text):
+        """显示流式转写的中间结果"""
+        self._ensure_initialized()
+        return self._original_window.show_partial_result(text)
+    
+    def clear_partial_result(self):
+        """清除流式转写的中间结果"""
+        self._ensure_initialized()
+        return self._original_window.clear_partial_result()
+    
     def _show_window_internal(self):
         """在主线程中显示窗口"""
         self._ensure_initialized()
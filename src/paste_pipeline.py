@@ -0,0 +1,334 @@
+"""
+粘贴流水线
+
+转写完成后的 复制 → 切换焦点 → 发送粘贴快捷键 在一个后台线程中按顺序执行，不阻塞界面线程。
+剪贴板、按键和前台应用三个后端都可以替换；MemoryClipboard / MemoryKeystrokes / MemoryFocus
+是纯内存实现，可以在没有剪贴板和辅助功能权限的环境（Linux、测试）中运行。
+
+- 按下热键时记下前台应用（capture_target），粘贴时只有前台变成本应用时才切换回去并等待焦点
+- 复制后默认不再读回校验（paste.verify_copy 开启时才校验），只在出错时重试
+- 每个阶段的耗时记在结果的 timings 中（毫秒），同时记为 paste.* 追踪区间
+"""
+
+import logging
+import platform
+import subprocess
+import threading
+import time
+
+try:
+    from utils.side_effects import SideEffectExecutor
+    from utils.tracing import tracer
+except ImportError:
+    from src.utils.side_effects import SideEffectExecutor
+    from src.utils.tracing import tracer
+
+OWN_APP_MARKERS = ('python', 'asr', 'dou-flow')
+
+
+def is_own_app(name):
+    """前台应用是否是本应用（此时粘贴前需要把焦点切回目标应用）"""
+    name = (name or '').lower()
+    return any(marker in name for marker in OWN_APP_MARKERS)
+
+
+# ---- 系统后端 ----
+
+class PyperclipBackend:
+    """系统剪贴板"""
+
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def copy(self, text):
+        self._pyperclip.copy(text)
+
+    def paste(self):
+        return self._pyperclip.paste()
+
+
+class PynputKeystrokeBackend:
+    """用 pynput 发送粘贴快捷键（macOS 为 Command+V，其他平台为 Ctrl+V）"""
+
+    def __init__(self, is_macos=None):
+        from pynput import keyboard
+        self._keyboard = keyboard
+        self._controller = keyboard.Controller()
+        if is_macos is None:
+            is_macos = platform.system() == 'Darwin'
+        self._modifier = keyboard.Key.cmd if is_macos else keyboard.Key.ctrl
+
+    def send_paste(self):
+        with self._controller.pressed(self._modifier):
+            self._controller.press('v')
+            self._controller.release('v')
+
+
+class MacFocusBackend:
+    """macOS 前台应用查询与切换
+
+    查询前台应用优先用 NSWorkspace（不启动子进程），没有 AppKit 时退回 osascript。
+    """
+
+    def __init__(self):
+        try:
+            from AppKit import NSWorkspace
+            self._workspace = NSWorkspace.sharedWorkspace()
+        except ImportError:
+            self._workspace = None
+
+    def frontmost_app(self):
+        try:
+            if self._workspace is not None:
+                app = self._workspace.frontmostApplication()
+                return str(app.localizedName()) if app is not None else None
+
+            script = '''
+            tell application "System Events"
+                set frontApp to name of first application process whose frontmost is true
+                return frontApp
+            end tell
+            '''
+            result = subprocess.run(['osascript', '-e', script],
+                                    capture_output=True, text=True, timeout=2)
+            return result.stdout.strip() or None
+        except Exception as e:
+            logging.error(f"获取前台应用失败: {e}")
+            return None
+
+    def recent_app(self):
+        """最近使用的其他前台应用"""
+        try:
+            script = '''
+            tell application "System Events"
+                set appList to {}
+                repeat with proc in application processes
+                    if background only of proc is false and name of proc is not "Python" and name of proc is not "Dou-flow" then
+                        set end of appList to name of proc
+                    end if
+                end repeat
+                return appList
+            end tell
+            '''
+            result = subprocess.run(['osascript', '-e', script],
+                                    capture_output=True, text=True, timeout=2)
+            if result.returncode == 0 and result.stdout.strip():
+                apps = result.stdout.strip().split(', ')
+                if apps and apps[0]:
+                    return apps[0]
+        except Exception as e:
+            logging.error(f"获取最近使用的应用失败: {e}")
+        return None
+
+    def activate(self, app):
+        try:
+            script = f'''
+            tell application "{app}"
+                activate
+            end tell
+            '''
+            result = subprocess.run(['osascript', '-e', script],
+                                    capture_output=True, text=True, timeout=2)
+            return result.returncode == 0
+        except Exception as e:
+            logging.error(f"切换到 {app} 失败: {e}")
+            return False
+
+
+class NullFocusBackend:
+    """不处理焦点（Windows / Linux）"""
+
+    def frontmost_app(self):
+        return None
+
+    def recent_app(self):
+        return None
+
+    def activate(self, app):
+        return False
+
+
+# ---- 内存后端 ----
+
+class MemoryClipboard:
+    """内存剪贴板，copy_ms / paste_ms 模拟系统剪贴板的耗时"""
+
+    def __init__(self, copy_ms=0.0, paste_ms=0.0):
+        self.text = ''
+        self.copy_ms = copy_ms
+        self.paste_ms = paste_ms
+
+    def copy(self, text):
+        if self.copy_ms:
+            time.sleep(self.copy_ms / 1000)
+        self.text = text
+
+    def paste(self):
+        if self.paste_ms:
+            time.sleep(self.paste_ms / 1000)
+        return self.text
+
+
+class MemoryFocus:
+    """内存中的前台应用，query_ms / activate_ms 模拟查询和切换的耗时"""
+
+    def __init__(self, frontmost='TextEdit', recent='TextEdit', query_ms=0.0, activate_ms=0.0):
+        self.frontmost = frontmost
+        self.recent = recent
+        self.query_ms = query_ms
+        self.activate_ms = activate_ms
+        self.activations = 0
+
+    def frontmost_app(self):
+        if self.query_ms:
+            time.sleep(self.query_ms / 1000)
+        return self.frontmost
+
+    def recent_app(self):
+        if self.query_ms:
+            time.sleep(self.query_ms / 1000)
+        return self.recent
+
+    def activate(self, app):
+        if self.activate_ms:
+            time.sleep(self.activate_ms / 1000)
+        self.frontmost = app
+        self.activations += 1
+        return True
+
+
+class MemoryKeystrokes:
+    """把剪贴板内容"粘贴"到当前前台应用，记录在 pasted 中：[(应用, 文本, 时间)]"""
+
+    def __init__(self, clipboard, focus=None):
+        self.clipboard = clipboard
+        self.focus = focus
+        self.pasted = []
+        self.on_paste = None
+
+    def send_paste(self):
+        app = self.focus.frontmost if self.focus is not None else None
+        self.pasted.append((app, self.clipboard.text, time.perf_counter()))
+        if self.on_paste:
+            self.on_paste()
+
+
+# ---- 流水线 ----
+
+class PastePipeline:
+    """在后台线程中按顺序执行复制和粘贴
+
+    Args:
+        clipboard: 剪贴板后端（copy / paste）
+        keystrokes: 按键后端（send_paste）
+        focus: 前台应用后端（frontmost_app / recent_app / activate）
+        verify_copy: 复制后是否读回剪贴板校验
+        focus_wait: 切换前台应用后等待焦点生效的时间（秒）
+        settle: 发送快捷键后等待目标应用读取剪贴板的时间（秒），下一次复制排在它之后
+    """
+
+    def __init__(self, clipboard, keystrokes, focus=None, verify_copy=False,
+                 focus_wait=0.1, settle=0.05):
+        self.clipboard = clipboard
+        self.keystrokes = keystrokes
+        self.focus = focus or NullFocusBackend()
+        self.verify_copy = verify_copy
+        self.focus_wait = focus_wait
+        self.settle = settle
+        self.target_app = None
+        self.last_result = None
+        self.executor = SideEffectExecutor('PastePipeline')
+        self._lock = threading.Lock()
+
+    def capture_target(self):
+        """按下热键时调用：在后台记下当前前台应用，作为粘贴目标"""
+        return self.executor.submit('paste.capture_target', self._capture_target)
+
+    def _capture_target(self):
+        app = self.focus.frontmost_app()
+        if app and not is_own_app(app):
+            self.target_app = app
+        return app
+
+    def submit(self, text, on_done=None):
+        """提交一次复制粘贴，立即返回 Future，结果见 _run；on_done(result) 在后台线程中调用"""
+        return self.executor.submit('paste.pipeline', self._run, text, time.perf_counter(), on_done)
+
+    def copy(self, text):
+        """只复制到剪贴板（在调用线程中执行），返回是否成功"""
+        return self._copy(text)
+
+    def paste_clipboard(self):
+        """把剪贴板内容粘贴到前台应用（在调用线程中执行）"""
+        timings = {}
+        self._ensure_focus(timings)
+        self._timed(timings, 'keystroke', self.keystrokes.send_paste)
+        return timings
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def _timed(self, timings, name, func, *args):
+        start = time.perf_counter()
+        with tracer.span(f'paste.{name}'):
+            result = func(*args)
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+        return result
+
+    def _run(self, text, submitted, on_done):
+        timings = {'queue': (time.perf_counter() - submitted) * 1000}
+        result = {'success': False, 'target': None, 'timings': timings}
+        try:
+            if not self._copy(text, timings):
+                logging.error(f"复制操作最终失败: {text[:50]}{'...' if len(text) > 50 else ''}")
+                return result
+            result['target'] = self._ensure_focus(timings)
+            self._timed(timings, 'keystroke', self.keystrokes.send_paste)
+            result['success'] = True
+            timings['total'] = (time.perf_counter() - submitted) * 1000
+            # 等待目标应用读取剪贴板，避免被下一次复制覆盖
+            if self.settle:
+                self._timed(timings, 'settle', time.sleep, self.settle)
+            return result
+        except Exception as e:
+            logging.error(f"粘贴失败: {e}")
+            return result
+        finally:
+            with self._lock:
+                self.last_result = result
+            if on_done is not None:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    logging.error(f"粘贴完成回调执行失败: {e}")
+
+    def _copy(self, text, timings=None):
+        timings = {} if timings is None else timings
+        for attempt in range(3):  # 最多重试3次
+            try:
+                self._timed(timings, 'copy', self.clipboard.copy, text)
+                if not self.verify_copy:
+                    return True
+                copied_text = self._timed(timings, 'verify', self.clipboard.paste)
+                if copied_text == text:
+                    return True
+                copied_preview = copied_text[:30] + '...' if copied_text and len(copied_text) > 30 else (copied_text or '(空)')
+                logging.warning(f"复制验证失败 (尝试 {attempt + 1}): 期望 '{text[:30]}...', 实际 '{copied_preview}'")
+            except Exception as e:
+                logging.error(f"复制到剪贴板失败 (尝试 {attempt + 1}): {e}")
+            if attempt < 2:  # 不是最后一次尝试
+                time.sleep(0.02)
+        return False
+
+    def _ensure_focus(self, timings):
+        """前台是本应用时切回目标应用，返回粘贴时的前台应用"""
+        current = self._timed(timings, 'focus', self.focus.frontmost_app)
+        if current is None or not is_own_app(current):
+            return current  # 前台已是其他应用（或无法得知），直接粘贴
+        target = self.target_app or self._timed(timings, 'focus', self.focus.recent_app)
+        if not target or not self._timed(timings, 'focus', self.focus.activate, target):
+            return current
+        if self.focus_wait:
+            self._timed(timings, 'focus_wait', time.sleep, self.focus_wait)
+        return target
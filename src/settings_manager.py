@@ -1,10 +1,62 @@
+import atexit
+import hashlib
 import json
 import os
 import logging
 import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
+_ACCESSORS = {}
+
+
+def _compile_accessor(key: str):
+    """把点号分隔的键编译为取值函数，如 'audio.vad.enabled' -> lambda d: d['audio']['vad']['enabled']"""
+    keys = tuple(key.split('.'))
+    if len(keys) == 1:
+        a, = keys
+        return lambda data: data[a]
+    if len(keys) == 2:
+        a, b = keys
+        return lambda data: data[a][b]
+    if len(keys) == 3:
+        a, b, c = keys
+        return lambda data: data[a][b][c]
+
+    def accessor(data):
+        for k in keys:
+            data = data[k]
+        return data
+    return accessor
+
+
+def _accessor(key: str):
+    accessor = _ACCESSORS.get(key)
+    if accessor is None:
+        accessor = _ACCESSORS[key] = _compile_accessor(key)
+    return accessor
+
+
+class SettingsSnapshot:
+    """某一版本设置的只读快照
+
+    data 发布后不再修改：写入时复制修改路径上的字典，生成新的快照后整体替换，
+    读取方拿到的快照始终是一致的，不需要加锁。
+    """
+    __slots__ = ('version', 'data')
+
+    def __init__(self, version: int, data: Dict):
+        self.version = version
+        self.data = data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return _accessor(key)(self.data)
+        except (KeyError, TypeError):
+            return default
+
+
 class SettingsManager:
     # 默认设置
     DEFAULT_SETTINGS = {
@@ -15,12 +67,59 @@ class SettingsManager:
             'input_device': None,     # 输入设备名称，None表示系统默认
             'volume_threshold': 150,   # 音量阈值：0-1000，对应实际阈值0-0.02，默认值150对应0.003
             'max_recording_duration': 10,  # 最大录音时长（秒），默认10秒
+            'capture_mode': 'callback',  # callback：回调写入环形缓冲区；blocking：阻塞读取
+            'vad': {
+                'enabled': True,          # 转写前用VAD裁掉首尾及较长的中间静音
+                'min_speech_ms': 90,      # 连续多久的语音才算开始说话
+                'min_silence_ms': 300,    # 连续多久的静音才算一段话结束
+                'pad_ms': 200,            # 语音段两侧保留的静音
+            },
+            'long_dictation': {
+                'enabled': False,         # 长录音模式：超过阈值后把录音写入磁盘，内存占用不随时长增长
+                'spill_after_seconds': 30,  # 录音超过多少秒后开始写入磁盘（最多32秒）
+                'spill_dir': '',          # 溢出文件目录，留空使用系统临时目录
+                'max_duration': 0,        # 长录音模式下的最大录音时长（秒），0 表示不限制
+            },
+            'warm_stream': {
+                'enabled': False,         # 常开输入流：空闲时保持麦克风打开，按下热键即开始录音（系统会一直显示麦克风使用中）
+                'preroll_ms': 300,        # 按下热键前保留的预录音频（毫秒），放在录音开头
+            },
         },
         'asr': {
             'model_path': '',          # ASR模型路径
             'punc_model_path': '',     # 标点符号模型路径
             'auto_punctuation': True,  # 自动添加标点
-            'real_time_display': True, # 实时显示识别结果
+            'real_time_display': True, # 录音期间实时识别并显示结果（需要流式模型），松开后只解码最后一段
+            'streaming_window_seconds': 2.0,  # transcribe_stream 在无流式模型时离线分段解码的片段时长（秒）
+            'max_queued_jobs': 4,      # 常驻转写线程的最大排队任务数，队满时拒绝新任务
+            'long_audio': {
+                'segment_seconds': 30,     # 长录音在静音处分段解码，每段的大致时长（秒）
+            },
+            'daemon': {
+                'enabled': True,               # 在独立的守护进程中运行识别模型
+                'socket_path': '',             # 留空使用临时目录下的默认路径
+                'startup_timeout': 120,        # 等待守护进程加载模型的最长时间（秒）
+                'health_check_interval': 10,   # 健康检查间隔（秒）
+                'idle_timeout_minutes': 0      # 守护进程空闲多久后退出，0 表示不退出
+            },
+            'model_cache': {
+                'enabled': True,           # 把模型权重缓存为可内存映射的文件，加快后续启动
+                'cache_dir': '',           # 缓存目录，留空使用模型缓存下的 mmap_cache 目录
+            },
+            'quantization': {
+                'enabled': False,          # 对模型 Linear 层做 int8 动态量化（仅 CPU）
+                'cache_dir': '',           # 量化参数（state_dict）缓存目录，留空使用模型缓存下的 quantized 目录
+            },
+            'threads': {
+                'num_threads': 0,          # torch 计算线程数，0 表示自动（使用本机调优结果）
+                'interop_threads': 0,      # torch inter-op 线程数，0 表示使用 torch 默认值
+                'auto_tune': True,         # 首次启动时自动测试并选择最快的线程数（结果保存在模型缓存目录的 thread_tuning.json）
+            },
+            'warmup': {
+                'enabled': True,           # 加载模型后用合成音频预热
+                'budget_ms': 3000,         # 预热总耗时预算（毫秒）
+                'clip_seconds': [1.0, 3.0, 6.0],  # 预热音频片段时长（秒）
+            },
             'hotword_weight': 80,      # 热词权重 (0-100)
             'enable_pronunciation_correction': True,  # 启用发音相似词纠错
         },
@@ -30,6 +129,12 @@ class SettingsManager:
         'paste': {
             'transcription_delay': 0,  # 转录完成后粘贴延迟（毫秒）
             'history_click_delay': 0,  # 点击历史记录后粘贴延迟（毫秒）
+            'verify_copy': False,      # 复制后读回剪贴板校验（会增加一次剪贴板读取）
+        },
+        'tracing': {
+            'enabled': False,          # 记录每次语音输入各阶段的耗时（也可用 --trace 启动）
+            'max_utterances': 20,      # 保留最近多少次语音输入
+            'export_dir': '',          # 导出目录，留空使用工作目录下的 traces
         },
         'cache': {
             'permissions': {
@@ -47,25 +152,62 @@ class SettingsManager:
         }
     }
 
+    # 写回延迟（秒）：连续修改在这段时间内合并为一次写入，持续修改时最多推迟 SAVE_MAX_DELAY
+    SAVE_DEBOUNCE = 0.5
+    SAVE_MAX_DELAY = 2.0
+
     def __init__(self):
-        self.settings = {}
+        self._snapshot = SettingsSnapshot(0, {})
         self.settings_file = 'settings.json'
         self.settings_history_dir = 'settings_history'
         self.max_history_files = 10  # 最多保留10个历史版本
         self.logger = logging.getLogger('SettingsManager')
-        self._lock = threading.RLock()  # 添加可重入锁保护字典访问
+        self._lock = threading.RLock()  # 写入设置时互斥（读取使用快照，不加锁）
+        # 延迟写回：set_setting 只标记修改，由写回线程合并后写入
+        self._save_cond = threading.Condition(self._lock)
+        self._dirty_keys = set()
+        self._dirty_since = None     # 第一次未保存修改的时间
+        self._last_change = None     # 最近一次修改的时间
+        self._writer = None
+        self._closed = False
+        self._writes_in_flight = 0   # 已取走修改、还没写完的写入次数
+        self._io_lock = threading.RLock()  # 写文件和历史记录（不持有 _lock）
+        self._written_version = -1   # 已写入文件的快照版本
+        self._file_bytes = None      # 设置文件当前内容
+        self._file_hash = None
+        self._history_files = None   # 历史文件（旧的在前），首次保存历史时扫描目录
+        self._history_hash = None    # 最近一个历史文件内容的哈希
+        self.save_count = 0          # 实际写入文件的次数
         self._ensure_history_dir()
         self.load_settings()
+        atexit.register(self.flush)
+
+    @property
+    def settings(self) -> Dict:
+        """当前设置（只读，修改请使用 set_setting）"""
+        return self._snapshot.data
+
+    @settings.setter
+    def settings(self, data: Dict) -> None:
+        with self._lock:
+            self._snapshot = SettingsSnapshot(self._snapshot.version + 1, data)
+
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        """当前设置快照，需要一次读取多个相互关联的设置时使用"""
+        return self._snapshot
 
     def load_settings(self) -> None:
         """加载设置"""
         with self._lock:  # 线程安全保护
             try:
                 if os.path.exists(self.settings_file):
-                    with open(self.settings_file, 'r', encoding='utf-8') as f:
-                        loaded_settings = json.load(f)
-                        # 合并加载的设置和默认设置
-                        self.settings = self._merge_settings(self.DEFAULT_SETTINGS, loaded_settings)
+                    with open(self.settings_file, 'rb') as f:
+                        self._file_bytes = f.read()
+                    self._file_hash = hashlib.sha1(self._file_bytes).hexdigest()
+                    loaded_settings = json.loads(self._file_bytes.decode('utf-8'))
+                    # 合并加载的设置和默认设置
+                    self.settings = self._merge_settings(self.DEFAULT_SETTINGS, loaded_settings)
                 else:
                     self.settings = self.DEFAULT_SETTINGS.copy()
                     self.save_settings()  # 保存默认设置
@@ -82,125 +224,209 @@ class SettingsManager:
                 self.logger.error(f"创建历史记录目录失败: {e}")
     
     def _save_to_history(self) -> bool:
-        """保存当前设置到历史记录"""
-        try:
-            if not os.path.exists(self.settings_file):
-                return True  # 没有现有文件，无需保存历史
-            
-            # 生成带时间戳的历史文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            history_file = os.path.join(self.settings_history_dir, f"settings_{timestamp}.json")
-            
-            # 复制当前设置文件到历史目录
-            import shutil
-            shutil.copy2(self.settings_file, history_file)
-            
-            # 清理旧的历史文件
-            self._cleanup_old_history()
-            
-            self.logger.debug(f"设置历史已保存: {history_file}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"保存设置历史失败: {e}")
-            return False
-    
-    def _cleanup_old_history(self) -> None:
-        """清理过多的历史文件"""
+        """把设置文件当前内容保存到历史记录（内容与最近一个历史文件相同时跳过）"""
+        with self._io_lock:
+            try:
+                if self._file_bytes is None:
+                    if not os.path.exists(self.settings_file):
+                        return True  # 没有现有文件，无需保存历史
+                    with open(self.settings_file, 'rb') as f:
+                        self._file_bytes = f.read()
+                    self._file_hash = hashlib.sha1(self._file_bytes).hexdigest()
+
+                if self._history_files is None:
+                    self._load_history_index()
+                if self._file_hash == self._history_hash:
+                    return True
+
+                # 生成带时间戳的历史文件名
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                history_file = os.path.join(self.settings_history_dir, f"settings_{timestamp}.json")
+                with open(history_file, 'wb') as f:
+                    f.write(self._file_bytes)
+                self._history_hash = self._file_hash
+                if history_file in self._history_files:
+                    self._history_files.remove(history_file)
+                self._history_files.append(history_file)
+
+                # 清理旧的历史文件
+                self._cleanup_old_history()
+
+                self.logger.debug(f"设置历史已保存: {history_file}")
+                return True
+
+            except Exception as e:
+                self.logger.error(f"保存设置历史失败: {e}")
+                return False
+
+    def _load_history_index(self) -> None:
+        """扫描历史目录，记录已有的历史文件和最新一个的内容哈希"""
+        self._history_files = []
+        self._history_hash = None
         try:
             if not os.path.exists(self.settings_history_dir):
                 return
-            
-            # 获取所有历史文件并按时间排序
+
             history_files = []
             for filename in os.listdir(self.settings_history_dir):
                 if filename.startswith('settings_') and filename.endswith('.json'):
                     filepath = os.path.join(self.settings_history_dir, filename)
                     if os.path.isfile(filepath):
                         history_files.append((filepath, os.path.getmtime(filepath)))
-            
-            # 按修改时间排序（最新的在前）
-            history_files.sort(key=lambda x: x[1], reverse=True)
-            
-            # 删除超出限制的文件
-            for filepath, _ in history_files[self.max_history_files:]:
-                try:
-                    os.remove(filepath)
-                    self.logger.debug(f"已删除旧的历史文件: {filepath}")
-                except Exception as e:
-                    self.logger.error(f"删除历史文件失败 {filepath}: {e}")
-                    
+
+            # 按修改时间排序（旧的在前）
+            history_files.sort(key=lambda x: x[1])
+            self._history_files = [filepath for filepath, _ in history_files]
+            if self._history_files:
+                with open(self._history_files[-1], 'rb') as f:
+                    self._history_hash = hashlib.sha1(f.read()).hexdigest()
         except Exception as e:
-            self.logger.error(f"清理历史文件失败: {e}")
-    
+            self.logger.error(f"读取历史文件列表失败: {e}")
+
+    def _cleanup_old_history(self) -> None:
+        """清理过多的历史文件"""
+        while len(self._history_files) > self.max_history_files:
+            filepath = self._history_files.pop(0)
+            try:
+                os.remove(filepath)
+                self.logger.debug(f"已删除旧的历史文件: {filepath}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.error(f"删除历史文件失败 {filepath}: {e}")
+
+    def _mark_dirty(self, key: str) -> None:
+        """记录一次修改，由写回线程在 SAVE_DEBOUNCE 内没有新修改后写入"""
+        with self._save_cond:
+            now = time.monotonic()
+            self._dirty_keys.add(key)
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_change = now
+            if self._closed:
+                return
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._writer_loop, name='SettingsWriter', daemon=True)
+                self._writer.start()
+            self._save_cond.notify()
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._save_cond:
+                if self._closed:
+                    return
+                if not self._dirty_keys:
+                    self._save_cond.wait()
+                    continue
+                deadline = min(self._last_change + self.SAVE_DEBOUNCE,
+                               self._dirty_since + self.SAVE_MAX_DELAY)
+                timeout = deadline - time.monotonic()
+                if timeout > 0:
+                    self._save_cond.wait(timeout)
+                    continue
+            # 在锁外写文件，写入期间 set_setting 不被阻塞
+            self._write_settings()
+
+    def flush(self) -> bool:
+        """立即写入尚未保存的修改（退出前调用）
+
+        写回线程正在写入时先等它写完（写回线程是守护线程，退出时可能被直接终止）；
+        写入失败的修改会重新标记为未保存，在这里再写一次。
+        """
+        with self._save_cond:
+            while self._writes_in_flight:
+                self._save_cond.wait()
+            if not self._dirty_keys:
+                return True
+        return self._write_settings()
+
+    def close(self) -> bool:
+        """写入尚未保存的修改并停止写回线程"""
+        result = self.flush()
+        with self._save_cond:
+            self._closed = True
+            self._save_cond.notify()
+        return result
+
     def save_settings(self) -> bool:
-        """保存设置到文件，包含备份、历史记录和恢复机制"""
-        with self._lock:  # 线程安全保护
-            backup_file = f"{self.settings_file}.backup"
+        """立即保存设置到文件（内容没有变化时不写入）"""
+        return self._write_settings()
+
+    def _write_settings(self) -> bool:
+        """把当前快照写入临时文件、fsync 后原子替换设置文件；写入前把旧内容保存到历史记录
+
+        快照不会被修改，序列化和写文件都不需要持有 _lock，只用 _io_lock 保证写入按顺序进行。
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            keys = set(self._dirty_keys)
+            self._dirty_keys.clear()
+            self._dirty_since = None
+            self._writes_in_flight += 1
+
+        written = False
+        try:
+            written = self._write_snapshot(snapshot)
+            return written
+        finally:
+            with self._save_cond:
+                self._writes_in_flight -= 1
+                if not written and keys:
+                    # 写入失败，恢复未保存标记，由写回线程在 SAVE_DEBOUNCE 后重试
+                    now = time.monotonic()
+                    self._dirty_keys |= keys
+                    if self._dirty_since is None:
+                        self._dirty_since = now
+                    self._last_change = now
+                self._save_cond.notify_all()
+
+    def _write_snapshot(self, snapshot: SettingsSnapshot) -> bool:
+        with self._io_lock:
+            if snapshot.version < self._written_version:
+                return True  # 更新的快照已经写入
             temp_file = f"{self.settings_file}.tmp"
-            
             try:
+                data = json.dumps(snapshot.data, ensure_ascii=False, indent=2).encode('utf-8')
+                digest = hashlib.sha1(data).hexdigest()
+                if digest == self._file_hash and os.path.exists(self.settings_file):
+                    self._written_version = snapshot.version
+                    return True  # 内容没有变化
+
                 # 保存到历史记录
                 self._save_to_history()
-                
-                # 如果原文件存在，先创建备份
-                if os.path.exists(self.settings_file):
-                    import shutil
-                    shutil.copy2(self.settings_file, backup_file)
-                
-                # 创建设置的深拷贝以避免在写入过程中被修改
-                import copy
-                settings_copy = copy.deepcopy(self.settings)
-                
-                # 先写入临时文件
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(settings_copy, f, ensure_ascii=False, indent=2)
-                
-                # 验证临时文件是否有效
-                with open(temp_file, 'r', encoding='utf-8') as f:
-                    json.load(f)  # 验证JSON格式
-                
+
+                with open(temp_file, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
                 # 原子性替换
-                if os.path.exists(self.settings_file):
-                    os.remove(self.settings_file)
-                os.rename(temp_file, self.settings_file)
-                
+                os.replace(temp_file, self.settings_file)
+
+                self._file_bytes = data
+                self._file_hash = digest
+                self._written_version = snapshot.version
+                self.save_count += 1
                 self.logger.debug("设置保存成功")
                 return True
-                
+
             except Exception as e:
                 self.logger.error(f"保存设置失败: {e}")
-                
+
                 # 清理临时文件
                 if os.path.exists(temp_file):
                     try:
                         os.remove(temp_file)
                     except:
                         pass
-                
-                # 尝试从备份恢复
-                if os.path.exists(backup_file):
-                    try:
-                        import shutil
-                        shutil.copy2(backup_file, self.settings_file)
-                        self.logger.info("已从备份恢复设置文件")
-                    except Exception as restore_error:
-                        self.logger.error(f"从备份恢复失败: {restore_error}")
-                
                 return False
 
     def get_setting(self, key: str, default: Any = None) -> Any:
-        """获取设置值"""
-        with self._lock:  # 线程安全保护
-            try:
-                # 支持使用点号访问嵌套设置，如 'audio.volume_threshold'
-                keys = key.split('.')
-                value = self.settings
-                for k in keys:
-                    value = value[k]
-                return value
-            except (KeyError, TypeError):
-                return default
+        """获取设置值（读取当前快照，不加锁）"""
+        try:
+            # 支持使用点号访问嵌套设置，如 'audio.volume_threshold'
+            return _accessor(key)(self._snapshot.data)
+        except (KeyError, TypeError):
+            return default
 
     def set_setting(self, key: str, value: Any, auto_save: bool = True) -> bool:
         """设置值
@@ -208,28 +434,13 @@ class SettingsManager:
         Args:
             key: 设置键名，支持点号分隔的嵌套键
             value: 设置值
-            auto_save: 是否自动保存到文件，默认True
+            auto_save: 是否自动保存到文件，默认True（延迟写回，见 SAVE_DEBOUNCE）
         """
-        with self._lock:  # 线程安全保护
+        with self._lock:  # 写入之间互斥，读取不受影响
             try:
-                # 支持使用点号设置嵌套设置
-                keys = key.split('.')
-                target = self.settings
-                
-                # 确保所有中间键都存在
-                for k in keys[:-1]:
-                    if k not in target:
-                        target[k] = {}
-                    elif not isinstance(target[k], dict):
-                        # 如果中间键不是字典，创建新的字典
-                        target[k] = {}
-                    target = target[k]
-                
-                # 设置最终值
-                target[keys[-1]] = value
-                
+                self.settings = self._with_changes({key: value})
                 if auto_save:
-                    return self.save_settings()
+                    self._mark_dirty(key)
                 return True
             except Exception as e:
                 self.logger.error(f"设置值失败 {key}: {e}")
@@ -237,6 +448,39 @@ class SettingsManager:
                 self.logger.error(f"设置值错误详情: {traceback.format_exc()}")
                 return False
 
+    def _with_changes(self, changes: Dict[str, Any]) -> Dict:
+        """返回应用修改后的新设置字典，只复制修改路径上的字典，当前快照保持不变"""
+        root = dict(self._snapshot.data)
+        copied = {id(root)}
+        for key, value in changes.items():
+            # 支持使用点号设置嵌套设置
+            keys = key.split('.')
+            target = root
+            # 确保所有中间键都存在
+            for k in keys[:-1]:
+                child = target.get(k)
+                if not isinstance(child, dict):
+                    # 如果中间键不是字典，创建新的字典
+                    child = {}
+                    copied.add(id(child))
+                elif id(child) not in copied:
+                    child = dict(child)
+                    copied.add(id(child))
+                target[k] = child
+                target = child
+            # 设置最终值
+            target[keys[-1]] = value
+        return root
+
+    def get_max_recording_duration(self) -> int:
+        """获取最大录音时长（秒），0 表示不限制
+
+        长录音模式使用 audio.long_dictation.max_duration，否则使用 audio.max_recording_duration。
+        """
+        if self.get_setting('audio.long_dictation.enabled', False):
+            return int(self.get_setting('audio.long_dictation.max_duration', 0) or 0)
+        return int(self.get_setting('audio.max_recording_duration', 10))
+
     def get_hotkey(self) -> str:
         """获取当前快捷键设置"""
         return self.get_setting('hotkey', 'fn')
@@ -267,14 +511,13 @@ class SettingsManager:
         """
         with self._lock:  # 线程安全保护
             try:
-                # 先设置所有值但不保存
-                for key, value in settings_dict.items():
-                    if not self.set_setting(key, value, auto_save=False):
-                        self.logger.error(f"设置 {key} 失败")
-                        return False
+                # 所有修改在同一个快照中生效
+                self.settings = self._with_changes(settings_dict)
                 
-                # 最后一次性保存所有设置
-                return self.save_settings()
+                # 由写回线程一次性保存所有设置
+                for key in settings_dict:
+                    self._mark_dirty(key)
+                return True
                 
             except Exception as e:
                 self.logger.error(f"批量设置失败: {e}")
@@ -304,8 +547,9 @@ class SettingsManager:
         return self.save_settings()
 
     def get_all_settings(self) -> Dict:
-        """获取所有设置"""
-        return self.settings.copy()
+        """获取所有设置（副本，可以修改）"""
+        import copy
+        return copy.deepcopy(self.settings)
 
     def get_model_paths(self):
         """获取模型路径设置"""
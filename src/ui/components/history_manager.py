@@ -3,26 +3,61 @@
 
 import json
 import os
-import re
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from utils.text_utils import clean_html_tags
+from utils.hotword_highlighter import highlight_hotwords
+from history_store import HistoryStore
+from history_index import HistorySearchIndex
 
 class HistoryManager:
     """历史记录管理器
     
     负责处理历史记录的业务逻辑，包括：
-    - 历史记录的保存和加载
+    - 历史记录的保存和加载（SQLite，见 HistoryStore）
     - 文本去重处理
     - 热词高亮应用
     - 数据格式转换
+    - 历史记录子串搜索（见 HistorySearchIndex）
+
+    数据库保存全部记录；内存和界面中只保留最近 max_history 条，更早的记录用 load_older() 分页读取。
+    搜索索引覆盖数据库中的全部记录，快照保存在数据库旁边的 .idx 文件中。
     """
     
-    def __init__(self, history_file_path: str, max_history: int = 30):
+    def __init__(self, history_file_path: str, max_history: int = 30, store: Optional[HistoryStore] = None):
         self.history_file = history_file_path
         self.max_history = max_history
         self.state_manager = None
         self.history_items = []  # 内存中的历史记录
+        self.store = store
+        if self.store is None:
+            try:
+                # 数据库与 history.json 放在同一目录，首次打开时导入 history.json
+                db_path = os.path.splitext(history_file_path)[0] + '.db'
+                self.store = HistoryStore(db_path, json_path=history_file_path)
+            except Exception as e:
+                import logging
+                logging.error(f"打开历史记录数据库失败: {e}")
+        self.index_file = os.path.splitext(history_file_path)[0] + '.idx'
+        self._index_dirty = False
+        self.search_index = self._open_search_index()
+
+    def _open_search_index(self) -> HistorySearchIndex:
+        """读取搜索索引快照，补上快照之后新增的记录；快照不可用时从数据库重建"""
+        index = HistorySearchIndex.load(self.index_file) if os.path.exists(self.index_file) else None
+        if self.store is None:
+            return index or HistorySearchIndex()
+        try:
+            # 数据库被清空或替换过时，快照中的 id 可能超出数据库范围，需要重建
+            if index is None or index.last_id > self.store.max_id():
+                index = HistorySearchIndex()
+            added = index.add_many(self.store.texts_after(index.last_id))
+            if added:
+                self._index_dirty = True
+        except Exception as e:
+            import logging
+            logging.error(f"构建历史记录搜索索引失败: {e}")
+        return index
     
     def set_state_manager(self, state_manager):
         """设置状态管理器，用于获取热词"""
@@ -31,30 +66,12 @@ class HistoryManager:
 
     
     def apply_hotword_highlight(self, text: str) -> str:
-        """应用热词高亮"""
+        """应用热词高亮（热词列表不变时复用已编译的高亮器）"""
         if not text or not self.state_manager:
             return text
         
         try:
-            hotwords = self._get_hotwords()
-            if not hotwords:
-                return text
-            
-            highlighted_text = text
-            # 按长度降序排列热词，避免短词覆盖长词
-            sorted_hotwords = sorted(hotwords, key=len, reverse=True)
-            
-            for hotword in sorted_hotwords:
-                if hotword and hotword.strip():
-                    pattern = re.escape(hotword.strip())
-                    highlighted_text = re.sub(
-                        f'({pattern})',
-                        r'<b>\1</b>',
-                        highlighted_text,
-                        flags=re.IGNORECASE
-                    )
-            
-            return highlighted_text
+            return highlight_hotwords(text, self._get_hotwords())
         except Exception as e:
             import logging
             logging.error(f"应用热词高亮失败: {e}")
@@ -73,65 +90,71 @@ class HistoryManager:
             return self.apply_hotword_highlight(text)
         return text
     
-    def save_history(self, history_items: List[Dict[str, Any]]) -> bool:
-        """保存历史记录到文件"""
+    def save_history(self, history_items: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """保存历史记录
+
+        每条记录在 add_history_item 时已经写入数据库，这里不需要再写入。
+        """
+        return self.store is not None
+
+    def save_search_index(self) -> bool:
+        """索引有新增记录时写入快照，下次启动不用重建
+
+        快照包含全部记录，只在退出时调用；没来得及写入时，启动时会从数据库补上快照之后的记录。
+        """
+        if not self._index_dirty:
+            return True
         try:
-            # 限制历史记录数量
-            limited_items = history_items[:self.max_history]
-            
-            # 转换为保存格式
-            save_data = []
-            for item in limited_items:
-                if isinstance(item, dict):
-                    # 直接保存原始文本，不进行HTML清理
-                    text = item.get('text', '')
-                    save_data.append({
-                        'text': text,
-                        'timestamp': item.get('timestamp', datetime.now().isoformat())
-                    })
-                elif isinstance(item, str):
-                    # 兼容字符串格式
-                    save_data.append({
-                        'text': item,
-                        'timestamp': datetime.now().isoformat()
-                    })
-            
-            # 保存到文件
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            
-            pass
+            self.search_index.save(self.index_file)
+            self._index_dirty = False
             return True
-            
         except Exception as e:
             import logging
-            logging.error(f"保存历史记录失败: {e}")
+            logging.error(f"保存历史记录搜索索引失败: {e}")
             return False
+
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, str]]:
+        """在全部历史记录中查找包含 query 的记录（忽略大小写和全半角，新的在前）"""
+        try:
+            if self.store is None:
+                return []
+            ids = self.search_index.search(query, limit)
+            return self._process_loaded_data(self.store.get_many(ids[::-1]))[::-1]
+        except Exception as e:
+            import logging
+            logging.error(f"搜索历史记录失败: {e}", exc_info=True)
+            return []
     
     def load_history(self) -> List[Dict[str, str]]:
-        """从文件加载历史记录"""
+        """从数据库加载最近 max_history 条历史记录（旧的在前）"""
         try:
-            if not os.path.exists(self.history_file):
-                pass
+            if self.store is None:
                 return []
-            
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-            
+            return self._process_loaded_data(self.store.latest(self.max_history))
+        except Exception as e:
+            import logging
+            logging.error(f"加载历史记录失败: {e}", exc_info=True)
+            return []
 
-            
-            if not history_data:
-                pass
+    def load_latest(self) -> int:
+        """把最近一页历史记录加载到内存，返回条数"""
+        self.history_items = self.load_history()
+        return len(self.history_items)
+
+    def load_older(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """读取内存中最早一条之前的一页记录，插入到内存列表开头并返回"""
+        try:
+            if self.store is None:
                 return []
-            
-            # 处理和排序历史记录
-            processed_data = self._process_loaded_data(history_data)
-            return processed_data
-            
+            before_id = self.history_items[0].get('id') if self.history_items else None
+            if self.history_items and before_id is None:
+                return []
+            older = self._process_loaded_data(self.store.latest(limit or self.max_history, before_id))
+            self.history_items = older + self.history_items
+            return older
         except Exception as e:
             import logging
-            logging.error(f"加载历史记录失败: {e}", exc_info=True)
+            logging.error(f"加载更早的历史记录失败: {e}", exc_info=True)
             return []
     
     def _process_loaded_data(self, history_data: List) -> List[Dict[str, str]]:
@@ -141,11 +164,14 @@ class HistoryManager:
         # 转换为统一格式
         for entry in history_data:
             if isinstance(entry, dict) and 'text' in entry:
-                processed_data.append({
+                item = {
                     'text': entry['text'],
                     'timestamp': entry.get('timestamp', ''),
                     'highlighted_text': self.apply_hotword_highlight(entry['text'])
-                })
+                }
+                if 'id' in entry:
+                    item['id'] = entry['id']
+                processed_data.append(item)
             elif isinstance(entry, str):
                 # 兼容旧格式
                 processed_data.append({
@@ -201,9 +227,17 @@ class HistoryManager:
         
         # 直接添加新项目到末尾
         new_item = self.create_history_entry(text)
+        if self.store is not None:
+            try:
+                new_item['id'] = self.store.append(text, new_item['timestamp'])
+                self.search_index.add(new_item['id'], text)
+                self._index_dirty = True
+            except Exception as e:
+                import logging
+                logging.error(f"保存历史记录失败: {e}")
         self.history_items.append(new_item)
         
-        # 限制数量（删除最旧的记录）
+        # 限制内存中的数量（数据库中保留全部记录）
         if len(self.history_items) > self.max_history:
             self.history_items = self.history_items[-self.max_history:]
         
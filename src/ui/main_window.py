@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QApplication, QDialog, QMenuBar, QGraphicsOpacityEffect
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QApplication, QDialog, QMenuBar, QGraphicsOpacityEffect
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPoint, QSettings, QEvent, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QIcon, QFont, QAction, QKeySequence, QShortcut
 from .settings_window import MacOSSettingsWindow
@@ -7,8 +7,6 @@ from .components.modern_list_widget import ModernListWidget
 from .components.history_manager import HistoryManager
 import os
 import sys
-import json
-import re
 from datetime import datetime
 from config import APP_VERSION  # 使用绝对导入
 from utils.text_utils import clean_html_tags
@@ -106,11 +104,34 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.title_bar)
         
         # 创建历史记录管理器
-        # 使用项目根目录下的history.json文件
+        # 历史记录保存在项目根目录下的history.db，首次启动时导入history.json
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.history_file = os.path.join(project_root, "history.json")
         self.history_manager = HistoryManager(self.history_file)
         
+        # 历史记录搜索框：在全部历史记录（不只是列表中最近的记录）中查找
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索历史记录")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                color: #333333;
+                font-size: 13px;
+                padding: 6px 10px;
+                margin: 4px 16px;
+                border: 1px solid #E0E0E0;
+                border-radius: 6px;
+                background-color: #FAFAFA;
+            }
+        """)
+        # 输入停顿后再搜索，避免每个按键都刷新列表
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self._apply_history_search)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        main_layout.addWidget(self.search_input)
+        
         # 添加历史记录列表
         self.history_list = ModernListWidget()
         self.history_list.itemClicked.connect(self._on_history_item_clicked)
@@ -150,6 +171,20 @@ class MainWindow(QMainWindow):
         
         main_layout.addWidget(self.history_list)
         
+        # 流式转写的实时结果，只在录音期间显示
+        self.partial_label = QLabel("")
+        self.partial_label.setWordWrap(True)
+        self.partial_label.setStyleSheet("""
+            QLabel {
+                color: #666666;
+                font-size: 14px;
+                padding: 8px 20px;
+                background-color: #F5F5F5;
+            }
+        """)
+        self.partial_label.hide()
+        main_layout.addWidget(self.partial_label)
+        
         # 添加底部按钮区域
         self.setup_bottom_bar(main_layout)
         
@@ -166,6 +201,10 @@ class MainWindow(QMainWindow):
         if sys.platform == 'darwin':
             settings_shortcut_mac = QShortcut(QKeySequence("Meta+,"), self)
             settings_shortcut_mac.activated.connect(self.open_settings)
+        
+        # Command+F 搜索历史记录（Qt 在 macOS 上把 Ctrl 映射为 Command）
+        search_shortcut = QShortcut(QKeySequence.StandardKey.Find, self)
+        search_shortcut.activated.connect(self._focus_history_search)
     
     def open_settings(self):
         """打开设置窗口"""
@@ -386,6 +425,14 @@ class MainWindow(QMainWindow):
         from utils.text_utils import clean_html_tags
         clean_text = clean_html_tags(text)
         
+        # 正在显示搜索结果时先回到最近记录列表，新记录追加在列表末尾
+        if self._is_searching():
+            self.search_timer.stop()
+            self.search_input.blockSignals(True)
+            self.search_input.clear()
+            self.search_input.blockSignals(False)
+            self._resync_history_ui()
+        
         # 使用历史记录管理器添加记录（保存纯文本）
         if self.history_manager.add_history_item(clean_text):
             # 成功添加，更新UI
@@ -398,6 +445,8 @@ class MainWindow(QMainWindow):
             # 添加同步验证机制，确保UI与数据管理器索引一致
             from PyQt6.QtCore import QTimer
             def verify_sync():
+                if self._is_searching():
+                    return  # 搜索结果与最近记录列表的条数本来就不同
                 ui_count = self.history_list.count()
                 manager_count = len(self.history_manager.history_items)
                 if ui_count != manager_count:
@@ -418,10 +467,9 @@ class MainWindow(QMainWindow):
             # 清空UI列表
             self.history_list.clear()
             
-            # 重新添加所有历史记录
-            for i, text in enumerate(self.history_manager.get_history_texts()):
-                text_with_highlight = self._apply_hotword_highlight(text)
-                self.history_list.addItem(text_with_highlight)
+            # 重新添加所有历史记录（历史记录管理器中已经应用了热词高亮）
+            for text in self.history_manager.get_history_texts():
+                self.history_list.addItem(text)
             
         except Exception as e:
             import logging
@@ -429,6 +477,29 @@ class MainWindow(QMainWindow):
             import traceback
             logging.error(traceback.format_exc())
     
+    def _is_searching(self):
+        return bool(self.search_input.text().strip())
+    
+    def _focus_history_search(self):
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+    
+    def _apply_history_search(self):
+        """按搜索框内容刷新列表：有关键词时显示全部历史记录中的匹配项，清空后恢复最近记录"""
+        query = self.search_input.text().strip()
+        if not query:
+            self._resync_history_ui()
+            return
+        try:
+            results = self.history_manager.search(query)
+            self.history_list.clear()
+            for item in results:
+                self.history_list.addItem(item.get('highlighted_text', item['text']))
+            self.history_list.scrollToBottom()
+        except Exception as e:
+            import logging
+            logging.error(f"搜索历史记录失败: {e}")
+    
     def update_status(self, status):
         """更新状态显示"""
         is_recording = status == "录音中"
@@ -439,6 +510,7 @@ class MainWindow(QMainWindow):
     def set_state_manager(self, state_manager):
         """设置状态管理器"""
         self.state_manager = state_manager
+        self.history_manager.set_state_manager(state_manager)
         if state_manager:
             self.update_status("就绪")
             # 重新应用热词高亮到已加载的历史记录
@@ -500,8 +572,8 @@ class MainWindow(QMainWindow):
                 if fallback_text and fallback_text.strip():
                     original_text = fallback_text
             
-            # 方法2：如果索引在管理器范围内，尝试从管理器获取
-            if not original_text and index < total_count:
+            # 方法2：如果索引在管理器范围内，尝试从管理器获取（搜索结果的索引与管理器不对应）
+            if not original_text and index < total_count and not self._is_searching():
                 manager_text = self.history_manager.get_original_text_by_index(index)
                 if manager_text and manager_text.strip():
                     original_text = manager_text
@@ -528,6 +600,18 @@ class MainWindow(QMainWindow):
             logging.error(traceback.format_exc())
             self.update_status("点击处理出错")
     
+    def show_partial_result(self, text):
+        """显示流式转写的中间结果"""
+        if not text:
+            return
+        self.partial_label.setText(text)
+        self.partial_label.show()
+    
+    def clear_partial_result(self):
+        """清除流式转写的中间结果"""
+        self.partial_label.clear()
+        self.partial_label.hide()
+    
     def display_result(self, text, skip_history=False):
         """显示识别结果"""
         if text and text.strip() and not skip_history:
@@ -537,8 +621,9 @@ class MainWindow(QMainWindow):
         """处理窗口关闭事件 - 完全退出应用程序"""
         # print("主窗口接收到关闭事件，准备退出应用程序")
         try:
-            # 保存历史记录
+            # 保存历史记录和搜索索引快照
             self.save_history()
+            self.save_search_index()
             
             # 保存窗口位置
             self.save_window_position()
@@ -681,80 +766,37 @@ class MainWindow(QMainWindow):
         self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
     
     def save_history(self):
-        """保存历史记录到文件"""
+        """保存历史记录（每条记录添加时已写入数据库）"""
         try:
-            # 使用历史记录管理器保存
-            history_data = self.history_manager.get_history_for_save()
-            
-            # 添加超时保护，避免在程序退出时因文件操作卡死
-            import signal
-            import threading
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError("保存历史记录超时")
-            
-            # 设置1秒超时
-            if hasattr(signal, 'SIGALRM'):  # Unix系统
-                signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(1)
-            
-            try:
-                with open(self.history_file, 'w', encoding='utf-8') as f:
-                    json.dump(history_data, f, ensure_ascii=False, indent=2)
-            finally:
-                if hasattr(signal, 'SIGALRM'):
-                    signal.alarm(0)  # 取消超时
-                    
-        except TimeoutError:
-            import logging
-            logging.warning("保存历史记录超时，跳过保存操作")
+            self.history_manager.save_history()
         except Exception as e:
             import logging
             logging.error(f"保存历史记录失败: {e}")
     
+    def save_search_index(self):
+        """写入历史记录搜索索引快照（只在退出时调用）"""
+        try:
+            self.history_manager.save_search_index()
+        except Exception as e:
+            import logging
+            logging.error(f"保存历史记录搜索索引失败: {e}")
+    
     def load_history(self):
-        """从文件加载历史记录"""
+        """从历史记录数据库加载最近的记录"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        # 文件为空，创建空的历史记录
-                        history_data = []
-                    else:
-                        history_data = json.loads(content)
+            # 清空现有历史记录
+            self.history_list.clear()
+            self.history_manager.clear_history()
+            
+            # 使用历史记录管理器加载数据
+            if self.history_manager.load_latest():
+                self._loading_history = True
                 
-                # 清空现有历史记录
-                self.history_list.clear()
-                self.history_manager.clear_history()
+                # 将历史记录添加到UI，确保顺序一致（加载时已经应用了热词高亮）
+                for text in self.history_manager.get_history_texts():
+                    self.history_list.addItem(text)
                 
-                # 使用历史记录管理器加载数据
-                if history_data:
-                    self._loading_history = True
-                    loaded_count = self.history_manager.load_history_data(history_data)
-                    
-                    # 将历史记录添加到UI，确保顺序一致
-                    history_texts = self.history_manager.get_history_texts()
-                    
-                    for i, text in enumerate(history_texts):
-                        text_with_highlight = self._apply_hotword_highlight(text)
-                        self.history_list.addItem(text_with_highlight)
-                    
-                    self._loading_history = False
-        except json.JSONDecodeError as e:
-            import logging
-            logging.error(f"历史记录文件格式错误: {e}")
-            # 备份损坏的文件并创建新的空文件
-            try:
-                import shutil
-                backup_file = f"{self.history_file}.backup"
-                shutil.move(self.history_file, backup_file)
-                logging.info(f"已将损坏的历史记录文件备份到: {backup_file}")
-                # 创建空的历史记录文件
-                with open(self.history_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-            except Exception as backup_e:
-                logging.error(f"备份损坏文件失败: {backup_e}")
+                self._loading_history = False
         except Exception as e:
             import logging
             logging.error(f"加载历史记录失败: {e}")
@@ -762,36 +804,10 @@ class MainWindow(QMainWindow):
             logging.error(traceback.format_exc())
     
     def _apply_hotword_highlight(self, text):
-        """应用热词高亮（使用简单的加粗效果）"""
+        """应用热词高亮（使用简单的加粗效果），与历史记录管理器共用同一个高亮器"""
         if not text or not hasattr(self, 'state_manager') or not self.state_manager:
             return text
-        
-        try:
-            # 获取热词列表
-            hotwords = self.state_manager.get_hotwords() if hasattr(self.state_manager, 'get_hotwords') else []
-            if not hotwords:
-                return text
-            
-            highlighted_text = text
-            # 按长度降序排列热词，避免短词覆盖长词
-            sorted_hotwords = sorted(hotwords, key=len, reverse=True)
-            
-            for hotword in sorted_hotwords:
-                if hotword and hotword.strip():
-                    # 使用正则表达式进行不区分大小写的替换，使用简单的加粗标签
-                    pattern = re.escape(hotword.strip())
-                    highlighted_text = re.sub(
-                        f'({pattern})',
-                        r'<b>\1</b>',
-                        highlighted_text,
-                        flags=re.IGNORECASE
-                    )
-            
-            return highlighted_text
-        except Exception as e:
-            import logging
-            logging.error(f"应用热词高亮失败: {e}")
-            return text
+        return self.history_manager.apply_hotword_highlight(text)
     
     # 移除热键状态更新方法 - 不再需要状态监控
     
@@ -802,6 +818,7 @@ class MainWindow(QMainWindow):
         # 移除热键状态定时器停止代码 - 不再需要
         
         self.save_history()  # 退出前保存历史记录
+        self.save_search_index()
         if self.app_instance:
             self.app_instance.quit_application()
         else:
@@ -11,7 +11,9 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt6.QtCore import Qt, pyqtSignal, QPropertyAnimation, QEasingCurve, QRect, QRectF, pyqtProperty
 from PyQt6.QtGui import QFont, QPalette, QColor, QPainter, QBrush, QPen, QFontMetrics, QIcon
 from pathlib import Path
-import pyaudio
+from utils.lazy_import import lazy_import
+
+pyaudio = lazy_import('pyaudio')
 
 
 class ModernSwitch(QWidget):
@@ -0,0 +1,114 @@
+"""
+热词高亮
+
+把全部热词建成一棵字典树，再把字典树编译成一个正则表达式，
+一次扫描文本即可找到所有热词（由 re 在 C 层完成匹配，效果相当于 Aho-Corasick）：
+- 最左最长匹配：同一位置优先匹配更长的热词，匹配结果互不重叠
+- 不区分大小写
+- 已有的 HTML 标签原样保留，不会在标签内部匹配
+
+热词列表不变时复用已编译的高亮器，见 get_highlighter()。
+"""
+
+import re
+import threading
+from typing import Iterable, Optional, Sequence
+
+_TAG = re.compile(r'(<[^>]+>)')
+_END = ''  # 字典树中表示热词结束的键
+
+
+def _fold(word: str) -> str:
+    """与 re.IGNORECASE 一致的逐字符小写（小写后长度变化的字符保持原样）"""
+    lowered = word.lower()
+    return lowered if len(lowered) == len(word) else word
+
+
+def _trie_pattern(node: dict) -> str:
+    """把字典树节点转换为正则表达式，子节点优先于结束标记，保证匹配最长的热词"""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ''
+    if len(branches) == 1:
+        body = branches[0]
+        # 单个字符可以直接加 ?，否则需要分组
+        if _END in node:
+            return f'(?:{body})?' if len(body) > 1 else f'{body}?'
+        return body
+    body = '(?:' + '|'.join(branches) + ')'
+    return body + '?' if _END in node else body
+
+
+class HotwordHighlighter:
+    """编译好的热词高亮器
+
+    Args:
+        hotwords: 热词列表，空白会被去掉，空字符串忽略
+        template: 匹配文本的替换模板，{} 为原文中的匹配内容
+    """
+
+    def __init__(self, hotwords: Iterable[str], template: str = '<b>{}</b>'):
+        trie: dict = {}
+        count = 0
+        for word in hotwords:
+            word = _fold((word or '').strip())
+            if not word:
+                continue
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            if _END not in node:
+                node[_END] = True
+                count += 1
+        self.count = count
+        self.template = template
+        self._pattern = re.compile(_trie_pattern(trie), re.IGNORECASE) if count else None
+
+    def _replace(self, match) -> str:
+        return self.template.format(match.group(0))
+
+    def highlight(self, text: str) -> str:
+        """给文本中的热词加上高亮标签"""
+        if not text or self._pattern is None:
+            return text
+        if '<' not in text:
+            return self._pattern.sub(self._replace, text)
+        parts = _TAG.split(text)
+        # split 的结果中奇数位置是标签
+        for i in range(0, len(parts), 2):
+            if parts[i]:
+                parts[i] = self._pattern.sub(self._replace, parts[i])
+        return ''.join(parts)
+
+
+_cache_lock = threading.Lock()
+_cached_source: Optional[Sequence[str]] = None
+_cached_key: Optional[tuple] = None
+_cached_highlighter: Optional[HotwordHighlighter] = None
+
+
+def get_highlighter(hotwords: Sequence[str]) -> HotwordHighlighter:
+    """返回热词列表对应的高亮器，热词没有变化时不重新编译
+
+    同一个列表对象且长度不变时直接复用（热词重新加载时会替换为新列表），
+    否则比较热词内容，内容相同也复用。
+    """
+    global _cached_source, _cached_key, _cached_highlighter
+    highlighter = _cached_highlighter
+    if highlighter is not None and hotwords is _cached_source and len(hotwords) == len(_cached_key):
+        return highlighter
+    key = tuple(hotwords)
+    with _cache_lock:
+        if _cached_highlighter is None or key != _cached_key:
+            _cached_highlighter = HotwordHighlighter(key)
+        _cached_source = hotwords
+        _cached_key = key
+        return _cached_highlighter
+
+
+def highlight_hotwords(text: str, hotwords: Sequence[str]) -> str:
+    """用缓存的高亮器给文本中的热词加粗"""
+    if not text or not hotwords:
+        return text
+    return get_highlighter(hotwords).highlight(text)
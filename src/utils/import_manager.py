@@ -10,7 +10,7 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QTextEdit, QLineEdit, QComboBox,
     QCheckBox, QSpinBox, QSlider, QProgressBar, QStatusBar,
-    QMenuBar, QMenu, QAction, QSystemTrayIcon, QMessageBox,
+    QMenuBar, QMenu, QSystemTrayIcon, QMessageBox,
     QDialog, QDialogButtonBox, QGroupBox, QFrame, QSplitter,
     QScrollArea, QTabWidget, QListWidget, QTreeWidget,
     QTableWidget, QHeaderView, QAbstractItemView
@@ -45,16 +45,19 @@ try:
 except ImportError:
     np = None
 
-try:
-    import pyaudio
-except ImportError:
-    pyaudio = None
 
 try:
     import requests
 except ImportError:
     requests = None
 
+# 延迟导入和启动分析（实现在不依赖 Qt 的 lazy_import 模块中，这里保留原有的导入路径）
+try:
+    from utils.lazy_import import LazyModule, LazyImports, ImportProfiler, StartupProfiler, lazy_import
+except ImportError:
+    from src.utils.lazy_import import LazyModule, LazyImports, ImportProfiler, StartupProfiler, lazy_import
+
+
 # 导入检查器
 class ImportChecker:
     """导入检查器，用于检查模块是否可用"""
@@ -217,4 +220,8 @@ def require_module(module_name: str, error_message: str = None):
 
 def get_common_imports() -> Dict[str, Any]:
     """获取所有常用导入"""
-    return import_manager.get_all_common_imports()
\ No newline at end of file
+    return import_manager.get_all_common_imports()
+
+
+# 重量级第三方模块，首次使用时才导入
+pyaudio = lazy_import('pyaudio')
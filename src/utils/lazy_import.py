@@ -0,0 +1,200 @@
+"""延迟导入和启动耗时分析
+
+不依赖 PyQt6 和其他第三方库，守护进程、批量转写和 tools/ 下的测试脚本也可以使用。
+"""
+
+import logging
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LazyModule(types.ModuleType):
+    """延迟导入的模块代理，首次访问属性时才真正导入
+
+    用于 torch、funasr、pyaudio、pynput 等重量级模块，避免它们在窗口显示前被加载。
+    """
+
+    def __init__(self, module_name: str):
+        super().__init__(module_name)
+        self.__dict__['_lazy_module_name'] = module_name
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module_name = self.__dict__['_lazy_module_name']
+            start_time = time.perf_counter()
+            # 通过 __import__ 导入，使 ImportProfiler 也能记录到延迟导入
+            __import__(module_name)
+            module = sys.modules[module_name]
+            LazyImports.record(module_name, (time.perf_counter() - start_time) * 1000)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "已加载" if self.__dict__['_lazy_module'] is not None else "未加载"
+        return f"<LazyModule {self.__dict__['_lazy_module_name']} ({state})>"
+
+
+class LazyImports:
+    """延迟导入注册表，记录每个模块实际导入的时间和耗时"""
+
+    _modules: Dict[str, LazyModule] = {}
+    _load_times: Dict[str, float] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, module_name: str) -> LazyModule:
+        with cls._lock:
+            if module_name not in cls._modules:
+                cls._modules[module_name] = LazyModule(module_name)
+            return cls._modules[module_name]
+
+    @classmethod
+    def record(cls, module_name: str, elapsed_ms: float):
+        with cls._lock:
+            cls._load_times[module_name] = elapsed_ms
+        logging.debug(f"延迟导入 {module_name}: {elapsed_ms:.1f}ms")
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """获取所有延迟模块的加载状态和耗时"""
+        with cls._lock:
+            return {
+                name: {
+                    'loaded': name in cls._load_times,
+                    'ms': round(cls._load_times.get(name, 0.0), 1)
+                }
+                for name in cls._modules
+            }
+
+
+# 导入耗时分析
+class ImportProfiler:
+    """导入耗时分析器，替换 builtins.__import__ 记录每次新模块导入的累计耗时
+
+    只记录真正加载了新模块的导入，最终输出按导入嵌套关系组织的树。
+    """
+
+    def __init__(self):
+        self._roots: List[Dict[str, Any]] = []
+        self._local = threading.local()
+        self._original_import = None
+
+    def install(self):
+        import builtins
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        original_import = self._original_import
+        profiler = self
+
+        def profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+            stack = profiler._stack()
+            node = {'name': '.' * level + name, 'ms': 0.0, 'children': []}
+            modules_before = len(sys.modules)
+            stack.append(node)
+            start_time = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                node['ms'] = (time.perf_counter() - start_time) * 1000
+                stack.pop()
+                if len(sys.modules) != modules_before:
+                    if stack:
+                        stack[-1]['children'].append(node)
+                    else:
+                        node['thread'] = threading.current_thread().name
+                        profiler._roots.append(node)
+
+        builtins.__import__ = profiled_import
+
+    def uninstall(self):
+        import builtins
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def total_ms(self) -> float:
+        return sum(node['ms'] for node in self._roots)
+
+    def format_tree(self, threshold_ms: float = 1.0) -> str:
+        """输出导入耗时树，忽略低于 threshold_ms 的节点"""
+        lines = []
+
+        def walk(node, depth):
+            if node['ms'] < threshold_ms:
+                return
+            thread = f"  [{node['thread']}]" if node.get('thread', 'MainThread') != 'MainThread' else ""
+            lines.append(f"{node['ms']:9.1f}ms  {'  ' * depth}{node['name']}{thread}")
+            for child in node['children']:
+                walk(child, depth + 1)
+
+        for root in self._roots:
+            walk(root, 0)
+        return "\n".join(lines)
+
+
+class StartupProfiler:
+    """启动耗时分析：记录导入耗时树、关键时间点和首次绘制时间"""
+
+    def __init__(self, start_time: float, budget_ms: float = 1500):
+        self.start_time = start_time
+        self.budget_ms = budget_ms
+        self.import_profiler = ImportProfiler()
+        self.marks: List[Tuple[str, float]] = []
+        self.first_paint_ms: Optional[float] = None
+        self._paint_filter = None
+
+    def mark(self, name: str):
+        """记录一个启动时间点（相对进程启动）"""
+        self.marks.append((name, (time.perf_counter() - self.start_time) * 1000))
+
+    def watch_first_paint(self, widget):
+        """在窗口第一次绘制时记录首次绘制时间（Qt 在这里才导入，模块本身不依赖 Qt）"""
+        from PyQt6.QtCore import QEvent, QObject
+        profiler = self
+
+        class PaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint and profiler.first_paint_ms is None:
+                    profiler.first_paint_ms = (time.perf_counter() - profiler.start_time) * 1000
+                    profiler.mark(f"首次绘制 ({type(obj).__name__})")
+                    obj.removeEventFilter(self)
+                return False
+
+        self._paint_filter = PaintFilter()
+        widget.installEventFilter(self._paint_filter)
+
+    def report(self, threshold_ms: float = 1.0) -> str:
+        lines = ["=== 启动导入耗时树（累计耗时） ===", self.import_profiler.format_tree(threshold_ms)]
+        lines.append("=== 延迟导入 ===")
+        for name, stats in LazyImports.get_stats().items():
+            status = f"{stats['ms']:.1f}ms" if stats['loaded'] else "未加载"
+            lines.append(f"{name}: {status}")
+        lines.append("=== 启动时间点 ===")
+        for name, ms in self.marks:
+            lines.append(f"{ms:9.1f}ms  {name}")
+        if self.first_paint_ms is not None:
+            verdict = "✓" if self.first_paint_ms <= self.budget_ms else "✗ 超出预算"
+            lines.append(f"首次绘制: {self.first_paint_ms:.0f}ms（预算 {self.budget_ms:.0f}ms）{verdict}")
+        return "\n".join(lines)
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    """获取模块的延迟导入代理，首次访问属性时才导入"""
+    return LazyImports.get(module_name)
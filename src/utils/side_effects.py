@@ -0,0 +1,171 @@
+"""
+录音开始 / 结束时的系统副作用（读取、静音、恢复系统音量等）
+
+每次 osascript 调用需要几十到上百毫秒。SideEffectExecutor 用一个后台线程按提交顺序执行这些操作，
+录音线程可以先启动，副作用与采集并行进行；顺序执行保证"静音"一定在"恢复"之前完成。
+
+VolumeController 缓存静音前的音量，恢复时使用缓存值，调用方不需要等待读取结果：
+- 已经由我们静音时不再重新读取（否则会把 0 当作原音量保存）
+- 恢复前又开始了新的录音时跳过这次恢复，避免录音过程中被取消静音
+"""
+
+import logging
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from utils.tracing import tracer
+except ImportError:
+    from src.utils.tracing import tracer
+
+
+class SideEffectExecutor:
+    """按提交顺序在后台线程中执行副作用，不阻塞调用线程"""
+
+    def __init__(self, name='SideEffects'):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.logger = logging.getLogger(name)
+
+    def submit(self, name, func, *args):
+        """提交一个副作用，返回 Future；在后台线程中记为名为 name 的追踪区间"""
+        trace = tracer.current_trace
+
+        def run():
+            with tracer.activate(trace), tracer.span(name):
+                try:
+                    return func(*args)
+                except Exception as e:
+                    self.logger.error(f"执行 {name} 失败: {e}")
+                    return None
+
+        return self._executor.submit(run)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class OsascriptVolumeBackend:
+    """通过 osascript 读写 macOS 系统输出音量"""
+
+    def get_volume(self):
+        """返回 0-100 的音量（已静音时返回 0），失败时返回 None"""
+        try:
+            result = subprocess.run([
+                'osascript',
+                '-e', 'get volume settings'
+            ], capture_output=True, text=True, check=True)
+
+            settings = result.stdout.strip()
+            # 解析输出，格式类似：output volume:50, input volume:75, alert volume:75, output muted:false
+            volume_str = settings.split(',')[0].split(':')[1].strip()
+            if "output muted:true" in settings:
+                return 0
+            return int(volume_str)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"获取系统音量失败: {e}")
+            return None
+        except Exception as e:
+            logging.error(f"获取系统音量时发生错误: {e}")
+            return None
+
+    def set_volume(self, volume):
+        """volume: 0-100 的整数，或者 None 表示静音"""
+        try:
+            if volume is None:
+                # 直接静音，不检查当前状态以减少延迟
+                subprocess.run([
+                    'osascript',
+                    '-e', 'set volume output muted true'
+                ], check=True)
+            else:
+                # 设置音量并取消静音
+                volume = max(0, min(100, volume))  # 确保音量在 0-100 范围内
+                subprocess.run([
+                    'osascript',
+                    '-e', f'set volume output volume {volume}',
+                    '-e', 'set volume output muted false'
+                ], check=True)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"设置系统音量失败: {e}")
+        except Exception as e:
+            logging.error(f"设置系统音量时发生错误: {e}")
+
+
+class VolumeToken:
+    """一次录音的静音凭据，录音结束时交给 VolumeController.restore()"""
+    __slots__ = ('generation', 'future')
+
+    def __init__(self, generation, future):
+        self.generation = generation
+        self.future = future
+
+    def __repr__(self):
+        return f"VolumeToken(generation={self.generation})"
+
+    @property
+    def volume(self):
+        """静音前的音量（等待后台读取完成）"""
+        return self.future.result()
+
+
+class VolumeController:
+    """录音期间静音系统输出，所有 osascript 调用都在 SideEffectExecutor 中执行"""
+
+    def __init__(self, executor=None, backend=None):
+        self.executor = executor or SideEffectExecutor()
+        self.backend = backend or OsascriptVolumeBackend()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # 以下只在执行线程中修改
+        self.saved_volume = None    # 静音前的音量
+        self.muted_by_us = False
+
+    def mute(self):
+        """保存当前音量并静音，立即返回 VolumeToken"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        return VolumeToken(generation, self.executor.submit('volume.mute', self._mute))
+
+    def _mute(self):
+        if self.muted_by_us:
+            # 上一次录音的恢复还没执行，音量仍是我们静音的状态，沿用之前保存的音量
+            return self.saved_volume
+        with tracer.span('volume.get'):
+            volume = self.backend.get_volume()
+        if volume is None:
+            return None
+        self.saved_volume = volume
+        self.backend.set_volume(None)
+        self.muted_by_us = True
+        return volume
+
+    def restore(self, token=None):
+        """恢复静音前的音量；token 之后又开始了新录音时跳过"""
+        generation = token.generation if token is not None else None
+        return self.executor.submit('volume.restore', self._restore, generation)
+
+    def _restore(self, generation):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return None
+        if not self.muted_by_us:
+            return None
+        volume = self.saved_volume
+        self.backend.set_volume(volume)
+        self.muted_by_us = False
+        return volume
+
+    def set_volume(self, volume, wait=False):
+        """直接设置音量（None 表示静音），wait 为 True 时等待执行完成"""
+        def apply():
+            self.backend.set_volume(volume)
+            self.muted_by_us = False
+        future = self.executor.submit('volume.set', apply)
+        if wait:
+            future.result()
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+"""
+单线程哈希时间轮
+
+定时器按到期的刻度放进固定数量的槽位，添加、取消都是 O(1)。
+时间轮本身不创建线程、不主动唤醒：调用方在自己的事件循环里用 next_timeout()
+决定最多等待多久，醒来后调用 advance() 执行已到期的定时器。
+没有定时器时 next_timeout() 返回 None，事件循环可以一直阻塞到下一个事件。
+"""
+
+import itertools
+import math
+import time
+
+
+class _Timer:
+    __slots__ = ('id', 'tick', 'callback', 'args')
+
+    def __init__(self, timer_id, tick, callback, args):
+        self.id = timer_id
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+
+
+class TimerWheel:
+    """哈希时间轮（非线程安全，只在一个线程中使用）
+
+    Args:
+        tick: 每个刻度的时长（秒），定时器最多晚一个刻度执行，不会提前
+        slots: 槽位数，超过 tick * slots 的定时器会在槽位中停留多圈
+        clock: 单调时钟
+    """
+
+    def __init__(self, tick=0.005, slots=256, clock=time.monotonic):
+        self.tick = tick
+        self.slots = slots
+        self.clock = clock
+        self._wheel = [[] for _ in range(slots)]
+        self._timers = {}
+        self._ids = itertools.count(1)
+        self._current = self._tick_of(clock())  # 已处理到的刻度
+
+    def _tick_of(self, now):
+        return int(now / self.tick)
+
+    def __len__(self):
+        return len(self._timers)
+
+    def schedule(self, delay, callback, *args):
+        """delay 秒后执行 callback(*args)，返回定时器 id"""
+        deadline = self.clock() + max(0.0, delay)
+        # 向上取整到刻度，保证不会提前触发
+        tick = max(math.ceil(deadline / self.tick), self._current + 1)
+        timer = _Timer(next(self._ids), tick, callback, args)
+        self._wheel[tick % self.slots].append(timer)
+        self._timers[timer.id] = timer
+        return timer.id
+
+    def cancel(self, timer_id):
+        """取消定时器，返回是否取消成功（已执行或不存在时返回 False）"""
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            return False
+        slot = self._wheel[timer.tick % self.slots]
+        if timer in slot:  # advance() 执行回调前已从槽位中取出
+            slot.remove(timer)
+        return True
+
+    def next_timeout(self):
+        """距离最早一个定时器到期的秒数；没有定时器时返回 None"""
+        if not self._timers:
+            return None
+        earliest = None
+        for offset in range(1, self.slots + 1):
+            tick = self._current + offset
+            for timer in self._wheel[tick % self.slots]:
+                if timer.tick == tick:
+                    earliest = tick
+                    break
+            if earliest is not None:
+                break
+        if earliest is None:
+            # 所有定时器都在一圈之外
+            earliest = min(timer.tick for timer in self._timers.values())
+        return max(0.0, earliest * self.tick - self.clock())
+
+    def advance(self):
+        """执行所有已到期的定时器，返回执行的数量"""
+        now_tick = self._tick_of(self.clock())
+        fired = 0
+        if now_tick <= self._current:
+            return fired
+        # 间隔超过一圈时每个槽位只需检查一次
+        start = max(self._current + 1, now_tick - self.slots + 1)
+        self._current = now_tick
+        for tick in range(start, now_tick + 1):
+            slot = self._wheel[tick % self.slots]
+            if not slot:
+                continue
+            due = [timer for timer in slot if timer.tick <= now_tick]
+            if not due:
+                continue
+            slot[:] = [timer for timer in slot if timer.tick > now_tick]
+            for timer in due:
+                # 前面的回调可能已经取消了这个定时器
+                if self._timers.pop(timer.id, None) is None:
+                    continue
+                fired += 1
+                timer.callback(*timer.args)
+        return fired
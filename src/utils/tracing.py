@@ -0,0 +1,248 @@
+"""
+单次语音输入的延迟追踪
+
+从按下热键到文字粘贴完成，各模块用 tracer.span() 记录嵌套的耗时区间
+（静音、打开音频流、预处理、识别、标点、剪贴板校验、粘贴延迟等）。
+最近 N 次语音输入保存在环形缓冲区中，可导出为 Chrome trace-event JSON，
+在 chrome://tracing 或 https://ui.perfetto.dev 中查看。
+
+关闭时 span() 直接返回空对象；开启时每个区间只记录两次 perf_counter_ns 和一个元组，
+导出时才转换格式。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+class _NullSpan:
+    """追踪关闭时使用的空区间"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('_tracer', '_trace', '_name', '_args', '_start')
+
+    def __init__(self, tracer, trace, name, args):
+        self._tracer = tracer
+        self._trace = trace
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def set(self, **args):
+        """补充区间参数（例如重试次数、音频时长）"""
+        if self._args is None:
+            self._args = {}
+        self._args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.set(error=exc_type.__name__)
+        self._tracer._append(self._trace, self._name, self._start, end, self._args)
+        return False
+
+
+class UtteranceTrace:
+    """一次语音输入（按下热键到粘贴完成）的全部区间"""
+
+    def __init__(self, index, args=None):
+        self.index = index
+        self.args = args or {}
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.wall_time = time.time()
+        self.events = []  # (名称, 开始ns, 结束ns, 线程id, 参数)
+
+    @property
+    def duration_ms(self):
+        end = self.end_ns
+        if end is None:
+            end = max((event[2] for event in self.events), default=self.start_ns)
+        return (end - self.start_ns) / 1e6
+
+    def summary(self):
+        """按区间名称汇总耗时（毫秒）"""
+        totals = {}
+        for name, start, end, _, _ in self.events:
+            totals[name] = totals.get(name, 0.0) + (end - start) / 1e6
+        return {
+            'index': self.index,
+            'total_ms': round(self.duration_ms, 1),
+            'spans': {name: round(ms, 2) for name, ms in totals.items()}
+        }
+
+
+class Tracer:
+    """延迟追踪器（进程内单例，使用模块级的 tracer）"""
+
+    def __init__(self, max_utterances=20):
+        self.enabled = False
+        self._utterances = deque(maxlen=max_utterances)
+        self._current = None
+        self._count = 0
+        self._local = threading.local()
+        self._thread_names = {}
+
+    def configure(self, enabled=True, max_utterances=None):
+        self.enabled = bool(enabled)
+        if max_utterances and max_utterances != self._utterances.maxlen:
+            self._utterances = deque(self._utterances, maxlen=max_utterances)
+
+    # ---- 语音输入 ----
+
+    def begin_utterance(self, **args):
+        """开始一次新的语音输入（按下热键时调用），返回 UtteranceTrace"""
+        if not self.enabled:
+            return None
+        previous = self._current
+        if previous is not None and previous.end_ns is None and previous.events:
+            previous.end_ns = max(event[2] for event in previous.events)
+        self._count += 1
+        trace = UtteranceTrace(self._count, args)
+        self._utterances.append(trace)
+        self._current = trace
+        return trace
+
+    def end_utterance(self, trace=None):
+        """结束语音输入（文字粘贴完成时调用）"""
+        trace = trace or self.current_trace
+        if trace is not None and trace.end_ns is None:
+            trace.end_ns = time.perf_counter_ns()
+
+    @property
+    def current_trace(self):
+        """当前线程对应的语音输入：优先使用 activate() 指定的，否则为最近开始的一次"""
+        trace = getattr(self._local, 'trace', None)
+        return trace if trace is not None else self._current
+
+    def activate(self, trace):
+        """在当前线程中把后续区间记到指定的语音输入上（转写线程处理排队任务时使用）"""
+        return _Activation(self, trace)
+
+    # ---- 区间 ----
+
+    def span(self, name, args=None, trace=None):
+        """记录一个耗时区间：with tracer.span('asr.decode', {'seconds': 3.2}): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        trace = trace or self.current_trace
+        if trace is None:
+            return _NULL_SPAN
+        return _Span(self, trace, name, args)
+
+    def add_span(self, name, start_ns, end_ns, args=None, trace=None):
+        """记录一个已知起止时间的区间（例如定时器延迟）"""
+        if not self.enabled:
+            return
+        trace = trace or self.current_trace
+        if trace is not None:
+            self._append(trace, name, start_ns, end_ns, args)
+
+    def traced(self, name):
+        """装饰器：把整个函数调用记为一个区间"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _append(self, trace, name, start, end, args):
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        # list.append 在 GIL 下是原子的，多个线程可以同时记录
+        trace.events.append((name, start, end, tid, args))
+
+    # ---- 导出 ----
+
+    def get_utterances(self, last=None):
+        utterances = list(self._utterances)
+        return utterances[-last:] if last else utterances
+
+    def get_summary(self, last=None):
+        return [trace.summary() for trace in self.get_utterances(last)]
+
+    def to_chrome_trace(self, last=None):
+        """转换为 Chrome trace-event 格式，每次语音输入显示为一个进程，时间从按下热键算起"""
+        events = []
+        for trace in self.get_utterances(last):
+            pid = trace.index
+            started = time.strftime('%H:%M:%S', time.localtime(trace.wall_time))
+            events.append({'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+                           'args': {'name': f"语音输入 #{trace.index} {started}（{trace.duration_ms:.0f}ms）"}})
+            events.append({'ph': 'M', 'name': 'process_sort_index', 'pid': pid, 'tid': 0,
+                           'args': {'sort_index': trace.index}})
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': 0,
+                           'args': {'name': 'utterance'}})
+            events.append({'ph': 'X', 'name': 'utterance', 'pid': pid, 'tid': 0, 'ts': 0.0,
+                           'dur': trace.duration_ms * 1000, 'args': trace.args})
+
+            for tid in sorted({event[3] for event in trace.events}):
+                events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid,
+                               'args': {'name': self._thread_names.get(tid, str(tid))}})
+            for name, start, end, tid, args in trace.events:
+                event = {'ph': 'X', 'name': name, 'cat': name.split('.', 1)[0], 'pid': pid, 'tid': tid,
+                         'ts': (start - trace.start_ns) / 1000, 'dur': (end - start) / 1000}
+                if args:
+                    event['args'] = args
+                events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path, last=None):
+        """导出为 Chrome trace JSON 文件，返回文件路径"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(last), f, ensure_ascii=False, default=str)
+        return path
+
+
+class _Activation:
+    __slots__ = ('_tracer', '_trace', '_previous')
+
+    def __init__(self, tracer, trace):
+        self._tracer = tracer
+        self._trace = trace
+
+    def __enter__(self):
+        local = self._tracer._local
+        self._previous = getattr(local, 'trace', None)
+        local.trace = self._trace
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracer._local.trace = self._previous
+        return False
+
+
+tracer = Tracer()
+
+# 应用中本模块可能分别以 utils.tracing 和 src.utils.tracing 导入，
+# 让两个名字指向同一个模块对象，保证整个进程只有一个 tracer
+for _name in ('utils.tracing', 'src.utils.tracing'):
+    sys.modules.setdefault(_name, sys.modules[__name__])
@@ -0,0 +1,176 @@
+"""流式语音活动检测（VAD）
+
+在采集线程中逐块处理音频，按帧计算能量、过零率和谱通量，
+结合自适应噪声底和起止保持时间输出语音段边界，供转写前裁掉静音。
+"""
+
+import time
+import numpy as np
+
+
+class StreamingVAD:
+    """基于能量 / 过零率 / 谱通量的流式 VAD
+
+    - 每帧（默认 30ms）能量需高于噪声底的 energy_ratio 倍，且 RMS 高于 min_rms
+    - 高过零率且频谱平稳的帧视为噪声（如风扇声），有谱通量变化的清辅音仍算作语音
+    - 连续 min_speech_ms 的语音帧才开始一个语音段，连续 min_silence_ms 的静音帧才结束
+    - 输出的语音段以采样点为单位，裁剪时两侧各保留 pad_ms
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, min_speech_ms=90, min_silence_ms=300,
+                 pad_ms=200, energy_ratio=3.0, min_rms=0.003, zcr_max=0.35, flux_min=0.25):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.pad_samples = int(sample_rate * pad_ms / 1000)
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_rms ** 2
+        self.zcr_max = zcr_max
+        self.flux_min = flux_min
+        self._window = np.hanning(self.frame_size).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """开始新的一段录音"""
+        self.segments = []              # 已结束的语音段 [(start, end)]，单位为采样点
+        self._buffer = np.zeros(0, dtype=np.float32)   # 预分配的分帧缓冲区，开头是不足一帧的剩余采样
+        self._pending_length = 0
+        self._frame_index = 0           # 已处理的帧数
+        self._noise_energy = None       # 自适应噪声底
+        self._prev_spectrum = None
+        self._in_speech = False
+        self._run_start = None          # 当前连续语音帧的起始帧
+        self._run_length = 0
+        self._silence_length = 0
+        self._last_voiced = 0
+        self.process_seconds = 0.0      # VAD 自身耗时
+
+    @property
+    def total_samples(self):
+        return self._frame_index * self.frame_size + self._pending_length
+
+    def _frame_features(self, frames):
+        """批量计算每帧的能量、过零率和谱通量"""
+        energy = np.mean(frames * frames, axis=1)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1))
+        previous = np.empty_like(spectrum)
+        previous[0] = spectrum[0] if self._prev_spectrum is None else self._prev_spectrum
+        previous[1:] = spectrum[:-1]
+        self._prev_spectrum = spectrum[-1]
+        flux = np.maximum(spectrum - previous, 0).sum(axis=1) / (spectrum.sum(axis=1) + 1e-9)
+        return energy, zcr, flux
+
+    def process(self, samples):
+        """处理一块 float32 音频，返回本次新结束的语音段"""
+        start_time = time.perf_counter()
+        samples = np.asarray(samples, dtype=np.float32)
+        # 追加到预分配缓冲区的剩余采样之后，容量不足时按两倍扩容，避免每个回调块都拼接一次
+        pending = self._pending_length
+        total = pending + len(samples)
+        if total > len(self._buffer):
+            grown = np.empty(max(total, 2 * len(self._buffer)), dtype=np.float32)
+            grown[:pending] = self._buffer[:pending]
+            self._buffer = grown
+        self._buffer[pending:total] = samples
+        frame_count = total // self.frame_size
+        used = frame_count * self.frame_size
+        if frame_count == 0:
+            self._pending_length = total
+            return []
+
+        energy, zcr, flux = self._frame_features(self._buffer[:used].reshape(frame_count, self.frame_size))
+        # 特征已算完，把不足一帧的剩余采样移到缓冲区开头
+        self._buffer[:total - used] = self._buffer[used:total]
+        self._pending_length = total - used
+        if self._noise_energy is None:
+            # 用最安静的几帧初始化噪声底；不超过 min_rms 对应的能量，
+            # 避免一开口就录音时把语音当成噪声底
+            self._noise_energy = max(min(float(np.percentile(energy, 10)), self.min_energy), 1e-10)
+
+        loud = energy > self.min_energy
+        noise_like = (zcr > self.zcr_max) & (flux < self.flux_min)
+
+        closed = []
+        for i in range(frame_count):
+            frame_number = self._frame_index + i
+            voiced = bool(loud[i]) and energy[i] > self._noise_energy * self.energy_ratio and not noise_like[i]
+            if not voiced:
+                # 只用非语音帧更新噪声底
+                self._noise_energy = 0.95 * self._noise_energy + 0.05 * max(float(energy[i]), 1e-10)
+            closed.extend(self._update_state(frame_number, voiced))
+
+        self._frame_index += frame_count
+        self.process_seconds += time.perf_counter() - start_time
+        return closed
+
+    def _update_state(self, frame_number, voiced):
+        if voiced:
+            self._silence_length = 0
+            self._last_voiced = frame_number
+            if self._run_start is None:
+                self._run_start = frame_number
+            self._run_length += 1
+            if not self._in_speech and self._run_length >= self.min_speech_frames:
+                self._in_speech = True
+                self._segment_start = self._run_start
+            return []
+
+        self._run_start = None
+        self._run_length = 0
+        if self._in_speech:
+            self._silence_length += 1
+            if self._silence_length >= self.min_silence_frames:
+                return [self._close_segment()]
+        return []
+
+    def _close_segment(self):
+        segment = (self._segment_start * self.frame_size, (self._last_voiced + 1) * self.frame_size)
+        self.segments.append(segment)
+        self._in_speech = False
+        self._silence_length = 0
+        return segment
+
+    def finish(self):
+        """录音结束，关闭仍在进行的语音段，返回全部语音段"""
+        if self._in_speech:
+            self._close_segment()
+        return list(self.segments)
+
+    def speech_mask(self, length, offset=0):
+        """生成长度为 length 的采样掩码（语音段两侧各扩展 pad_samples）
+
+        offset 为 audio[0] 对应的录音采样位置，缓冲区丢弃了开头时使用。
+        """
+        mask = np.zeros(length, dtype=bool)
+        for start, end in self.segments:
+            start = max(0, start - self.pad_samples - offset)
+            end = min(length, end + self.pad_samples - offset)
+            if start < end:
+                mask[start:end] = True
+        return mask
+
+    def extract_speech(self, audio, offset=0):
+        """只保留语音段的采样；没有检测到语音时原样返回，避免误删"""
+        segments = self.finish()
+        if not segments:
+            return audio
+        return audio[self.speech_mask(len(audio), offset)]
+
+    def get_stats(self, kept_samples=None):
+        """本次录音的 VAD 统计，kept_samples 为送去解码的采样数"""
+        total = self.total_samples
+        speech = sum(end - start for start, end in self.segments)
+        kept = total if kept_samples is None else kept_samples
+        return {
+            'segments': len(self.segments),
+            'total_seconds': round(total / self.sample_rate, 2),
+            'speech_seconds': round(speech / self.sample_rate, 2),
+            'decoded_seconds': round(kept / self.sample_rate, 2),
+            # 解码耗时近似与采样数成正比
+            'compute_saved': round(1 - kept / total, 3) if total else 0.0,
+            'vad_ms': round(self.process_seconds * 1000, 1)
+        }
@@ -88,7 +88,7 @@ def test_thread_safety():
     print("🔍 测试线程安全性...")
     
     try:
-        from audio_threads import AudioCaptureThread, TranscriptionThread
+        from audio_threads import AudioCaptureThread, TranscriptionWorker
         from audio_capture import AudioCapture
         import numpy as np
         
@@ -0,0 +1,144 @@
+"""
+Hammerspoon 热键通道测试
+
+不需要 Hammerspoon：用一个本地写入端代替 Lua 脚本，按 Lua 脚本的协议发送
+按下 / 释放事件，检查：
+- 两个通道上事件都按发送顺序到达，按下和释放分别调用对应的回调
+- socket 通道的延迟低于文件轮询通道（后备方式）
+
+延迟分布见 tools/benchmark_hotkey_channel.py。
+"""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from hammerspoon_hotkey_manager import HammerspoonHotkeyManager
+
+EVENTS = 20
+# socket 通道单个事件的延迟上限（文件通道按轮询周期读取，通常在几十毫秒）
+MAX_SOCKET_MS = 20
+
+
+class StandInHotkeyManager(HammerspoonHotkeyManager):
+    """不生成、不加载 Lua 脚本，通信路径放在临时目录"""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.communication_file = os.path.join(directory, 'communication.json')
+        self.status_file = os.path.join(directory, 'status.json')
+        self.config_file = os.path.join(directory, 'config.json')
+        self.event_socket_path = os.path.join(directory, 'events.sock')
+
+    def _create_lua_script(self):
+        pass
+
+
+class SocketWriter:
+    """模拟 Lua 端：连接事件 socket，每个事件写一行 JSON"""
+
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def send(self, message):
+        self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+    def close(self):
+        self.sock.close()
+
+
+class FileWriter:
+    """模拟 Lua 端的文件后备方式：覆盖写入通信文件"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, message):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(message, f)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        pass
+
+
+def run_channel(channel, events=EVENTS):
+    """发送 events 个交替的按下/释放事件，返回 (收到的动作列表, 每个事件的延迟毫秒)"""
+    manager = StandInHotkeyManager(tempfile.mkdtemp(prefix='hotkey_channel_'))
+    received = threading.Event()
+    actions = []
+    received_at = [0.0]
+
+    def callback(action):
+        def on_event():
+            received_at[0] = time.perf_counter()
+            actions.append(action)
+            received.set()
+        return on_event
+
+    manager.set_press_callback(callback('press'))
+    manager.set_release_callback(callback('release'))
+    if channel == 'socket':
+        assert manager._open_event_socket(), "无法创建 Unix socket"
+    manager._start_monitoring()
+
+    if channel == 'socket':
+        writer = SocketWriter(manager.event_socket_path)
+    else:
+        writer = FileWriter(manager.communication_file)
+        time.sleep(0.2)  # 等监控线程读完初始状态
+
+    latencies = []
+    try:
+        for seq in range(1, events + 1):
+            received.clear()
+            message = {'action': 'press' if seq % 2 else 'release', 'seq': seq,
+                       'timestamp': time.time(), 'hotkey_type': 'fn'}
+            sent_at = time.perf_counter()
+            writer.send(message)
+            assert received.wait(timeout=2), f"{channel} 通道第 {seq} 个事件超时"
+            latencies.append((received_at[0] - sent_at) * 1000)
+            time.sleep(0.01)
+    finally:
+        writer.close()
+        manager._stop_monitoring()
+        manager._close_event_socket()
+    return actions, sorted(latencies)
+
+
+def expected_actions(events=EVENTS):
+    return ['press' if seq % 2 else 'release' for seq in range(1, events + 1)]
+
+
+def test_socket_channel_in_order_and_fast():
+    actions, latencies = run_channel('socket')
+    assert actions == expected_actions()
+    median = latencies[len(latencies) // 2]
+    assert median < MAX_SOCKET_MS, f"socket 通道延迟中位数 {median:.1f}ms，超过 {MAX_SOCKET_MS}ms"
+
+
+def test_socket_channel_faster_than_file():
+    file_actions, file_latencies = run_channel('file')
+    assert file_actions == expected_actions()
+    _, socket_latencies = run_channel('socket')
+    socket_median = socket_latencies[len(socket_latencies) // 2]
+    file_median = file_latencies[len(file_latencies) // 2]
+    assert socket_median < file_median, \
+        f"socket 通道 {socket_median:.1f}ms 不快于文件通道 {file_median:.1f}ms"
+
+
+if __name__ == "__main__":
+    test_socket_channel_in_order_and_fast()
+    test_socket_channel_faster_than_file()
+    print("测试通过")
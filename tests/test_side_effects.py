@@ -0,0 +1,150 @@
+"""
+开始录音关键路径上的系统副作用测试
+
+用模拟的音量后端代替 osascript（每次调用固定耗时），检查：
+- 按下热键到录音线程启动的延迟不包含 osascript 调用
+- 按下 / 松开后音量恢复为原值
+- 恢复执行前又按下热键时，录音期间保持静音，也不会把 0 当作原音量保存
+
+耗时对比见 tools/benchmark_side_effects.py。
+"""
+
+import os
+import sys
+import threading
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from utils.side_effects import VolumeController
+
+OSASCRIPT_MS = 80
+# 按下热键到录音线程启动的上限：远小于一次 osascript 调用
+MAX_START_MS = OSASCRIPT_MS / 4
+
+
+class StubVolumeBackend:
+    """模拟 osascript：每次调用固定耗时"""
+
+    def __init__(self, cost_ms=OSASCRIPT_MS, volume=50):
+        self.cost = cost_ms / 1000
+        self.volume = volume
+        self.muted = False
+        self._lock = threading.Lock()
+
+    def get_volume(self):
+        time.sleep(self.cost)
+        with self._lock:
+            return 0 if self.muted else self.volume
+
+    def set_volume(self, volume):
+        time.sleep(self.cost)
+        with self._lock:
+            if volume is None:
+                self.muted = True
+            else:
+                self.volume = volume
+                self.muted = False
+
+
+class StubStateManager:
+    def start_recording(self):
+        pass
+
+    def stop_recording(self):
+        pass
+
+
+class StubSettings:
+    def get_setting(self, key, default=None):
+        return default
+
+    def get_max_recording_duration(self):
+        return 0
+
+
+class StubCapture:
+    capture_mode = 'callback'
+
+    def configure_vad(self, **kwargs):
+        pass
+
+    def configure_long_dictation(self, **kwargs):
+        pass
+
+
+class StubCaptureThread:
+    """记录 start() 被调用的时间"""
+
+    def __init__(self):
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def isFinished(self):
+        return False
+
+
+def make_wrapper(backend):
+    from managers.audio_manager_wrapper import AudioManagerWrapper
+
+    wrapper = AudioManagerWrapper()
+    wrapper._original_capture = StubCapture()
+    wrapper._initialized = True
+    wrapper.volume_controller = VolumeController(backend=backend)
+    return wrapper
+
+
+def drain(wrapper):
+    """等待副作用线程执行完已提交的操作"""
+    wrapper.volume_controller.executor.submit('drain', lambda: None).result()
+
+
+def start(wrapper):
+    thread = StubCaptureThread()
+    pressed = time.perf_counter()
+    token, _ = wrapper.start_recording_process(StubStateManager(), thread, StubSettings(), lambda ms: None)
+    return token, (thread.started_at - pressed) * 1000
+
+
+def test_start_latency_excludes_volume_calls():
+    backend = StubVolumeBackend()
+    wrapper = make_wrapper(backend)
+    try:
+        latencies = []
+        for _ in range(10):
+            token, latency = start(wrapper)
+            latencies.append(latency)
+            wrapper.restore_volume_async(token)
+        drain(wrapper)
+        latencies.sort()
+        median = latencies[len(latencies) // 2]
+        assert median < MAX_START_MS, f"按下热键到录音线程启动 {median:.1f}ms，超过 {MAX_START_MS}ms"
+        assert backend.volume == 50 and not backend.muted
+    finally:
+        wrapper.volume_controller.shutdown()
+
+
+def test_repress_before_restore_keeps_muted():
+    backend = StubVolumeBackend()
+    wrapper = make_wrapper(backend)
+    try:
+        token1, _ = start(wrapper)
+        token2, _ = start(wrapper)
+        wrapper.restore_volume_async(token1)
+        drain(wrapper)
+        assert backend.muted, "第二次录音期间被取消静音"
+        wrapper.set_system_volume(token2)
+        assert backend.volume == 50 and not backend.muted
+    finally:
+        wrapper.volume_controller.shutdown()
+
+
+if __name__ == "__main__":
+    test_start_latency_excludes_volume_calls()
+    test_repress_before_restore_keeps_muted()
+    print("测试通过")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+音频采集路径对比：阻塞读取 vs 回调写入环形缓冲区
+
+用模拟的 PyAudio 流代替真实麦克风，分别以 blocking 和 callback 模式
+驱动 AudioCapture，统计每采集 1 秒音频的 CPU 时间和内存分配峰值。
+
+用法:
+    python tools/benchmark_capture.py --seconds 30
+    python tools/benchmark_capture.py --seconds 10 --realtime   # 按真实速度产生音频
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+CALLBACK_FRAMES = 512
+
+
+class FakeStream:
+    """模拟 PyAudio 输入流：阻塞模式按需返回 bytes，回调模式由后台线程定时回调"""
+
+    def __init__(self, source, stream_callback=None, realtime=False):
+        self._source = source
+        self._position = 0
+        self._callback = stream_callback
+        self._realtime = realtime
+        self._active = True
+        self._thread = None
+        if stream_callback is not None:
+            self._thread = threading.Thread(target=self._feed, daemon=True)
+            self._thread.start()
+
+    def _next_bytes(self, frames):
+        chunk = self._source[self._position:self._position + frames]
+        self._position += len(chunk)
+        if self._position >= len(self._source):
+            self._active = False
+        # 与 PortAudio 一样，每次都生成新的 bytes 对象
+        return chunk.tobytes()
+
+    def _feed(self):
+        while self._active:
+            data = self._next_bytes(CALLBACK_FRAMES)
+            self._callback(data, CALLBACK_FRAMES, {}, 0)
+            if self._realtime:
+                time.sleep(CALLBACK_FRAMES / SAMPLE_RATE)
+
+    def read(self, frames, exception_on_overflow=True):
+        if self._realtime:
+            time.sleep(frames / SAMPLE_RATE)
+        return self._next_bytes(frames)
+
+    def is_active(self):
+        return self._active or (self._thread is not None and self._thread.is_alive())
+
+    def stop_stream(self):
+        self._active = False
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.join()
+
+
+class FakePyAudioModule:
+    """替换 audio_capture 模块中的 pyaudio"""
+    paFloat32 = 1
+    paContinue = 0
+
+    def __init__(self, source, realtime):
+        self._source = source
+        self._realtime = realtime
+
+    def PyAudio(self):
+        return self
+
+    def get_default_input_device_info(self):
+        return {'index': 0, 'name': 'fake'}
+
+    def open(self, stream_callback=None, **kwargs):
+        return FakeStream(self._source, stream_callback, self._realtime)
+
+    def terminate(self):
+        pass
+
+
+def run_capture(mode, source, realtime, use_vad):
+    import audio_capture
+
+    audio_capture.pyaudio = FakePyAudioModule(source, realtime)
+    capture = audio_capture.AudioCapture()
+    capture.capture_mode = mode
+    capture.vad_enabled = use_vad
+
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    capture.start_recording()
+    reads = 0
+    while capture.stream is not None and capture.stream.is_active():
+        data = capture.read_audio()
+        if data is None:
+            break
+        reads += 1
+    audio = capture.stop_recording()
+
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = len(audio) / SAMPLE_RATE
+    capture.stream = None
+    capture.audio = None  # 跳过 _cleanup 中等待真实设备释放的 sleep
+    return {
+        'mode': mode,
+        'captured_seconds': seconds,
+        'reads': reads,
+        'cpu_ms_per_second': cpu * 1000 / seconds if seconds else 0.0,
+        'wall_seconds': wall,
+        'peak_mb': peak / (1024 * 1024),
+        # 返回的录音是否直接引用环形缓冲区（没有再复制一遍）
+        'zero_copy': bool(np.shares_memory(audio, capture.ring._buffer))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="阻塞读取与回调环形缓冲区的采集开销对比")
+    parser.add_argument('--seconds', type=float, default=30.0, help="模拟采集时长（秒，不超过64秒缓冲上限）")
+    parser.add_argument('--realtime', action='store_true', help="按真实速度产生音频")
+    parser.add_argument('--vad', action='store_true', help="同时运行VAD")
+    args = parser.parse_args()
+
+    t = np.arange(int(args.seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    source = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    print(f"{'模式':<10}{'采集(s)':>9}{'读取次数':>10}{'CPU(ms/s)':>12}{'峰值内存(MB)':>14}{'零拷贝':>8}")
+    for mode in ('blocking', 'callback'):
+        r = run_capture(mode, source, args.realtime, args.vad)
+        print(f"{r['mode']:<10}{r['captured_seconds']:>9.1f}{r['reads']:>10}{r['cpu_ms_per_second']:>12.2f}"
+              f"{r['peak_mb']:>14.2f}{'是' if r['zero_copy'] else '否':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+历史记录子串搜索耗时测试
+
+生成 --entries 条中英文混合的历史记录，对比：
+- 逐条扫描：对每条记录的规范化文本做 `in` 判断
+- HistorySearchIndex：n-gram 倒排索引取候选后核对
+
+同时统计索引构建、快照写入和读取的耗时以及快照大小，并检查两种方式的结果是否一致。
+在临时目录中运行。
+
+用法:
+    python tools/benchmark_history_search.py --entries 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from history_index import HistorySearchIndex, normalize
+
+WORDS = ['今天', '会议', '项目', '进度', '客户', '需求', '文档', '测试', '发布', '语音', '输入',
+         '识别', '结果', '明天', '下午', '讨论', '方案', '修改', '确认', '邮件', '周报', '数据']
+LATIN = ['Python', 'FunASR', 'GitHub', 'API', 'macOS', 'PyQt6', 'SQLite', 'OK', 'v2']
+
+QUERIES = [
+    ('两字中文', '会议'),
+    ('四字中文', '项目进度'),
+    ('英文', 'funasr'),
+    ('中英混合', 'Python测试'),
+    ('唯一记录', '编号 77777 的记录'),
+    ('单字', '会'),
+    ('无结果', '不存在的内容'),
+]
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        parts = rng.choices(WORDS, k=rng.randint(6, 14))
+        parts.insert(rng.randint(0, len(parts)), rng.choice(LATIN))
+        texts.append(''.join(parts) + f"，编号 {i} 的记录。")
+    return texts
+
+
+def timed(func, repeat=5):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史记录子串搜索耗时测试")
+    parser.add_argument('--entries', type=int, default=100000, help="历史记录条数")
+    parser.add_argument('--limit', type=int, default=50, help="每次搜索返回的条数")
+    args = parser.parse_args()
+
+    texts = make_texts(args.entries)
+    rows = list(enumerate(texts, start=1))
+    normalized = [(entry_id, normalize(text)) for entry_id, text in rows]
+
+    def scan(query):
+        needle = normalize(query).strip()
+        results = []
+        for entry_id, text in reversed(normalized):
+            if needle in text:
+                results.append(entry_id)
+                if len(results) >= args.limit:
+                    break
+        return results
+
+    def build():
+        index = HistorySearchIndex()
+        index.add_many(rows)
+        return index
+
+    build_ms, index = timed(build, repeat=1)
+    snapshot_path = os.path.join(tempfile.mkdtemp(prefix='history_search_bench_'), 'history.idx')
+    save_ms, _ = timed(lambda: index.save(snapshot_path), repeat=3)
+    load_ms, loaded = timed(lambda: HistorySearchIndex.load(snapshot_path), repeat=3)
+    size_mb = os.path.getsize(snapshot_path) / 1e6
+
+    print(f"{args.entries} 条历史记录：构建索引 {build_ms:.0f} ms，写入快照 {save_ms:.0f} ms，"
+          f"读取快照 {load_ms:.0f} ms，快照 {size_mb:.1f} MB\n")
+    print(f"{'查询':<10}{'命中':>6}{'逐条扫描(ms)':>14}{'索引(ms)':>10}{'结果一致':>10}")
+    for name, query in QUERIES:
+        scan_ms, expected = timed(lambda: scan(query))
+        index_ms, found = timed(lambda: loaded.search(query, args.limit))
+        same = '是' if found == expected else '否'
+        print(f"{name:<10}{len(found):>6}{scan_ms:>14.2f}{index_ms:>10.3f}{same:>10}")
+
+
+if __name__ == '__main__':
+    main()
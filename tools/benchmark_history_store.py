@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+历史记录存储的启动加载和追加耗时测试
+
+生成 --entries 条历史记录，对比：
+- history.json（indent=2 的 JSON 数组）：启动时整体读取解析，每次添加整体重写
+- HistoryStore（SQLite WAL）：启动时只读取最近一页，每次添加追加一行
+
+同时统计从 history.json 一次性导入数据库的耗时。在临时目录中运行。
+
+用法:
+    python tools/benchmark_history_store.py --entries 100000 --page 30
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from history_store import HistoryStore
+
+
+def make_entries(count):
+    start = datetime(2020, 1, 1)
+    return [{'text': f"第 {i} 条语音输入的识别结果，包含一些常见的中文内容和 Python 之类的热词。",
+             'timestamp': (start + timedelta(minutes=i)).isoformat()}
+            for i in range(count)]
+
+
+def timed(func, repeat=5):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史记录存储的启动加载和追加耗时测试")
+    parser.add_argument('--entries', type=int, default=100000, help="历史记录条数")
+    parser.add_argument('--page', type=int, default=30, help="启动时显示的条数")
+    parser.add_argument('--appends', type=int, default=20, help="追加测试次数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='history_bench_')
+    json_path = os.path.join(workdir, 'history.json')
+    entries = make_entries(args.entries)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    size_mb = os.path.getsize(json_path) / 1e6
+
+    def load_json():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.sort(key=lambda x: x.get('timestamp', ''))
+        return data[-args.page:]
+
+    def append_json():
+        entries.append({'text': "新的识别结果", 'timestamp': datetime.now().isoformat()})
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+
+    json_load_ms, _ = timed(load_json)
+    json_append_ms, _ = timed(append_json, args.appends)
+
+    db_path = os.path.join(workdir, 'history.db')
+    start = time.perf_counter()
+    store = HistoryStore(db_path, json_path=json_path)
+    migrate_ms = (time.perf_counter() - start) * 1000
+    migrated = store.count()
+    store.close()
+
+    def open_and_load():
+        s = HistoryStore(db_path, json_path=json_path)
+        page = s.latest(args.page)
+        s.close()
+        return page
+
+    store_load_ms, page = timed(open_and_load)
+    store = HistoryStore(db_path)
+    store_append_ms, _ = timed(lambda: store.append("新的识别结果"), args.appends)
+    older_ms, _ = timed(lambda: store.latest(args.page, before_id=page[0]['id']))
+    range_ms, _ = timed(lambda: store.between('2020-02-01', '2020-02-02'))
+    store.close()
+
+    print(f"{args.entries} 条历史记录（history.json {size_mb:.1f} MB），导入数据库 {migrated} 条，"
+          f"耗时 {migrate_ms:.0f} ms\n")
+    print(f"{'操作':<20}{'history.json(ms)':>18}{'SQLite(ms)':>14}")
+    print(f"{'启动加载最近 ' + str(args.page) + ' 条':<20}{json_load_ms:>18.2f}{store_load_ms:>14.2f}")
+    print(f"{'添加一条':<20}{json_append_ms:>18.2f}{store_append_ms:>14.2f}")
+    print(f"{'读取更早一页':<20}{'-':>18}{older_ms:>14.2f}")
+    print(f"{'按时间读取一天':<20}{'-':>18}{range_ms:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Hammerspoon 热键通道延迟测试
+
+不需要 Hammerspoon：用一个本地写入端代替 Lua 脚本，按 Lua 脚本的协议发送
+按下 / 释放事件，测量从写入到 HammerspoonHotkeyManager 回调被调用的延迟。
+分别测试 socket 通道和文件轮询通道（后备方式）。事件没有按顺序到达，
+或者 socket 通道不比文件通道快时以非零状态退出（同样的检查见 tests/test_hotkey_channel.py）。
+
+用法:
+    python tools/benchmark_hotkey_channel.py --events 200
+    python tools/benchmark_hotkey_channel.py --channel socket --interval 0.02
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from hammerspoon_hotkey_manager import HammerspoonHotkeyManager
+
+
+class StandInHotkeyManager(HammerspoonHotkeyManager):
+    """不生成、不加载 Lua 脚本，通信路径放在临时目录"""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.communication_file = os.path.join(directory, 'communication.json')
+        self.status_file = os.path.join(directory, 'status.json')
+        self.config_file = os.path.join(directory, 'config.json')
+        self.event_socket_path = os.path.join(directory, 'events.sock')
+
+    def _create_lua_script(self):
+        pass
+
+
+class SocketWriter:
+    """模拟 Lua 端：连接事件 socket，每个事件写一行 JSON"""
+
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def send(self, message):
+        self.sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+    def close(self):
+        self.sock.close()
+
+
+class FileWriter:
+    """模拟 Lua 端的文件后备方式：覆盖写入通信文件"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, message):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(message, f)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        pass
+
+
+def run_channel(channel, events, interval):
+    """发送 events 个按下/释放事件，返回 (每个事件的延迟毫秒, 是否按顺序调用了对应的回调)"""
+    directory = tempfile.mkdtemp(prefix='hotkey_channel_')
+    manager = StandInHotkeyManager(directory)
+    received = threading.Event()
+    received_at = [0]
+    actions = []
+
+    def callback(action):
+        def on_event():
+            received_at[0] = time.perf_counter()
+            actions.append(action)
+            received.set()
+        return on_event
+
+    manager.set_press_callback(callback('press'))
+    manager.set_release_callback(callback('release'))
+    if channel == 'socket' and not manager._open_event_socket():
+        raise RuntimeError("无法创建 Unix socket")
+    manager._start_monitoring()
+
+    if channel == 'socket':
+        writer = SocketWriter(manager.event_socket_path)
+    else:
+        writer = FileWriter(manager.communication_file)
+        time.sleep(0.2)  # 等监控线程读完初始状态
+
+    latencies = []
+    try:
+        for seq in range(1, events + 1):
+            received.clear()
+            message = {'action': 'press' if seq % 2 else 'release', 'seq': seq,
+                       'timestamp': time.time(), 'hotkey_type': 'fn'}
+            sent_at = time.perf_counter()
+            writer.send(message)
+            if not received.wait(timeout=2):
+                raise RuntimeError(f"{channel} 通道第 {seq} 个事件超时")
+            latencies.append((received_at[0] - sent_at) * 1000)
+            # 随机化发送时刻相对轮询周期的相位
+            time.sleep(interval * (0.5 + np.random.random()))
+    finally:
+        writer.close()
+        manager._stop_monitoring()
+    in_order = actions == ['press' if seq % 2 else 'release' for seq in range(1, events + 1)]
+    return np.array(latencies), in_order
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammerspoon 热键通道延迟测试")
+    parser.add_argument('--events', type=int, default=100, help="每个通道发送的事件数（按下、释放交替）")
+    parser.add_argument('--interval', type=float, default=0.05, help="事件之间的平均间隔（秒）")
+    parser.add_argument('--channel', choices=['socket', 'file', 'both'], default='both')
+    args = parser.parse_args()
+
+    channels = ['socket', 'file'] if args.channel == 'both' else [args.channel]
+    print(f"{'通道':<8}{'事件数':>8}{'中位数(ms)':>12}{'p95(ms)':>10}{'最大(ms)':>10}{'顺序':>6}")
+    medians = {}
+    ok = True
+    for channel in channels:
+        latencies, in_order = run_channel(channel, args.events, args.interval)
+        medians[channel] = float(np.median(latencies))
+        ok = ok and in_order
+        print(f"{channel:<8}{len(latencies):>8}{medians[channel]:>12.3f}"
+              f"{np.percentile(latencies, 95):>10.3f}{latencies.max():>10.3f}{'正确' if in_order else '错误':>6}")
+    if len(medians) == 2 and medians['socket'] >= medians['file']:
+        print("socket 通道不快于文件通道")
+        ok = False
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+热键状态机的延迟和唤醒次数测试
+
+用模拟的按键事件源驱动 HotkeyStateMachine（不需要 pynput / Quartz / 辅助功能权限），
+统计：
+- 按下热键到 press 回调的延迟（fn：立即开始；ctrl：扣除启动延迟后的定时器误差）
+- 组合键（ctrl+c）是否被正确忽略
+- 空闲和连续按键时状态机线程每秒被唤醒的次数
+
+同时运行一个与旧实现相同的 10Hz 轮询循环作为对照。
+
+用法:
+    python tools/benchmark_hotkey_state_machine.py --presses 50 --idle 3
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from hotkey_state_machine import HotkeyStateMachine, KeyEventSource
+
+
+class SyntheticKeySource(KeyEventSource):
+    """模拟按键事件源：在调用线程中直接把事件送给状态机"""
+
+    def __init__(self):
+        self._sink = None
+
+    def start(self, sink):
+        self._sink = sink
+        return True
+
+    def stop(self):
+        self._sink = None
+
+    def is_running(self):
+        return self._sink is not None
+
+    def down(self, key):
+        self._sink('down', key)
+
+    def up(self, key):
+        self._sink('up', key)
+
+
+class LegacyPoller:
+    """旧实现的 fn 键监听方式：每 100ms 读取一次按键状态"""
+
+    def __init__(self):
+        self.fn_down = False
+        self.on_press = None
+        self.wakeups = 0
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop = True
+        self._thread.join()
+
+    def _run(self):
+        last = False
+        while not self._stop:
+            self.wakeups += 1
+            if self.fn_down != last:
+                last = self.fn_down
+                if last and self.on_press:
+                    self.on_press()
+            time.sleep(0.1)
+
+
+class CallbackProbe:
+    def __init__(self):
+        self.event = threading.Event()
+        self.at = 0.0
+        self.count = 0
+
+    def __call__(self):
+        self.at = time.perf_counter()
+        self.count += 1
+        self.event.set()
+
+
+def measure_presses(source, probe, hotkey, presses, hold):
+    """按下热键并等待 press 回调，返回每次的延迟（毫秒）"""
+    latencies = []
+    for _ in range(presses):
+        probe.event.clear()
+        start = time.perf_counter()
+        source.down(hotkey)
+        if probe.event.wait(timeout=2):
+            latencies.append((probe.at - start) * 1000)
+        time.sleep(hold)
+        source.up(hotkey)
+        time.sleep(0.01 + np.random.random() * 0.02)
+    return np.array(latencies)
+
+
+def report(name, latencies, expected_ms=0.0):
+    excess = latencies - expected_ms
+    print(f"{name:<22}{len(latencies):>6}{np.median(excess):>12.3f}{np.percentile(excess, 95):>10.3f}"
+          f"{excess.max():>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热键状态机的延迟和唤醒次数测试")
+    parser.add_argument('--presses', type=int, default=50, help="每种热键的按下次数")
+    parser.add_argument('--delay', type=float, default=0.2, help="ctrl / alt 的启动延迟（秒）")
+    parser.add_argument('--idle', type=float, default=3.0, help="空闲唤醒统计时长（秒）")
+    args = parser.parse_args()
+
+    machine = HotkeyStateMachine('fn', 0.0)
+    probe = CallbackProbe()
+    released = CallbackProbe()
+    machine.on_press = probe
+    machine.on_release = released
+    source = SyntheticKeySource()
+    machine.start()
+    source.start(machine.feed)
+
+    print(f"{'场景':<20}{'次数':>6}{'中位数(ms)':>12}{'p95(ms)':>10}{'最大(ms)':>10}")
+    report('fn 立即开始', measure_presses(source, probe, 'fn', args.presses, 0.005))
+
+    machine.configure(hotkey='ctrl', start_delay=args.delay)
+    report('ctrl 延迟误差', measure_presses(source, probe, 'ctrl', max(5, args.presses // 5),
+                                         args.delay + 0.01), args.delay * 1000)
+
+    # 组合键：启动延迟内按下 c，不应开始录音
+    before = probe.count
+    for _ in range(10):
+        source.down('ctrl')
+        time.sleep(0.02)
+        source.down('c')
+        source.up('c')
+        time.sleep(args.delay + 0.05)
+        source.up('ctrl')
+        time.sleep(0.06)
+    print(f"组合键 ctrl+c 误触发: {probe.count - before}/10")
+
+    # 空闲唤醒次数
+    time.sleep(0.2)
+    wakeups = machine.stats['wakeups']
+    time.sleep(args.idle)
+    idle_rate = (machine.stats['wakeups'] - wakeups) / args.idle
+
+    # 连续按键时的唤醒次数（每个事件一次，加上定时器）
+    machine.configure(hotkey='fn', start_delay=0.0)
+    wakeups, events = machine.stats['wakeups'], machine.stats['events']
+    start = time.perf_counter()
+    measure_presses(source, probe, 'fn', args.presses, 0.005)
+    elapsed = time.perf_counter() - start
+    active_events = machine.stats['events'] - events
+    active_rate = (machine.stats['wakeups'] - wakeups) / elapsed
+    machine.stop()
+
+    legacy = LegacyPoller()
+    legacy_probe = CallbackProbe()
+    legacy.on_press = legacy_probe
+    legacy.start()
+    legacy_latencies = []
+    for _ in range(max(5, args.presses // 5)):
+        legacy_probe.event.clear()
+        start = time.perf_counter()
+        legacy.fn_down = True
+        if legacy_probe.event.wait(timeout=2):
+            legacy_latencies.append((legacy_probe.at - start) * 1000)
+        legacy.fn_down = False
+        time.sleep(0.15 + np.random.random() * 0.1)
+    wakeups = legacy.wakeups
+    time.sleep(args.idle)
+    legacy_idle_rate = (legacy.wakeups - wakeups) / args.idle
+    legacy.stop()
+    report('10Hz 轮询（旧实现）', np.array(legacy_latencies))
+
+    print(f"\n状态机线程唤醒: 空闲 {idle_rate:.2f} 次/秒，连续按键 {active_rate:.1f} 次/秒"
+          f"（{active_events} 个事件）")
+    print(f"10Hz 轮询线程唤醒: 空闲 {legacy_idle_rate:.2f} 次/秒")
+
+
+if __name__ == '__main__':
+    main()
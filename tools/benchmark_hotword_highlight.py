@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+历史记录热词高亮耗时测试
+
+生成 --hotwords 个热词和 --entries 条历史记录，对比：
+- 旧实现：每次调用都按长度排序热词，再对每个热词执行一次 re.sub
+- HotwordHighlighter：热词编译为一个字典树正则，每条记录只扫描一次
+
+旧实现在全部记录上运行太慢，只在前 --legacy-entries 条上计时，再按条数折算。
+同时用逐位置查找最长热词的朴素实现检查结果是否正确。旧实现按热词长度逐个替换，
+不是最左最长匹配，还会在已插入的 <b> 标签内继续匹配，所以结果不作为对照。
+
+用法:
+    python tools/benchmark_hotword_highlight.py --hotwords 5000 --entries 10000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from utils.hotword_highlighter import HotwordHighlighter, highlight_hotwords
+
+CHARS = '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经'
+LATIN = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def make_hotwords(count, rng):
+    words = set()
+    while len(words) < count:
+        if rng.random() < 0.7:
+            words.add(''.join(rng.choices(CHARS, k=rng.randint(2, 4))))
+        else:
+            word = ''.join(rng.choices(LATIN, k=rng.randint(3, 8)))
+            words.add(word.capitalize() if rng.random() < 0.5 else word)
+    return sorted(words)
+
+
+def make_entries(count, hotwords, rng):
+    entries = []
+    for _ in range(count):
+        parts = [''.join(rng.choices(CHARS, k=rng.randint(5, 15))) for _ in range(3)]
+        for i in range(rng.randint(0, 3)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(hotwords).upper() if i == 1 else rng.choice(hotwords))
+        entries.append('，'.join(parts) + '。')
+    return entries
+
+
+def legacy_highlight(text, hotwords):
+    """旧的 apply_hotword_highlight"""
+    highlighted_text = text
+    sorted_hotwords = sorted(hotwords, key=len, reverse=True)
+    for hotword in sorted_hotwords:
+        if hotword and hotword.strip():
+            pattern = re.escape(hotword.strip())
+            highlighted_text = re.sub(f'({pattern})', r'<b>\1</b>', highlighted_text, flags=re.IGNORECASE)
+    return highlighted_text
+
+
+def reference_highlight(text, hotwords):
+    """朴素的最左最长匹配"""
+    words = {w.strip().lower() for w in hotwords if w.strip()}
+    lengths = sorted({len(w) for w in words}, reverse=True)
+    lowered = text.lower()
+    out, i = [], 0
+    while i < len(text):
+        for length in lengths:
+            if lowered[i:i + length] in words:
+                out.append(f'<b>{text[i:i + length]}</b>')
+                i += length
+                break
+        else:
+            out.append(text[i])
+            i += 1
+    return ''.join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史记录热词高亮耗时测试")
+    parser.add_argument('--hotwords', type=int, default=5000, help="热词个数")
+    parser.add_argument('--entries', type=int, default=10000, help="历史记录条数")
+    parser.add_argument('--legacy-entries', type=int, default=100, help="旧实现实际计时的条数")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hotwords = make_hotwords(args.hotwords, rng)
+    entries = make_entries(args.entries, hotwords, rng)
+
+    legacy_count = min(args.legacy_entries, len(entries))
+    start = time.perf_counter()
+    legacy_results = [legacy_highlight(text, hotwords) for text in entries[:legacy_count]]
+    legacy_ms = (time.perf_counter() - start) * 1000
+    legacy_total_ms = legacy_ms / legacy_count * len(entries)
+
+    start = time.perf_counter()
+    HotwordHighlighter(hotwords)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    highlight_hotwords(entries[0], hotwords)  # 编译并缓存高亮器
+    start = time.perf_counter()
+    results = [highlight_hotwords(text, hotwords) for text in entries]
+    new_ms = (time.perf_counter() - start) * 1000
+
+    same = sum(reference_highlight(text, hotwords) == result for text, result in zip(entries, results))
+    differs = sum(old != new for old, new in zip(legacy_results, results))
+
+    print(f"{args.hotwords} 个热词 × {args.entries} 条历史记录\n")
+    print(f"{'实现':<16}{'总耗时(ms)':>12}{'每条(ms)':>12}")
+    print(f"{'旧实现(折算)':<16}{legacy_total_ms:>12.0f}{legacy_ms / legacy_count:>12.3f}")
+    print(f"{'字典树正则':<16}{new_ms:>12.1f}{new_ms / len(entries):>12.4f}")
+    print(f"\n编译高亮器 {compile_ms:.0f} ms（热词变化时才重新编译）")
+    print(f"与朴素最左最长匹配一致: {same}/{len(entries)}")
+    print(f"与旧实现结果不同（重叠或嵌套标签）: {differs}/{legacy_count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+长录音分段转写的耗时测试
+
+对同一段长录音分别做：
+- 单次整段解码（原先的做法，作为基准文本和基准耗时）
+- 按不同片段时长在静音处切段，逐段解码
+
+统计每种方式的墙钟耗时、相对整段解码的加速比，以及与整段解码文本的差异
+（忽略标点和空白后的字差异率）。
+
+录音可以是一个 16kHz 单声道 WAV，也可以是语料目录（按文件名顺序拼接成一段长录音）：
+    python tools/benchmark_long_transcription.py --audio long.wav
+    python tools/benchmark_long_transcription.py --corpus path/to/corpus --segments 60,30,15,10
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import wave
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1:
+            raise ValueError(f"只支持16kHz单声道WAV文件: {path}")
+        frames = wf.readframes(wf.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio(args):
+    if args.audio:
+        return read_wav(args.audio)
+    clips = [read_wav(os.path.join(args.corpus, name))
+             for name in sorted(os.listdir(args.corpus)) if name.endswith('.wav')]
+    if not clips:
+        raise ValueError("语料目录中没有 WAV 文件")
+    # 片段之间插入 0.5 秒静音，模拟说话停顿
+    gap = np.zeros(SAMPLE_RATE // 2, dtype=np.float32)
+    return np.concatenate([part for clip in clips for part in (clip, gap)])
+
+
+def normalize(text):
+    """去掉标点和空白，只比较文字本身"""
+    return re.sub(r'[\s\W_]+', '', text.lower())
+
+
+def edit_distance(ref, hyp):
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def best_of(runs, func):
+    """运行多次，返回最快一次的耗时（毫秒）和结果"""
+    best, result = float('inf'), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长录音分段转写的耗时测试")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--audio', help="16kHz 单声道 WAV 长录音")
+    source.add_argument('--corpus', help="语料目录，按文件名顺序拼接成一段长录音")
+    parser.add_argument('--segments', default='60,30,15,10', help="片段时长列表（秒），逗号分隔")
+    parser.add_argument('--runs', type=int, default=2, help="每种方式重复次数，取最快一次")
+    args = parser.parse_args()
+
+    from settings_manager import SettingsManager
+    from funasr_engine import FunASREngine
+
+    audio = load_audio(args)
+    print(f"录音时长: {len(audio) / SAMPLE_RATE:.1f}s，CPU 核数: {os.cpu_count()}")
+
+    settings_manager = SettingsManager()
+    # 只比较识别文本，不加标点
+    settings_manager.set_setting('asr.auto_punctuation', False, auto_save=False)
+    engine = FunASREngine(settings_manager)
+
+    single_ms, single_text = best_of(
+        args.runs, lambda: engine._finalize_text(engine._transcribe_single(audio)))
+    reference = normalize(single_text)
+
+    print(f"\n{'片段(s)':>8}{'片段数':>8}{'耗时(ms)':>12}{'加速比':>8}{'时间戳合并':>12}{'文本差异':>10}")
+    print(f"{'整段':>8}{1:>8}{single_ms:>12.0f}{1.0:>8.2f}{'-':>12}{0.0:>10.2%}")
+    for segment_seconds in (float(s) for s in args.segments.split(',')):
+        elapsed, result = best_of(args.runs, lambda: engine._transcribe_long(audio, segment_seconds))
+        stats = engine.long_audio_stats
+        hyp = normalize(result[0]['text'])
+        diff = edit_distance(reference, hyp) / len(reference) if reference else 0.0
+        print(f"{segment_seconds:>8.0f}{stats['segments']:>8}{elapsed:>12.0f}"
+              f"{single_ms / elapsed:>8.2f}{'是' if stats['timestamp_merge'] else '否':>12}{diff:>10.2%}")
+
+
+if __name__ == '__main__':
+    main()
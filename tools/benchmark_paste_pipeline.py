@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+转写完成到粘贴的延迟测试
+
+用内存后端（MemoryClipboard / MemoryFocus / MemoryKeystrokes）模拟系统剪贴板和前台应用，
+各操作的耗时由参数指定，对比旧的同步流程和粘贴流水线：
+- 调用线程（界面线程）被阻塞的时间
+- 从转写完成到发出粘贴快捷键的时间
+- 流水线各阶段耗时的中位数
+
+旧流程：复制 → 等待 10ms → 读回校验 → osascript 查询前台应用 → 等待 100ms → 按键 → 等待 50ms
+
+用法:
+    python tools/benchmark_paste_pipeline.py --trials 20 --osascript-ms 60
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from paste_pipeline import MemoryClipboard, MemoryFocus, MemoryKeystrokes, is_own_app
+
+
+def legacy_copy_and_paste(clipboard, focus, keystrokes, text):
+    """旧的 safe_copy_and_paste：全部在调用线程中执行"""
+    clipboard.copy(text)
+    time.sleep(0.01)
+    if clipboard.paste() != text:
+        return False
+    current = focus.frontmost_app()
+    if is_own_app(current):
+        target = focus.recent_app()
+        if target:
+            focus.activate(target)
+    time.sleep(0.1)
+    keystrokes.send_paste()
+    time.sleep(0.05)
+    return True
+
+
+def run_legacy(args, own_app_frontmost):
+    clipboard = MemoryClipboard(args.copy_ms, args.read_ms)
+    focus = MemoryFocus(query_ms=args.osascript_ms, activate_ms=args.osascript_ms)
+    keystrokes = MemoryKeystrokes(clipboard, focus)
+    blocked, latency = [], []
+    for i in range(args.trials):
+        focus.frontmost = 'Python' if own_app_frontmost else 'TextEdit'
+        start = time.perf_counter()
+        legacy_copy_and_paste(clipboard, focus, keystrokes, f"第 {i} 次转写结果")
+        blocked.append((time.perf_counter() - start) * 1000)
+        latency.append((keystrokes.pasted[-1][2] - start) * 1000)
+    return np.array(blocked), np.array(latency), {}
+
+
+def run_pipeline(args, own_app_frontmost):
+    from clipboard_manager import ClipboardManager
+
+    clipboard = MemoryClipboard(args.copy_ms, args.read_ms)
+    # 流水线用 NSWorkspace 查询前台应用，切换应用仍然是 osascript
+    focus = MemoryFocus(query_ms=args.appkit_ms, activate_ms=args.osascript_ms)
+    keystrokes = MemoryKeystrokes(clipboard, focus)
+    manager = ClipboardManager(clipboard=clipboard, keystrokes=keystrokes, focus=focus)
+    blocked, latency, stages = [], [], {}
+    for i in range(args.trials):
+        focus.frontmost = 'TextEdit'
+        manager.capture_target_app().result()  # 按下热键
+        if own_app_frontmost:
+            focus.frontmost = 'Python'
+        start = time.perf_counter()
+        future = manager.paste_async(f"第 {i} 次转写结果")
+        blocked.append((time.perf_counter() - start) * 1000)
+        result = future.result()
+        latency.append((keystrokes.pasted[-1][2] - start) * 1000)
+        for name, value in result['timings'].items():
+            stages.setdefault(name, []).append(value)
+    manager.cleanup()
+    return np.array(blocked), np.array(latency), stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="转写完成到粘贴的延迟测试")
+    parser.add_argument('--trials', type=int, default=20, help="每种场景的粘贴次数")
+    parser.add_argument('--copy-ms', type=float, default=8.0, help="模拟写入剪贴板的耗时（毫秒）")
+    parser.add_argument('--read-ms', type=float, default=8.0, help="模拟读取剪贴板的耗时（毫秒）")
+    parser.add_argument('--osascript-ms', type=float, default=60.0, help="模拟一次 osascript 调用的耗时（毫秒）")
+    parser.add_argument('--appkit-ms', type=float, default=0.1, help="模拟 NSWorkspace 查询前台应用的耗时（毫秒）")
+    args = parser.parse_args()
+
+    print(f"{'场景':<26}{'界面线程阻塞(ms)':>16}{'到按键(ms)':>12}")
+    for own_app_frontmost in (False, True):
+        scene = '前台为本应用' if own_app_frontmost else '前台为目标应用'
+        for name, run in (('旧流程', run_legacy), ('流水线', run_pipeline)):
+            blocked, latency, stages = run(args, own_app_frontmost)
+            print(f"{scene + ' / ' + name:<26}{np.median(blocked):>16.2f}{np.median(latency):>12.2f}")
+            if stages:
+                detail = ', '.join(f"{stage} {np.median(values):.2f}" for stage, values in stages.items())
+                print(f"    各阶段中位数(ms): {detail}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+int8 动态量化与 fp32 推理对比
+
+在本地测试语料上分别以 fp32 和 int8 量化模式加载 FunASREngine，统计：
+- 每条音频的转写延迟（中位数 / P90）
+- 进程峰值内存（RSS）
+- 字错误率（CER，忽略标点和空白）
+
+每种模式在独立子进程中运行，避免两套模型同时驻留影响内存统计。
+
+语料目录中每条音频为 16kHz 单声道 WAV，同名 .txt 文件为参考文本：
+    corpus/0001.wav  corpus/0001.txt  ...
+
+用法:
+    python tools/benchmark_quantization.py --corpus path/to/corpus
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import wave
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+
+
+def load_corpus(corpus_dir):
+    """读取语料目录，返回 [(名称, wav路径, 参考文本)]"""
+    items = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        if not filename.endswith('.wav'):
+            continue
+        name = filename[:-4]
+        txt_path = os.path.join(corpus_dir, name + '.txt')
+        if not os.path.exists(txt_path):
+            continue
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            items.append((name, os.path.join(corpus_dir, filename), f.read().strip()))
+    return items
+
+
+def read_wav(path):
+    import numpy as np
+    with wave.open(path, 'rb') as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1:
+            raise ValueError(f"只支持16kHz单声道WAV文件: {path}")
+        frames = wf.readframes(wf.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def normalize(text):
+    """去掉标点和空白，只比较文字本身"""
+    return re.sub(r'[\s\W_]+', '', text.lower())
+
+
+def edit_distance(ref, hyp):
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_mode(mode, corpus_dir, runs):
+    """在当前进程中加载引擎并跑完语料，返回统计结果"""
+    from settings_manager import SettingsManager
+    from funasr_engine import FunASREngine
+
+    settings_manager = SettingsManager()
+    settings_manager.set_setting('asr.quantization.enabled', mode == 'int8', auto_save=False)
+
+    load_start = time.perf_counter()
+    engine = FunASREngine(settings_manager)
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    latencies = []
+    errors = 0
+    ref_chars = 0
+    for name, wav_path, reference in load_corpus(corpus_dir):
+        audio = read_wav(wav_path)
+        text = ''
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = engine.transcribe(audio)
+            latencies.append((time.perf_counter() - start) * 1000)
+            text = result[0].get('text', '') if result else ''
+        ref, hyp = normalize(reference), normalize(text)
+        errors += edit_distance(ref, hyp)
+        ref_chars += len(ref)
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'load_ms': round(load_ms, 1),
+        'utterances': len(latencies) // max(runs, 1),
+        'median_ms': round(statistics.median(latencies), 1) if latencies else 0.0,
+        'p90_ms': round(latencies[int(len(latencies) * 0.9) - 1], 1) if latencies else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'cer': round(errors / ref_chars, 4) if ref_chars else 0.0,
+        'quantization': engine.get_status().get('quantization', {})
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 量化与 fp32 推理对比")
+    parser.add_argument('--corpus', required=True, help="语料目录（WAV + 同名 TXT 参考文本）")
+    parser.add_argument('--runs', type=int, default=3, help="每条音频的重复次数")
+    parser.add_argument('--mode', choices=['fp32', 'int8'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # 子进程：只跑一种模式，结果以 JSON 输出到最后一行
+        print(json.dumps(run_mode(args.mode, args.corpus, args.runs), ensure_ascii=False))
+        return
+
+    if not load_corpus(args.corpus):
+        print("语料目录中没有找到 WAV + TXT 配对文件")
+        sys.exit(1)
+
+    results = {}
+    for mode in ('fp32', 'int8'):
+        print(f"运行 {mode} ...")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--corpus', args.corpus,
+             '--runs', str(args.runs), '--mode', mode],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print("\n=== 结果 ===")
+    print(f"{'模式':<6}{'加载(ms)':>10}{'中位数(ms)':>12}{'P90(ms)':>10}{'峰值RSS(MB)':>14}{'CER':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<6}{r['load_ms']:>10.0f}{r['median_ms']:>12.1f}{r['p90_ms']:>10.1f}"
+              f"{r['peak_rss_mb']:>14.0f}{r['cer']:>8.2%}")
+
+    fp32, int8 = results['fp32'], results['int8']
+    if fp32['median_ms']:
+        print(f"\n延迟变化: {int8['median_ms'] / fp32['median_ms']:.2f}x")
+    print(f"内存变化: {int8['peak_rss_mb'] - fp32['peak_rss_mb']:+.0f}MB")
+    print(f"CER变化: {(int8['cer'] - fp32['cer']) * 100:+.2f} 个百分点")
+
+
+if __name__ == '__main__':
+    main()
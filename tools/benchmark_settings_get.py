@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+get_setting 读取吞吐测试
+
+多个读取线程循环读取采集、转写、热键路径上常用的设置，同时一个写入线程不断修改设置，
+对比旧实现（每次读取加 RLock、拆分点号键）和不可变快照实现的读取次数 / 秒。
+
+同时检查一致性：写入线程用 set_multiple_settings 同时修改两个键，
+读取线程从同一个快照读取这两个键，不应看到只修改了一半的状态。
+
+在临时目录中运行，不会修改工作目录下的 settings.json。
+
+用法:
+    python tools/benchmark_settings_get.py --readers 3 --seconds 2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from settings_manager import SettingsManager
+
+HOT_KEYS = [
+    'asr.auto_punctuation',
+    'asr.enable_pronunciation_correction',
+    'asr.hotword_weight',
+    'audio.vad.enabled',
+    'audio.capture_mode',
+    'hotkey',
+    'paste.transcription_delay',
+    'tracing.enabled',
+]
+
+
+class LegacyReader:
+    """旧的 get_setting：加锁后逐级查找"""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._lock = threading.RLock()
+
+    def get_setting(self, key, default=None):
+        with self._lock:
+            try:
+                keys = key.split('.')
+                value = self.manager.settings
+                for k in keys:
+                    value = value[k]
+                return value
+            except (KeyError, TypeError):
+                return default
+
+    def set_setting(self, key, value):
+        with self._lock:
+            self.manager.set_setting(key, value)
+
+
+def run(reader, writer, readers, seconds, with_writer):
+    stop = threading.Event()
+    counts = [0] * readers
+
+    def read_loop(index):
+        get = reader.get_setting
+        n = 0
+        while not stop.is_set():
+            for key in HOT_KEYS:
+                get(key)
+            n += len(HOT_KEYS)
+        counts[index] = n
+
+    def write_loop():
+        i = 0
+        while not stop.is_set():
+            writer(i)
+            i += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    if with_writer:
+        threads.append(threading.Thread(target=write_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def check_consistency(manager, seconds):
+    stop = threading.Event()
+    torn = [0, 0]
+
+    def write_loop():
+        i = 0
+        while not stop.is_set():
+            manager.set_multiple_settings({'audio.vad.min_speech_ms': i, 'audio.vad.min_silence_ms': i})
+            i += 1
+
+    def read_loop():
+        while not stop.is_set():
+            snapshot = manager.snapshot
+            torn[1] += 1
+            if snapshot.get('audio.vad.min_speech_ms') != snapshot.get('audio.vad.min_silence_ms'):
+                torn[0] += 1
+
+    threads = [threading.Thread(target=write_loop), threading.Thread(target=read_loop)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return torn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_setting 读取吞吐测试")
+    parser.add_argument('--readers', type=int, default=3, help="读取线程数")
+    parser.add_argument('--seconds', type=float, default=2.0, help="每种场景的测试时长（秒）")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='settings_bench_'))
+    manager = SettingsManager()
+    legacy = LegacyReader(manager)
+
+    print(f"{'实现':<10}{'写入线程':>8}{'读取(万次/秒)':>16}")
+    for with_writer in (False, True):
+        for name, reader, writer in (
+            ('加锁读取', legacy, lambda i: legacy.set_setting('audio.volume_threshold', i)),
+            ('快照读取', manager, lambda i: manager.set_setting('audio.volume_threshold', i)),
+        ):
+            rate = run(reader, writer, args.readers, args.seconds, with_writer)
+            print(f"{name:<10}{'有' if with_writer else '无':>8}{rate / 10000:>16.1f}")
+
+    torn, total = check_consistency(manager, min(args.seconds, 1.0))
+    print(f"\n同时修改两个键时读到不一致状态: {torn}/{total}")
+    manager.close()
+    print(f"设置文件实际写入次数: {manager.save_count}")
+
+
+if __name__ == '__main__':
+    main()
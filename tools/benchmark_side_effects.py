@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+开始录音关键路径上的系统副作用测试
+
+用模拟的音量后端代替 osascript（每次调用耗时 --osascript-ms 毫秒），
+调用 AudioManagerWrapper.start_recording_process，统计从按下热键到录音线程启动的延迟，
+并与旧流程（播放音效 → 读取音量 → 静音 → 启动录音线程）对比。
+
+同时检查恢复音量的正确性：
+- 正常的按下 / 松开后音量恢复为原值
+- 恢复执行前又按下热键时，不会在录音期间取消静音，也不会把 0 当作原音量保存
+
+检查不通过时以非零状态退出。同样的检查在 tests/test_side_effects.py 中作为测试运行。
+
+用法:
+    python tools/benchmark_side_effects.py --trials 20 --osascript-ms 80
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from utils.side_effects import VolumeController
+
+
+class StubVolumeBackend:
+    """模拟 osascript：每次调用固定耗时"""
+
+    def __init__(self, cost_ms, volume=50):
+        self.cost = cost_ms / 1000
+        self.volume = volume
+        self.muted = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_volume(self):
+        time.sleep(self.cost)
+        with self._lock:
+            self.calls += 1
+            return 0 if self.muted else self.volume
+
+    def set_volume(self, volume):
+        time.sleep(self.cost)
+        with self._lock:
+            self.calls += 1
+            if volume is None:
+                self.muted = True
+            else:
+                self.volume = volume
+                self.muted = False
+
+
+class StubStateManager:
+    def start_recording(self):
+        pass
+
+    def stop_recording(self):
+        pass
+
+
+class StubSettings:
+    def get_setting(self, key, default=None):
+        return default
+
+    def get_max_recording_duration(self):
+        return 0
+
+
+class StubCapture:
+    capture_mode = 'callback'
+
+    def configure_vad(self, **kwargs):
+        pass
+
+    def configure_long_dictation(self, **kwargs):
+        pass
+
+
+class StubCaptureThread:
+    """记录 start() 被调用的时间"""
+
+    def __init__(self):
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def isFinished(self):
+        return False
+
+
+def legacy_start(backend, state_manager, thread):
+    """旧流程：副作用全部在开始录音的关键路径上"""
+    state_manager.start_recording()
+    previous_volume = backend.get_volume()
+    if previous_volume is not None:
+        backend.set_volume(None)
+    thread.start()
+    return previous_volume
+
+
+def make_wrapper(backend):
+    from managers.audio_manager_wrapper import AudioManagerWrapper
+
+    wrapper = AudioManagerWrapper()
+    wrapper._original_capture = StubCapture()
+    wrapper._initialized = True
+    wrapper.volume_controller = VolumeController(backend=backend)
+    return wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="开始录音关键路径上的系统副作用测试")
+    parser.add_argument('--trials', type=int, default=20, help="每种流程的录音次数")
+    parser.add_argument('--osascript-ms', type=float, default=80.0, help="模拟每次 osascript 调用的耗时（毫秒）")
+    args = parser.parse_args()
+
+    state_manager = StubStateManager()
+    settings = StubSettings()
+
+    legacy_backend = StubVolumeBackend(args.osascript_ms)
+    legacy = []
+    for _ in range(args.trials):
+        thread = StubCaptureThread()
+        pressed = time.perf_counter()
+        previous_volume = legacy_start(legacy_backend, state_manager, thread)
+        legacy.append((thread.started_at - pressed) * 1000)
+        legacy_backend.set_volume(previous_volume)
+
+    backend = StubVolumeBackend(args.osascript_ms)
+    wrapper = make_wrapper(backend)
+    current = []
+    for _ in range(args.trials):
+        thread = StubCaptureThread()
+        pressed = time.perf_counter()
+        token, _ = wrapper.start_recording_process(state_manager, thread, settings, lambda ms: None)
+        current.append((thread.started_at - pressed) * 1000)
+        wrapper.restore_volume_async(token)
+    wrapper.volume_controller.executor.submit('drain', lambda: None).result()
+    restored_ok = backend.volume == 50 and not backend.muted
+
+    # 恢复执行前再次按下热键：第一次的恢复被跳过，录音期间保持静音
+    token1, _ = wrapper.start_recording_process(state_manager, StubCaptureThread(), settings, lambda ms: None)
+    token2, _ = wrapper.start_recording_process(state_manager, StubCaptureThread(), settings, lambda ms: None)
+    wrapper.restore_volume_async(token1)
+    wrapper.volume_controller.executor.submit('drain', lambda: None).result()
+    muted_during_second = backend.muted
+    wrapper.set_system_volume(token2)
+    repress_ok = muted_during_second and backend.volume == 50 and not backend.muted
+
+    print(f"{'流程':<16}{'中位数(ms)':>12}{'p95(ms)':>10}{'最大(ms)':>10}")
+    for name, values in (('旧流程（同步）', legacy), ('副作用线程', current)):
+        values = np.array(values)
+        print(f"{name:<16}{np.median(values):>12.3f}{np.percentile(values, 95):>10.3f}{values.max():>10.3f}")
+    print(f"\n按下 / 松开后音量恢复: {'正确' if restored_ok else '错误'}")
+    print(f"恢复前再次按下: {'正确' if repress_ok else '错误'}"
+          f"（第二次录音期间{'保持静音' if muted_during_second else '被取消静音'}）")
+    wrapper.volume_controller.shutdown()
+    if not (restored_ok and repress_ok):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+流式转写与离线转写的延迟对比
+
+统计"松开热键"到拿到最终文本的时间：
+- 离线模式：松开后对整段录音调用 FunASREngine.transcribe
+- 流式模式：录音期间按 100ms 一块实时投递给 StreamingJob，由 TranscriptionWorker._run_stream
+  （应用中转写线程执行的同一段代码）解码，松开后只剩最后一段需要解码
+
+用法:
+    python tools/benchmark_streaming.py --wav sample.wav --runs 3
+    python tools/benchmark_streaming.py --seconds 10      # 没有录音文件时使用合成音频
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 1600  # 与 AudioCaptureThread 的 100ms 发射间隔一致
+
+
+def load_audio(wav_path, seconds):
+    """读取16kHz单声道WAV，没有文件时生成带语音包络的合成音频"""
+    if wav_path:
+        with wave.open(wav_path, 'rb') as wf:
+            if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1:
+                raise ValueError("只支持16kHz单声道WAV文件")
+            frames = wf.readframes(wf.getnframes())
+        return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+    return (0.1 * envelope * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def run_offline(engine, audio):
+    release = time.perf_counter()
+    result = engine.transcribe(audio)
+    latency = time.perf_counter() - release
+    text = result[0].get('text', '') if result else ''
+    return latency, text
+
+
+def run_streaming(worker, audio, realtime):
+    """在当前线程中执行转写线程处理流式任务的代码，采集线程由 producer 模拟"""
+    from audio_threads import StreamingJob
+
+    job = StreamingJob(1)
+    release_time = {}
+    partials = []
+
+    def producer():
+        for start in range(0, len(audio), CHUNK_SAMPLES):
+            job.feed(audio[start:start + CHUNK_SAMPLES])
+            if realtime:
+                time.sleep(CHUNK_SAMPLES / SAMPLE_RATE)
+        release_time['t'] = time.perf_counter()
+        job.finish()
+
+    def on_partial(job_id, text):
+        partials.append(text)
+
+    worker.partial_result.connect(on_partial)
+    feeder = threading.Thread(target=producer, daemon=True)
+    feeder.start()
+    try:
+        final_text = worker._run_stream(job)
+        done = time.perf_counter()
+    finally:
+        worker.partial_result.disconnect(on_partial)
+    feeder.join()
+    return done - release_time['t'], final_text, len(partials)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式/离线转写延迟对比")
+    parser.add_argument('--wav', help="16kHz单声道WAV文件")
+    parser.add_argument('--seconds', type=float, default=10.0, help="合成音频时长（秒）")
+    parser.add_argument('--runs', type=int, default=3, help="每种模式的运行次数")
+    parser.add_argument('--no-realtime', action='store_true', help="不按实时速度喂入音频块")
+    args = parser.parse_args()
+
+    from settings_manager import SettingsManager
+    from funasr_engine import FunASREngine
+    from audio_threads import TranscriptionWorker
+
+    audio = load_audio(args.wav, args.seconds)
+    print(f"音频时长: {len(audio) / SAMPLE_RATE:.1f}s")
+
+    engine = FunASREngine(SettingsManager())
+    # 不启动线程，只借用 _run_stream
+    worker = TranscriptionWorker(engine)
+    backend = "流式模型" if engine.streaming_model is not None else "离线模型分段解码"
+    print(f"流式后端: {backend}")
+
+    # 预热一次，避免首次推理的初始化开销影响对比
+    engine.transcribe(audio[:SAMPLE_RATE])
+
+    offline, streaming = [], []
+    for i in range(args.runs):
+        latency, text = run_offline(engine, audio)
+        offline.append(latency)
+        print(f"[离线 #{i + 1}] 松开到最终文本: {latency * 1000:.0f}ms  {text[:40]}")
+
+        latency, text, partials = run_streaming(worker, audio, not args.no_realtime)
+        streaming.append(latency)
+        print(f"[流式 #{i + 1}] 松开到最终文本: {latency * 1000:.0f}ms  中间结果 {partials} 次  {text[:40]}")
+
+    print("\n=== 结果（中位数） ===")
+    print(f"离线: {statistics.median(offline) * 1000:.0f}ms")
+    print(f"流式: {statistics.median(streaming) * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+延迟追踪的开销测试
+
+1. 单个区间的记录开销（关闭 / 开启）
+2. 用模拟的 PyAudio 流跑一遍录音路径（采集 + VAD），
+   对比追踪关闭和开启时的 CPU 时间，并输出导出的 Chrome trace 示例
+
+用法:
+    python tools/benchmark_tracing.py --utterances 20 --seconds 5
+    python tools/benchmark_tracing.py --export trace.json   # 导出示例追踪
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src'), os.path.join(project_root, 'tools')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+
+
+def span_cost_ns(tracer, iterations=200000):
+    """单个 with tracer.span() 的平均耗时（纳秒）"""
+    tracer.begin_utterance()
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        with tracer.span('bench.span'):
+            pass
+    elapsed = time.perf_counter_ns() - start
+    tracer.end_utterance()
+    return elapsed / iterations
+
+
+def run_utterance(tracer, capture, source):
+    """模拟一次语音输入：采集和VAD，返回 CPU 时间（秒）"""
+    import audio_capture
+    from benchmark_capture import FakePyAudioModule
+
+    audio_capture.pyaudio = FakePyAudioModule(source, realtime=False)
+    cpu_start = time.process_time()
+    tracer.begin_utterance(hotkey='bench')
+    with tracer.span('hotkey.press'):
+        capture.start_recording()
+    while capture.stream is not None and capture.stream.is_active():
+        if capture.read_audio() is None:
+            break
+    capture.stop_recording()
+    with tracer.span('capture.speech_audio'):
+        capture.get_speech_audio()
+    tracer.end_utterance()
+    cpu = time.process_time() - cpu_start
+    capture.stream = None
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="延迟追踪的开销测试")
+    parser.add_argument('--utterances', type=int, default=20, help="每种模式模拟的语音输入次数")
+    parser.add_argument('--seconds', type=float, default=5.0, help="每次语音输入的录音时长（秒）")
+    parser.add_argument('--export', help="导出最后几次语音输入的 Chrome trace JSON")
+    args = parser.parse_args()
+
+    from utils.tracing import Tracer, tracer
+    import audio_capture
+    from benchmark_capture import FakePyAudioModule
+
+    probe = Tracer()
+    disabled_ns = span_cost_ns(probe)
+    probe.configure(True)
+    enabled_ns = span_cost_ns(probe)
+    print(f"单个区间开销: 关闭 {disabled_ns:.0f}ns，开启 {enabled_ns:.0f}ns")
+
+    t = np.arange(int(args.seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    source = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    audio_capture.pyaudio = FakePyAudioModule(source, realtime=False)
+    capture = audio_capture.AudioCapture()
+    capture.audio = None  # 跳过 _cleanup 中等待真实设备释放的 sleep
+    capture._initialize_audio()
+
+    results = {}
+    # 交替运行两种模式，减少 CPU 频率变化的影响
+    timings = {False: [], True: []}
+    for i in range(args.utterances * 2):
+        enabled = bool(i % 2)
+        tracer.configure(enabled)
+        timings[enabled].append(run_utterance(tracer, capture, source))
+    for enabled, values in timings.items():
+        results[enabled] = float(np.median(values)) * 1000
+
+    spans = len(tracer.get_utterances(1)[0].events) if tracer.get_utterances(1) else 0
+    overhead = (results[True] - results[False]) / results[False] if results[False] else 0.0
+    print(f"每次语音输入 CPU 时间（中位数）: 关闭 {results[False]:.2f}ms，开启 {results[True]:.2f}ms")
+    print(f"每次语音输入记录 {spans} 个区间，开销 {overhead:+.2%}"
+          f"（按单区间开销估算 {spans * enabled_ns / 1e6 / results[False]:.3%}）")
+
+    if args.export:
+        tracer.export_chrome_trace(args.export, last=3)
+        print(f"已导出: {os.path.abspath(args.export)}")
+    capture.audio = None
+
+
+if __name__ == '__main__':
+    main()
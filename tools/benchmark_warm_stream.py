@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+常开输入流（预录缓冲区）与按下热键时打开输入流的对比
+
+用模拟的麦克风设备代替 PyAudio：打开输入流需要 --open-ms 毫秒（模拟 CoreAudio 打开设备），
+之后按真实速度每 32ms 回调一次。每轮测试中用户在按下热键前 --lead-ms 毫秒开始说话，统计：
+- 按下热键到采集线程读到第一帧的延迟
+- 说话开头丢失的时长（从开始说话到录音中第一个语音采样）
+
+用法:
+    python tools/benchmark_warm_stream.py --trials 10 --open-ms 150 --lead-ms 100
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_RATE = 16000
+CALLBACK_FRAMES = 512
+
+
+class FakeMicrophone:
+    """模拟麦克风：speech_at 之前为静音，之后为正弦音（代表语音）"""
+
+    def __init__(self):
+        self.speech_at = float('inf')
+
+    def block(self, start_time, frames):
+        times = start_time + np.arange(frames) / SAMPLE_RATE
+        phase = 2 * np.pi * 220 * times
+        return np.where(times >= self.speech_at, 0.2 * np.sin(phase), 0.0).astype(np.float32)
+
+
+class FakeStream:
+    """按真实速度回调的输入流，每块采样的时间戳取自墙钟"""
+
+    def __init__(self, microphone, callback):
+        self._microphone = microphone
+        self._callback = callback
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = CALLBACK_FRAMES / SAMPLE_RATE
+        next_at = time.perf_counter()
+        while self._active:
+            next_at += period
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # 这一块采样覆盖的是刚过去的 period 秒
+            data = self._microphone.block(next_at - period, CALLBACK_FRAMES).tobytes()
+            self._callback(data, CALLBACK_FRAMES, {}, 0)
+
+    def is_active(self):
+        return self._active
+
+    def stop_stream(self):
+        self._active = False
+
+    def close(self):
+        self._active = False
+        self._thread.join()
+
+
+class FakePyAudioModule:
+    paFloat32 = 1
+    paContinue = 0
+
+    def __init__(self, microphone, open_ms):
+        self.microphone = microphone
+        self.open_ms = open_ms
+
+    def PyAudio(self):
+        return self
+
+    def get_default_input_device_info(self):
+        return {'index': 0, 'name': 'fake'}
+
+    def open(self, stream_callback=None, **kwargs):
+        time.sleep(self.open_ms / 1000)
+        return FakeStream(self.microphone, stream_callback)
+
+    def terminate(self):
+        pass
+
+
+def run_trial(capture, microphone, lead_ms, record_ms):
+    """开始说话 lead_ms 后按下热键，返回 (首帧延迟 ms, 丢失的开头 ms)"""
+    speech_at = time.perf_counter() + 0.05
+    microphone.speech_at = speech_at
+    time.sleep(max(0.0, speech_at + lead_ms / 1000 - time.perf_counter()))
+
+    pressed = time.perf_counter()
+    capture.start_recording()
+    first_frame = None
+    deadline = pressed + record_ms / 1000
+    while time.perf_counter() < deadline:
+        data = capture.read_audio()
+        if first_frame is None and data is not None and len(data) > 0:
+            first_frame = time.perf_counter()
+    audio = capture.stop_recording()
+
+    voiced = np.flatnonzero(np.abs(audio) > 0.01)
+    captured_speech_ms = len(audio[voiced[0]:]) / 16 if len(voiced) else 0.0
+    stopped = time.perf_counter()
+    expected_speech_ms = (stopped - speech_at) * 1000
+    microphone.speech_at = float('inf')
+    first_ms = (first_frame - pressed) * 1000 if first_frame else float('nan')
+    return first_ms, max(0.0, expected_speech_ms - captured_speech_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常开输入流与按需打开输入流的首帧延迟对比")
+    parser.add_argument('--trials', type=int, default=10, help="每种模式的录音次数")
+    parser.add_argument('--open-ms', type=float, default=150.0, help="模拟打开输入设备的耗时（毫秒）")
+    parser.add_argument('--lead-ms', type=float, default=100.0, help="按下热键前多久开始说话（毫秒）")
+    parser.add_argument('--preroll-ms', type=float, default=300.0, help="预录缓冲区时长（毫秒）")
+    parser.add_argument('--record-ms', type=float, default=500.0, help="每次录音时长（毫秒）")
+    args = parser.parse_args()
+
+    import audio_capture
+
+    microphone = FakeMicrophone()
+    audio_capture.pyaudio = FakePyAudioModule(microphone, args.open_ms)
+
+    print(f"{'模式':<10}{'首帧中位数(ms)':>16}{'首帧最大(ms)':>14}{'开头丢失中位数(ms)':>20}")
+    for warm in (False, True):
+        capture = audio_capture.AudioCapture()
+        capture.vad_enabled = False
+        capture.configure_warm_stream(enabled=warm, preroll_ms=args.preroll_ms)
+        time.sleep(args.preroll_ms / 1000 + 0.05)  # 常开流先填满预录缓冲区
+        results = np.array([run_trial(capture, microphone, args.lead_ms, args.record_ms)
+                            for _ in range(args.trials)])
+        capture.configure_warm_stream(enabled=False)
+        capture.audio = None  # 跳过 _cleanup 中等待真实设备释放的 sleep
+        name = '常开+预录' if warm else '按需打开'
+        print(f"{name:<10}{np.median(results[:, 0]):>16.1f}{results[:, 0].max():>14.1f}"
+              f"{np.median(results[:, 1]):>20.1f}")
+
+
+if __name__ == '__main__':
+    main()